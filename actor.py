@@ -0,0 +1,62 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+class RoomActor:
+    """Serializes every change to one room through a single consumer task
+
+    Callers submit coroutine functions to the room's queue and await their
+    result; only the actor task runs them, one at a time, so nothing else
+    writes the room's state in between. A call made from inside the actor
+    (one room operation invoking another) runs inline instead of queueing
+    behind itself.
+    """
+
+    def __init__(self, room_id: str):
+        self.room_id = room_id
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.processed = 0
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        if not self.running:
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def call(self, func: Callable[..., Awaitable[Any]], *args) -> Any:
+        """Run func(*args) as the room's only writer and return its result"""
+        if asyncio.current_task() is self._task:
+            return await func(*args)
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait((func, args, future))
+        return await future
+
+    async def _run(self):
+        while True:
+            func, args, future = await self.queue.get()
+            if future.cancelled():
+                continue  # the caller gave up before its turn
+            try:
+                result = await func(*args)
+            except asyncio.CancelledError:
+                future.cancel()
+                raise
+            except Exception as e:
+                if not future.cancelled():
+                    future.set_exception(e)
+            else:
+                if not future.cancelled():
+                    future.set_result(result)
+            finally:
+                self.processed += 1
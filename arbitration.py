@@ -0,0 +1,72 @@
+import os
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, List, Optional
+
+BAN_WINDOW = float(os.getenv("BAN_WINDOW", "0.1"))  # seconds attempts are gathered before resolving
+BAN_TOLERANCE = float(os.getenv("BAN_TOLERANCE", "0.25"))  # how far back a client timestamp may move an attempt
+CLOCK_SAMPLES = 32
+
+class ClockSync:
+    """Maps client timestamps onto the server clock per player
+
+    The smallest (server receive time - client send time) seen recently is
+    the clock offset plus the fastest one-way trip, so adding it to a client
+    timestamp gives a conservative server time for when the client acted.
+    """
+
+    def __init__(self, samples: int = CLOCK_SAMPLES):
+        self.samples = samples
+        self.offsets: Dict[str, Deque[float]] = {}
+
+    def observe(self, player_id: str, sent_at_ms: float, received_at: float = None):
+        received_at = time.time() if received_at is None else received_at
+        self.offsets.setdefault(player_id, deque(maxlen=self.samples)).append(received_at - sent_at_ms / 1000)
+
+    def to_server_time(self, player_id: str, sent_at_ms: float) -> Optional[float]:
+        offsets = self.offsets.get(player_id)
+        if not offsets:
+            return None
+        return sent_at_ms / 1000 + min(offsets)
+
+    def forget(self, player_id: str):
+        self.offsets.pop(player_id, None)
+
+@dataclass
+class BanAttempt:
+    player_id: str
+    action_time: float  # server-clock estimate of when the client acted
+    received_at: float
+
+def action_time(clock: ClockSync, player_id: str, sent_at_ms: Optional[float], received_at: float,
+                tolerance: float = BAN_TOLERANCE) -> float:
+    """When an action happened, trusting the client's timestamp by at most `tolerance` seconds"""
+    if sent_at_ms is None:
+        return received_at
+    estimate = clock.to_server_time(player_id, sent_at_ms)
+    if estimate is None:
+        return received_at
+    return min(received_at, max(received_at - tolerance, estimate))
+
+class BanArbiter:
+    """Collects a room's ban attempts for one window and hands them back in a deterministic order"""
+
+    def __init__(self):
+        self.pending: Dict[str, List[BanAttempt]] = {}
+
+    def submit(self, room_id: str, attempt: BanAttempt) -> bool:
+        """Queue an attempt; True when it opened a new window that needs resolving"""
+        attempts = self.pending.setdefault(room_id, [])
+        if any(existing.player_id == attempt.player_id for existing in attempts):
+            return False  # one attempt per player per window
+        attempts.append(attempt)
+        return len(attempts) == 1
+
+    def has_pending(self, room_id: str) -> bool:
+        return bool(self.pending.get(room_id))
+
+    def take(self, room_id: str) -> List[BanAttempt]:
+        """The window's attempts, earliest action first; ties go to the earlier arrival, then the id"""
+        attempts = self.pending.pop(room_id, [])
+        return sorted(attempts, key=lambda a: (a.action_time, a.received_at, a.player_id))
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Wire codec benchmark for BAN@LL
+Compares bytes on the wire and encode/decode CPU for the movement messages
+"""
+
+import argparse
+import json
+import math
+import random
+import time
+
+from codec import BINARY_CODEC, JSON_CODEC, encode_position_update
+
+try:
+    import msgpack
+except ImportError:  # only used as an extra comparison point
+    msgpack = None
+
+ANIMATIONS = ["idle", "walking", "climbing", "kicking", "falling"]
+
+def random_state():
+    return {
+        "position": {
+            "x": random.uniform(-25, 25),
+            "y": random.uniform(1, 20),
+            "z": random.uniform(-18, 12),
+            "rotation_y": random.uniform(-math.pi, math.pi)
+        },
+        "animation_state": random.choice(ANIMATIONS)
+    }
+
+def build_messages(players: int):
+    ids = [f"player_{index}_{random.randrange(1 << 30)}" for index in range(players)]
+    slots = {pid: slot for slot, pid in enumerate(ids)}
+    moved = [{"type": "player_moved", "player_id": pid, **random_state()} for pid in ids]
+    snapshot = {"type": "room_snapshot", "tick": 1234, "players": {pid: random_state() for pid in ids}}
+    updates = [{"type": "position_update", "data": {**state["position"], "animation_state": state["animation_state"]}}
+               for state in (random_state() for _ in ids)]
+    return slots, moved, snapshot, updates
+
+def timed(func, items, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for item in items:
+            func(item)
+    elapsed = time.perf_counter() - start
+    return elapsed / (rounds * len(items)) * 1e6
+
+def report(name, size, encode_us, decode_us):
+    print(f"  {name:<8} {size:>8} B  encode {encode_us:7.2f} us  decode {decode_us:7.2f} us")
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare websocket codecs")
+    parser.add_argument("--players", type=int, default=40)
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    random.seed(1)
+    slots, moved, snapshot, updates = build_messages(args.players)
+    slot_ids = {slot: pid for pid, slot in slots.items()}
+
+    print(f"player_moved (per message, {args.players} samples)")
+    text = [JSON_CODEC.encode(m) for m in moved]
+    report("json", sum(map(len, text)) // len(text),
+           timed(JSON_CODEC.encode, moved, args.rounds), timed(json.loads, text, args.rounds))
+    packed = [BINARY_CODEC.encode(m, slots) for m in moved]
+    report("bin1", sum(map(len, packed)) // len(packed),
+           timed(lambda m: BINARY_CODEC.encode(m, slots), moved, args.rounds),
+           timed(lambda b: BINARY_CODEC.decode_player_moved(b, slot_ids), packed, args.rounds))
+    if msgpack:
+        blobs = [msgpack.packb(m) for m in moved]
+        report("msgpack", sum(map(len, blobs)) // len(blobs),
+               timed(msgpack.packb, moved, args.rounds), timed(msgpack.unpackb, blobs, args.rounds))
+
+    print(f"room_snapshot ({args.players} players)")
+    rounds = max(1, args.rounds // 10)
+    text = JSON_CODEC.encode(snapshot)
+    report("json", len(text), timed(JSON_CODEC.encode, [snapshot], rounds), timed(json.loads, [text], rounds))
+    packed = BINARY_CODEC.encode(snapshot, slots)
+    report("bin1", len(packed), timed(lambda m: BINARY_CODEC.encode(m, slots), [snapshot], rounds),
+           timed(lambda b: BINARY_CODEC.decode_room_snapshot(b, slot_ids), [packed], rounds))
+    if msgpack:
+        blob = msgpack.packb(snapshot)
+        report("msgpack", len(blob), timed(msgpack.packb, [snapshot], rounds), timed(msgpack.unpackb, [blob], rounds))
+
+    print("position_update (client -> server)")
+    text = [json.dumps(m) for m in updates]
+    report("json", sum(map(len, text)) // len(text),
+           timed(json.dumps, updates, args.rounds), timed(JSON_CODEC.decode, text, args.rounds))
+    packed = [encode_position_update(**m["data"]) for m in updates]
+    report("bin1", sum(map(len, packed)) // len(packed),
+           timed(lambda m: encode_position_update(**m["data"]), updates, args.rounds),
+           timed(lambda b: BINARY_CODEC.decode(data=b), packed, args.rounds))
+
+if __name__ == "__main__":
+    main()
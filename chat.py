@@ -0,0 +1,52 @@
+import os
+from typing import List, Optional
+
+CHAT_HISTORY = int(os.getenv("CHAT_HISTORY", "200"))  # messages kept per room
+CHAT_JOIN_BACKLOG = int(os.getenv("CHAT_JOIN_BACKLOG", "20"))  # sent to new joiners in room_joined
+CHAT_PAGE_SIZE = 50
+
+class ChatHistory:
+    """Fixed-capacity ring buffer of a room's chat, each message stamped with a sequence id
+
+    Sequence ids start at 1 and never repeat, so a client can page backwards
+    with ?before=<oldest seq it has> until the buffer's oldest message.
+    """
+
+    def __init__(self, capacity: int = CHAT_HISTORY):
+        self.capacity = max(1, capacity)
+        self.buffer: List[Optional[dict]] = [None] * self.capacity
+        self.next_seq = 1
+
+    def __len__(self) -> int:
+        return min(self.next_seq - 1, self.capacity)
+
+    @property
+    def oldest_seq(self) -> int:
+        return max(1, self.next_seq - self.capacity)
+
+    def append(self, message: dict) -> dict:
+        """Store a message, overwriting the oldest once full, and return it with its seq"""
+        message["seq"] = self.next_seq
+        self.buffer[self.next_seq % self.capacity] = message
+        self.next_seq += 1
+        return message
+
+    def page(self, before: Optional[int] = None, limit: int = CHAT_PAGE_SIZE) -> List[dict]:
+        """Up to limit messages older than seq `before` (newest when None), oldest first"""
+        end = self.next_seq if before is None else min(before, self.next_seq)
+        start = max(self.oldest_seq, end - max(0, limit))
+        return [self.buffer[seq % self.capacity] for seq in range(start, end)]
+
+    def dump(self) -> dict:
+        """The buffered messages and the next seq, JSON-ready, for hibernating a room"""
+        return {"next_seq": self.next_seq, "messages": self.page(limit=self.capacity)}
+
+    @classmethod
+    def load(cls, data: dict, capacity: int = CHAT_HISTORY) -> "ChatHistory":
+        """Rebuild a history from dump(), keeping every message's seq"""
+        history = cls(capacity)
+        messages = data["messages"][-history.capacity:]
+        history.next_seq = messages[0]["seq"] if messages else data["next_seq"]
+        for message in messages:
+            history.append(message)
+        return history
@@ -0,0 +1,159 @@
+import json
+import math
+import struct
+from typing import Dict, Optional, Union
+
+# Numeric message type ids used by the binary codec
+MSG_POSITION_UPDATE = 1
+MSG_PLAYER_MOVED = 2
+MSG_ROOM_SNAPSHOT = 3
+MSG_PLAYER_MOVED_V = 4  # as MSG_PLAYER_MOVED, plus the velocity observers extrapolate along
+MSG_ROOM_SNAPSHOT_V = 5
+
+ANIMATION_STATES = ["idle", "walking", "climbing", "kicking", "falling"]
+ANIMATION_IDS = {name: index for index, name in enumerate(ANIMATION_STATES)}
+
+POSITION_SCALE = 100  # 1 cm steps; int16 covers +/-327 units, the map is +/-100
+ROTATION_STEPS = 65536
+
+# type, x, y, z, rotation, animation
+POSITION_UPDATE = struct.Struct("<BhhhHB")
+# type, slot, x, y, z, rotation, animation
+PLAYER_MOVED = struct.Struct("<BHhhhHB")
+# type, tick, player count; followed by one SNAPSHOT_ENTRY per player
+SNAPSHOT_HEADER = struct.Struct("<BIH")
+SNAPSHOT_ENTRY = struct.Struct("<HhhhHB")
+# The same layouts followed by velocity x, y, z in cm/s
+PLAYER_MOVED_V = struct.Struct("<BHhhhHBhhh")
+SNAPSHOT_ENTRY_V = struct.Struct("<HhhhHBhhh")
+
+def quantize(value: float) -> int:
+    return max(-32768, min(32767, int(round(value * POSITION_SCALE))))
+
+def dequantize(value: int) -> float:
+    return value / POSITION_SCALE
+
+def quantize_rotation(radians: float) -> int:
+    return int(round((radians % (2 * math.pi)) / (2 * math.pi) * ROTATION_STEPS)) % ROTATION_STEPS
+
+def dequantize_rotation(value: int) -> float:
+    angle = value / ROTATION_STEPS * 2 * math.pi
+    return angle - 2 * math.pi if angle > math.pi else angle
+
+def _pack_state(position: dict, animation_state: str) -> tuple:
+    return (
+        quantize(position["x"]),
+        quantize(position["y"]),
+        quantize(position["z"]),
+        quantize_rotation(position["rotation_y"]),
+        ANIMATION_IDS.get(animation_state, 0)
+    )
+
+def _pack_velocity(velocity: Optional[dict]) -> tuple:
+    velocity = velocity or {}
+    return (quantize(velocity.get("x", 0.0)), quantize(velocity.get("y", 0.0)), quantize(velocity.get("z", 0.0)))
+
+def _unpack_velocity(x: int, y: int, z: int) -> dict:
+    return {"x": dequantize(x), "y": dequantize(y), "z": dequantize(z)}
+
+def _unpack_state(x: int, y: int, z: int, rotation: int, animation: int) -> dict:
+    return {
+        "x": dequantize(x),
+        "y": dequantize(y),
+        "z": dequantize(z),
+        "rotation_y": dequantize_rotation(rotation),
+        "animation_state": ANIMATION_STATES[animation] if animation < len(ANIMATION_STATES) else "idle"
+    }
+
+class JsonCodec:
+    """The original protocol: every message is a JSON text frame"""
+    name = "json"
+
+    def encode(self, message: dict, slots: Optional[Dict[str, int]] = None) -> Optional[Union[str, bytes]]:
+        return json.dumps(message)
+
+    def decode(self, text: Optional[str] = None, data: Optional[bytes] = None) -> dict:
+        return json.loads(text if text is not None else data)
+
+class BinaryCodec:
+    """Fixed-layout struct packing for movement traffic, JSON text for everything else
+
+    Players are referred to by the per-room slot ids listed in the room
+    state's "slots" map, coordinates are quantized to int16 centimetres and
+    rotation to a uint16 fraction of a turn.
+    """
+    name = "bin1"
+
+    def encode(self, message: dict, slots: Optional[Dict[str, int]] = None) -> Optional[Union[str, bytes]]:
+        """Binary encoding for movement messages; None when the message stays JSON"""
+        message_type = message.get("type")
+        slots = slots or {}
+        if message_type == "player_moved" and message.get("player_id") in slots:
+            state = _pack_state(message["position"], message.get("animation_state"))
+            if "velocity" in message:
+                return PLAYER_MOVED_V.pack(MSG_PLAYER_MOVED_V, slots[message["player_id"]], *state,
+                                           *_pack_velocity(message["velocity"]))
+            return PLAYER_MOVED.pack(MSG_PLAYER_MOVED, slots[message["player_id"]], *state)
+        if message_type == "room_snapshot":
+            if any(pid not in slots for pid in message["players"]):
+                return None  # slots are per node, so a snapshot relayed from another node stays JSON
+            players = list(message["players"].items())
+            with_velocity = any("velocity" in state for _, state in players)
+            parts = [SNAPSHOT_HEADER.pack(MSG_ROOM_SNAPSHOT_V if with_velocity else MSG_ROOM_SNAPSHOT,
+                                          message.get("tick", 0) & 0xFFFFFFFF, len(players))]
+            for pid, state in players:
+                packed = _pack_state(state["position"], state.get("animation_state"))
+                if with_velocity:
+                    parts.append(SNAPSHOT_ENTRY_V.pack(slots[pid], *packed, *_pack_velocity(state.get("velocity"))))
+                else:
+                    parts.append(SNAPSHOT_ENTRY.pack(slots[pid], *packed))
+            return b"".join(parts)
+        return None
+
+    def decode(self, text: Optional[str] = None, data: Optional[bytes] = None) -> dict:
+        if text is not None:
+            return json.loads(text)
+        if not data:
+            raise ValueError("Empty binary frame")
+        if data[0] == MSG_POSITION_UPDATE and len(data) == POSITION_UPDATE.size:
+            _, x, y, z, rotation, animation = POSITION_UPDATE.unpack(data)
+            return {"type": "position_update", "data": _unpack_state(x, y, z, rotation, animation)}
+        raise ValueError(f"Unknown binary message type {data[0]}")
+
+    def decode_player_moved(self, data: bytes, slot_ids: Dict[int, str]) -> dict:
+        """Client-side helper, used by the benchmark to time the receive path"""
+        if data[0] == MSG_PLAYER_MOVED_V:
+            _, slot, x, y, z, rotation, animation, vx, vy, vz = PLAYER_MOVED_V.unpack(data)
+        else:
+            _, slot, x, y, z, rotation, animation = PLAYER_MOVED.unpack(data)
+        state = _unpack_state(x, y, z, rotation, animation)
+        animation_state = state.pop("animation_state")
+        message = {"type": "player_moved", "player_id": slot_ids.get(slot), "position": state, "animation_state": animation_state}
+        if data[0] == MSG_PLAYER_MOVED_V:
+            message["velocity"] = _unpack_velocity(vx, vy, vz)
+        return message
+
+    def decode_room_snapshot(self, data: bytes, slot_ids: Dict[int, str]) -> dict:
+        message_type, tick, count = SNAPSHOT_HEADER.unpack_from(data)
+        entry = SNAPSHOT_ENTRY_V if message_type == MSG_ROOM_SNAPSHOT_V else SNAPSHOT_ENTRY
+        players = {}
+        for index in range(count):
+            fields = entry.unpack_from(data, SNAPSHOT_HEADER.size + index * entry.size)
+            state = _unpack_state(*fields[1:6])
+            animation_state = state.pop("animation_state")
+            players[slot_ids.get(fields[0])] = {"position": state, "animation_state": animation_state}
+            if entry is SNAPSHOT_ENTRY_V:
+                players[slot_ids.get(fields[0])]["velocity"] = _unpack_velocity(*fields[6:])
+        return {"type": "room_snapshot", "tick": tick, "players": players}
+
+def encode_position_update(x: float, y: float, z: float, rotation_y: float, animation_state: str) -> bytes:
+    """What a binary client sends instead of a JSON position_update"""
+    return POSITION_UPDATE.pack(MSG_POSITION_UPDATE, *_pack_state({"x": x, "y": y, "z": z, "rotation_y": rotation_y}, animation_state))
+
+JSON_CODEC = JsonCodec()
+BINARY_CODEC = BinaryCodec()
+CODECS = {codec.name: codec for codec in (JSON_CODEC, BINARY_CODEC)}
+
+def negotiate(requested: Optional[str]):
+    """Pick the codec a client asked for with ?codec=, defaulting to JSON for old clients"""
+    return CODECS.get((requested or "").lower(), JSON_CODEC)
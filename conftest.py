@@ -0,0 +1,2 @@
+# backend_test.py drives a live server over HTTP and websockets; it is run by hand, not collected
+collect_ignore = ["backend_test.py"]
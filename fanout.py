@@ -0,0 +1,92 @@
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Dict, List
+
+from frames import Frame
+
+if TYPE_CHECKING:
+    from outbound import ClientConnection
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class FanoutResult:
+    recipients: int
+    delivered: int = 0
+    failed: List[str] = field(default_factory=list)
+    timed_out: List[str] = field(default_factory=list)
+    superseded: int = 0  # conflated frames replaced by a newer value before sending
+    duration: float = 0.0  # seconds until the slowest recipient finished
+
+class FanoutStats:
+    """Rolling window of broadcast durations"""
+
+    def __init__(self, window: int = 1024):
+        self.durations = deque(maxlen=window)
+        self.broadcasts = 0
+        self.timeouts = 0
+        self.failures = 0
+
+    def record(self, result: FanoutResult):
+        self.broadcasts += 1
+        self.timeouts += len(result.timed_out)
+        self.failures += len(result.failed)
+        self.durations.append(result.duration)
+
+    def percentile(self, p: float) -> float:
+        if not self.durations:
+            return 0.0
+        ordered = sorted(self.durations)
+        index = min(len(ordered) - 1, int(round(p / 100.0 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def snapshot(self) -> dict:
+        return {
+            "broadcasts": self.broadcasts,
+            "timeouts": self.timeouts,
+            "failures": self.failures,
+            "p50_ms": round(self.percentile(50) * 1000, 2),
+            "p99_ms": round(self.percentile(99) * 1000, 2),
+            "max_ms": round(max(self.durations, default=0.0) * 1000, 2)
+        }
+
+class BroadcastTracker:
+    """Collects per-recipient outcomes of one broadcast as writers report them"""
+
+    def __init__(self, recipients: int, stats: FanoutStats):
+        self.result = FanoutResult(recipients=recipients)
+        self.pending = recipients
+        self.stats = stats
+        self.start = time.perf_counter()
+
+    def ack(self, player_id: str, delivered: bool, timed_out: bool = False, superseded: bool = False):
+        if delivered:
+            self.result.delivered += 1
+        elif superseded:
+            self.result.superseded += 1
+        elif timed_out:
+            self.result.timed_out.append(player_id)
+        else:
+            self.result.failed.append(player_id)
+        self.pending -= 1
+        if self.pending == 0:
+            self.result.duration = time.perf_counter() - self.start
+            self.stats.record(self.result)
+            if self.result.timed_out:
+                logger.warning(f"Broadcast to {self.result.recipients} players: {len(self.result.timed_out)} sends missed their deadline ({', '.join(self.result.timed_out)})")
+            logger.debug(f"Broadcast reached slowest of {self.result.recipients} recipients in {self.result.duration * 1000:.2f} ms")
+
+class FanoutEngine:
+    """Hands one frame to many connection queues and tracks when the slowest writer finished"""
+
+    def __init__(self):
+        self.stats = FanoutStats()
+
+    def fan_out(self, frame: Frame, connections: Dict[str, "ClientConnection"]) -> FanoutResult:
+        """Queue the frame for every connection; never waits on a socket"""
+        tracker = BroadcastTracker(len(connections), self.stats)
+        for connection in connections.values():
+            connection.enqueue(frame, tracker)
+        return tracker.result
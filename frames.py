@@ -0,0 +1,94 @@
+import json
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple, Union
+
+# Message types that are superseded by the next one with the same key field.
+# Everything else travels in the reliable lane and is never dropped or reordered.
+CONFLATED_TYPES = {
+    "player_moved": "player_id"
+}
+
+@dataclass(frozen=True)
+class Frame:
+    """An already-encoded websocket message, shared by every recipient"""
+    payload: Union[str, bytes]
+    created_at: float = field(default_factory=time.monotonic)
+    conflate_key: Optional[Hashable] = None  # set for latest-value-only traffic
+    message: Optional[dict] = field(default=None, compare=False, repr=False)  # source for other codecs
+    encodings: Dict[str, Union[str, bytes]] = field(default_factory=dict, compare=False, repr=False)
+
+    @property
+    def reliable(self) -> bool:
+        return self.conflate_key is None
+
+    @property
+    def is_binary(self) -> bool:
+        return isinstance(self.payload, bytes)
+
+    def payload_for(self, codec=None, slots: Optional[Dict[str, int]] = None) -> Union[str, bytes]:
+        """The payload in a connection's codec, encoded at most once per codec"""
+        if codec is None or codec.name == "json" or self.message is None:
+            return self.payload
+        encoded = self.encodings.get(codec.name)
+        if encoded is None:
+            encoded = codec.encode(self.message, slots)
+            if encoded is None:
+                encoded = self.payload  # no layout for this message type, stay JSON
+            self.encodings[codec.name] = encoded
+        return encoded
+
+    async def send(self, websocket, codec=None, slots: Optional[Dict[str, int]] = None):
+        payload = self.payload_for(codec, slots)
+        if isinstance(payload, bytes):
+            await websocket.send_bytes(payload)
+        else:
+            await websocket.send_text(payload)
+
+def encode_json(message: dict, raw_fields: Optional[Dict[str, str]] = None) -> str:
+    """Serialize a message, splicing in fields that are already JSON text"""
+    text = json.dumps(message)
+    if not raw_fields:
+        return text
+    spliced = "".join(f", {json.dumps(key)}: {value}" for key, value in raw_fields.items())
+    if text == "{}":
+        return "{" + spliced[2:] + "}"
+    return text[:-1] + spliced + "}"
+
+def conflation_key(message: dict) -> Optional[Hashable]:
+    """Lane for a message: a key for conflated traffic, None for the reliable lane"""
+    key_field = CONFLATED_TYPES.get(message.get("type"))
+    if key_field is None:
+        return None
+    return (message["type"], message.get(key_field))
+
+def encode_frame(message: Union[dict, Frame], raw_fields: Optional[Dict[str, str]] = None) -> Frame:
+    """Encode a message once so it can be written to any number of sockets"""
+    if isinstance(message, Frame):
+        return message
+    # Spliced fields are only available as JSON text, so those frames stay JSON-only
+    return Frame(encode_json(message, raw_fields), conflate_key=conflation_key(message),
+                 message=None if raw_fields else message)
+
+class FrameCache:
+    """Keeps the last encoding of a payload until its source version moves on"""
+
+    def __init__(self):
+        self._entries: Dict[Hashable, Tuple[Any, Any, str]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, version: Any, build: Callable[[], Any]) -> Tuple[Any, str]:
+        """Return (value, json_text) for key, rebuilding only when version changed"""
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == version:
+            self.hits += 1
+            return entry[1], entry[2]
+        self.misses += 1
+        value = build()
+        text = json.dumps(value)
+        self._entries[key] = (version, value, text)
+        return value, text
+
+    def discard(self, key: Hashable):
+        self._entries.pop(key, None)
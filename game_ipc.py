@@ -0,0 +1,187 @@
+import asyncio
+import inspect
+import itertools
+import json
+import logging
+import os
+import subprocess
+import sys
+from typing import Awaitable, Callable, Dict, Optional, Set, Union
+
+logger = logging.getLogger(__name__)
+
+GAME_PROCESS = os.getenv("GAME_PROCESS", "inline")  # "inline" (bot's event loop), "spawn" (child process), or "external"
+GAME_IPC_SOCKET = os.getenv("GAME_IPC_SOCKET", "/tmp/banall-game.sock")  # Unix socket for control calls; "none" disables it
+GAME_IPC_TIMEOUT = float(os.getenv("GAME_IPC_TIMEOUT", "2.0"))  # seconds a control call may take
+GAME_SERVER_PORT = int(os.getenv("GAME_SERVER_PORT", "8001"))
+GAME_WS_URL = os.getenv("GAME_WS_URL", "")  # websocket origin clients use when the game runs in its own process
+
+# op(**args) -> JSON-serialisable result, plain or awaitable
+ControlOp = Callable[..., Union[object, Awaitable[object]]]
+
+class GameControlError(Exception):
+    """A control call failed, or the game process could not be reached"""
+
+class ControlServer:
+    """Answers control calls from the bot process on a Unix socket
+
+    Requests and replies are one JSON object per line:
+    {"id": 1, "op": "status", "args": {}} -> {"id": 1, "result": ...} or
+    {"id": 1, "error": "..."}. Each call runs as its own task, so a slow op
+    never holds up the calls behind it; replies come back as calls finish
+    and the client matches them up by id.
+    """
+
+    def __init__(self, ops: Dict[str, ControlOp]):
+        self.ops = ops
+        self.server: Optional[asyncio.AbstractServer] = None
+        self.path: Optional[str] = None
+        self.clients: Set[asyncio.StreamWriter] = set()
+        self.calls = 0
+        self.errors = 0
+
+    async def start(self, path: str = GAME_IPC_SOCKET):
+        # A socket file left by a crashed server would make the bind fail
+        if os.path.exists(path):
+            os.unlink(path)
+        self.server = await asyncio.start_unix_server(self._serve, path)
+        self.path = path
+        logger.info(f"Game control listening on {path}")
+
+    async def stop(self):
+        if self.server:
+            self.server.close()
+            for writer in list(self.clients):
+                writer.close()
+            await self.server.wait_closed()
+            self.server = None
+        if self.path and os.path.exists(self.path):
+            os.unlink(self.path)
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.clients.add(writer)
+        write_lock = asyncio.Lock()
+        calls: Set[asyncio.Task] = set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                call = asyncio.create_task(self._answer(line, writer, write_lock))
+                calls.add(call)
+                call.add_done_callback(calls.discard)
+        except ConnectionError:
+            pass
+        finally:
+            self.clients.discard(writer)
+            # Calls already running see their op through; only their replies have nowhere to go
+            if calls:
+                await asyncio.wait(calls)
+            writer.close()
+
+    async def _answer(self, line: bytes, writer: asyncio.StreamWriter, write_lock: asyncio.Lock):
+        reply = json.dumps(await self._call(line)).encode() + b"\n"
+        async with write_lock:
+            try:
+                writer.write(reply)
+                await writer.drain()
+            except ConnectionError:
+                pass
+
+    async def _call(self, line: bytes) -> dict:
+        self.calls += 1
+        try:
+            request = json.loads(line)
+        except ValueError:
+            self.errors += 1
+            return {"id": None, "error": "malformed request"}
+        op = self.ops.get(request.get("op"))
+        if op is None:
+            self.errors += 1
+            return {"id": request.get("id"), "error": f"unknown op {request.get('op')!r}"}
+        try:
+            result = op(**request.get("args", {}))
+            if inspect.isawaitable(result):
+                result = await result
+            return {"id": request.get("id"), "result": result}
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Game control {request.get('op')} failed: {str(e)}")
+            return {"id": request.get("id"), "error": str(e)}
+
+class ControlClient:
+    """Calls into the game process over its control socket
+
+    One connection is opened on first use and shared; calls are pipelined
+    and matched to replies by id. A broken connection fails the calls in
+    flight and is reopened by the next call.
+    """
+
+    def __init__(self, path: str = GAME_IPC_SOCKET, timeout: float = GAME_IPC_TIMEOUT):
+        self.path = path
+        self.timeout = timeout
+        self.ids = itertools.count(1)
+        self.waiting: Dict[int, asyncio.Future] = {}
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._reader_task: Optional[asyncio.Task] = None
+        self._connect_lock = asyncio.Lock()
+
+    async def call(self, op: str, **args):
+        """Run `op` in the game process and return its result"""
+        request_id = next(self.ids)
+        future = asyncio.get_running_loop().create_future()
+        self.waiting[request_id] = future
+        try:
+            writer = await self._connect()
+            writer.write(json.dumps({"id": request_id, "op": op, "args": args}).encode() + b"\n")
+            await writer.drain()
+            reply = await asyncio.wait_for(future, self.timeout)
+        except (OSError, asyncio.TimeoutError) as e:
+            raise GameControlError(f"Game process unreachable on {self.path}: {str(e) or type(e).__name__}")
+        finally:
+            self.waiting.pop(request_id, None)
+        if "error" in reply:
+            raise GameControlError(reply["error"])
+        return reply["result"]
+
+    async def _connect(self) -> asyncio.StreamWriter:
+        async with self._connect_lock:
+            if self._writer is None:
+                reader, self._writer = await asyncio.open_unix_connection(self.path, limit=2 ** 22)
+                self._reader_task = asyncio.create_task(self._read(reader, self._writer))
+            return self._writer
+
+    async def _read(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                reply = json.loads(line)
+                future = self.waiting.get(reply.get("id"))
+                if future is not None and not future.done():
+                    future.set_result(reply)
+        except (ConnectionError, ValueError) as e:
+            logger.warning(f"Game control connection lost: {str(e)}")
+        finally:
+            if self._writer is writer:
+                self._writer = None
+            writer.close()
+            for future in self.waiting.values():
+                if not future.done():
+                    future.set_exception(ConnectionResetError("game control connection closed"))
+
+    async def close(self):
+        if self._reader_task:
+            self._reader_task.cancel()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+def spawn_game_server(port: int = GAME_SERVER_PORT, path: str = GAME_IPC_SOCKET) -> subprocess.Popen:
+    """Start game_server in its own process, serving websockets on `port` and control calls on `path`"""
+    env = {**os.environ, "GAME_IPC_SOCKET": path}
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "game_server:app", "--host", "0.0.0.0", "--port", str(port)],
+        env=env
+    )
@@ -1,18 +1,42 @@
 import asyncio
 import json
 import logging
-import math
 import time
-from typing import Dict, List, Optional
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional, Set, Union
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, Response
 import aiohttp
 from web3 import AsyncWeb3
 from web3.providers.async_rpc import AsyncHTTPProvider
 from dotenv import load_dotenv
 import os
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass
+from fanout import FanoutEngine
+from outbound import CLOSE_REPLACED, ClientConnection, OutboundMetrics
+from tick import RoomTicker, parse_tick_rates
+from spatial import SpatialGrid
+from interest import AOI_VIEW_RADIUS, InterestManager, InterestUpdate
+from player_store import CompactPlayerStore, new_player_store, players_to_dict, to_dict
+from frames import Frame, FrameCache, conflation_key, encode_frame, encode_json
+from codec import negotiate
+from snapshots import SnapshotHistory
+from roster import AliveSet
+from chat import CHAT_JOIN_BACKLOG, CHAT_PAGE_SIZE, ChatHistory
+from ratelimit import RateLimiter
+from inbound import InboundRouter, InvalidMessage, decode_message
+from actor import RoomActor
+from arbitration import BAN_WINDOW, BanArbiter, BanAttempt, ClockSync, action_time
+from history import PositionHistory, rewound_distance
+from heartbeat import CLOSE_HEARTBEAT_TIMEOUT, HeartbeatMonitor, percentiles
+from pacing import UpdatePacer
+from reckoning import RESTING_STATES, STILL, DeadReckoner, velocity
+from matchmaking import Matchmaker
+from eventbus import RoomEvent, create_bus
+from lifecycle import CLOSE_IDLE_TIMEOUT, ROOM_HIBERNATE_DIR, RoomLifecycle, RoomVault, dump_room, restore_room, worth_keeping
+from sharding import SHARD_INDEX, local_ownership
+from game_ipc import GAME_IPC_SOCKET, ControlServer
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -24,6 +48,8 @@ MONAD_RPC_URL = os.getenv("MONAD_RPC_URL")
 BANALL_CONTRACT_ADDRESS = os.getenv("BANALL_CONTRACT_ADDRESS")
 TOURS_TOKEN_ADDRESS = os.getenv("TOURS_TOKEN_ADDRESS")
 API_BASE_URL = os.getenv("API_BASE_URL", "http://localhost:8001")
+ROOM_TICK_RATE = float(os.getenv("ROOM_TICK_RATE", "0"))  # default snapshot rate for new rooms
+ROOM_TICK_RATES = parse_tick_rates(os.getenv("ROOM_TICK_RATES", ""))  # per-room overrides, "room=hz,..."
 
 @dataclass
 class PlayerPosition:
@@ -47,29 +73,110 @@ class Player:
 @dataclass
 class GameRoom:
     id: str
-    players: Dict[str, Player]
+    players: Union[Dict[str, Player], CompactPlayerStore]  # CompactPlayerStore with COMPACT_ROOMS=true
     is_active: bool = False
     game_start_time: float = 0.0
     bastral_id: Optional[str] = None
-    chat_messages: List[Dict] = None
+    chat_messages: ChatHistory = None
+    version: int = 0  # bumped on every change visible in get_room_state
+    tick_rate: float = 0.0  # snapshots per second; 0 broadcasts every move immediately
+    moved_players: Set[str] = None
+    stopped_players: Set[str] = None  # movers that came to rest since the last snapshot
+    grid: SpatialGrid = None  # proximity index over player positions
+    interest: Optional[InterestManager] = None  # set when area-of-interest filtering is on
+    slots: Dict[str, int] = None  # compact per-room player ids used by binary codecs
+    free_slots: List[int] = None
+    alive: AliveSet = None  # players neither banned nor spectating
+    histories: Dict[str, PositionHistory] = None  # recent positions for lag-compensated checks
+    reckoners: Dict[str, DeadReckoner] = None  # movement state observers last received, per player
     
     def __post_init__(self):
         if self.chat_messages is None:
-            self.chat_messages = []
+            self.chat_messages = ChatHistory()
+        if self.moved_players is None:
+            self.moved_players = set()
+        if self.stopped_players is None:
+            self.stopped_players = set()
+        if self.grid is None:
+            self.grid = SpatialGrid()
+        if self.slots is None:
+            self.slots = {}
+        if self.free_slots is None:
+            self.free_slots = []
+        if self.alive is None:
+            self.alive = AliveSet()
+        if self.histories is None:
+            self.histories = {}
+        if self.reckoners is None:
+            self.reckoners = {}
 
 class GameManager:
     def __init__(self):
         self.rooms: Dict[str, GameRoom] = {}
-        self.connections: Dict[str, WebSocket] = {}
+        self.connections: Dict[str, ClientConnection] = {}
         self.player_to_room: Dict[str, str] = {}
+        self.fanout = FanoutEngine()
+        self.outbound_metrics = OutboundMetrics()
+        self.tick_rates: Dict[str, float] = {}
+        self.tickers: Dict[str, RoomTicker] = {}
+        self.state_cache = FrameCache()
+        self.state_history: Dict[str, SnapshotHistory] = {}
+        self.state_versions: Dict[str, int] = {}  # last room-state version each delta-capable client holds
+        self.roster_events: Dict[str, int] = {}
+        self.rate_limiter = RateLimiter()
+        self.actors: Dict[str, RoomActor] = {}
+        self.clock = ClockSync()
+        self.ban_arbiter = BanArbiter()
+        self.rtts: Dict[str, float] = {}  # seconds, per player
+        self.heartbeat = HeartbeatMonitor(self.send_to_player, self._heartbeat_timeout)
+        self.matchmaker = Matchmaker(owns=local_ownership())  # as a shard, only rooms on its arc of the ring
+        self.listing_cache = FrameCache()
+        self.bus = create_bus(self._on_bus_event)  # carries room broadcasts to other nodes
+        self.vault = RoomVault() if ROOM_HIBERNATE_DIR != "none" else None
+        self.lifecycle = RoomLifecycle(self.rooms, self._idle_timeout, self._retire_room)
+        for room_id, rate_hz in ROOM_TICK_RATES.items():
+            self.set_tick_rate(room_id, rate_hz)
         
-    async def add_player(self, player_id: str, websocket: WebSocket, room_id: str = "main"):
+    async def add_player(self, player_id: str, websocket: WebSocket, room_id: str = "main", codec=None,
+                         state_version: Optional[int] = None):
         """Add a player to a game room"""
-        self.connections[player_id] = websocket
+        previous = self.connections.get(player_id)
+        if previous:
+            # Closing ends the old receive loop; its remove_player sees the new connection and leaves it be
+            await previous.close(CLOSE_REPLACED, "Connected elsewhere")
+        connection = ClientConnection(player_id, websocket, self.outbound_metrics, codec=codec, pacer=UpdatePacer())
+        connection.start()
+        self.connections[player_id] = connection
+        self.heartbeat.track(player_id)
         self.player_to_room[player_id] = room_id
+        if state_version is None:
+            self.state_versions.pop(player_id, None)
+        else:
+            self.state_versions[player_id] = state_version
         
         if room_id not in self.rooms:
-            self.rooms[room_id] = GameRoom(id=room_id, players={})
+            # A room that went quiet may be hibernated on disk; joining it brings it back
+            saved = await asyncio.to_thread(self.vault.load, room_id) if self.vault else None
+            self.rooms[room_id] = GameRoom(
+                id=room_id,
+                players=new_player_store(),
+                tick_rate=self.tick_rates.get(room_id, ROOM_TICK_RATE),
+                interest=InterestManager() if AOI_VIEW_RADIUS > 0 else None
+            )
+            self.state_cache.discard(room_id)
+            self.state_history[room_id] = SnapshotHistory()
+            self.rooms[room_id].alive.hooks.append(self._count_roster_event)
+            if saved:
+                restore_room(self.rooms[room_id], saved)
+                self.lifecycle.rehydrated += 1
+            self.lifecycle.start()
+            
+        room = self.rooms[room_id]
+        connection.slots = room.slots
+        if self.bus:
+            self.bus.subscribe(room_id)
+        if player_id not in room.slots:
+            room.slots[player_id] = room.free_slots.pop() if room.free_slots else len(room.slots)
             
         # Initialize player at spawn point on climbing wall
         spawn_position = PlayerPosition(
@@ -88,18 +195,36 @@ class GameManager:
         )
         
         self.rooms[room_id].players[player_id] = player
+        self.rooms[room_id].alive.join(player_id)
+        self.rooms[room_id].grid.update(player_id, spawn_position.x, spawn_position.y, spawn_position.z)
+        self.rooms[room_id].histories[player_id] = PositionHistory()
+        self.rooms[room_id].histories[player_id].record(player.last_updated, spawn_position.x, spawn_position.y, spawn_position.z)
+        self.rooms[room_id].version += 1
+        self._sync_ticker(room_id)
         
         # Broadcast new player joined
-        await self.broadcast_to_room(room_id, {
+        await self.broadcast_with_state(room_id, {
             "type": "player_joined",
-            "player": asdict(player),
-            "room_state": self.get_room_state(room_id)
+            "player": to_dict(player)
         })
         
-    async def remove_player(self, player_id: str):
-        """Remove a player from the game"""
-        if player_id in self.connections:
-            del self.connections[player_id]
+        if room.interest:
+            await self._send_view_changes(room, player_id, room.interest.update(room.grid, player_id))
+        
+    async def remove_player(self, player_id: str, websocket: Optional[WebSocket] = None):
+        """Remove a player from the game; given a websocket, only while it is still the player's connection"""
+        connection = self.connections.get(player_id)
+        if websocket is not None and (connection is None or connection.websocket is not websocket):
+            return  # the receive loop of a connection a reconnect replaced; the newer session stays
+        self.connections.pop(player_id, None)
+        if connection:
+            connection.stop()
+        self.state_versions.pop(player_id, None)
+        self.rate_limiter.forget(player_id)
+        self.clock.forget(player_id)
+        self.heartbeat.forget(player_id)
+        self.rtts.pop(player_id, None)
+        self.matchmaker.leave(player_id)
             
         if player_id in self.player_to_room:
             room_id = self.player_to_room[player_id]
@@ -107,12 +232,30 @@ class GameManager:
             
             if room_id in self.rooms and player_id in self.rooms[room_id].players:
                 del self.rooms[room_id].players[player_id]
+                self.rooms[room_id].moved_players.discard(player_id)
+                self.rooms[room_id].stopped_players.discard(player_id)
+                self.rooms[room_id].alive.leave(player_id)
+                self.rooms[room_id].grid.remove(player_id)
+                self.rooms[room_id].histories.pop(player_id, None)
+                self.rooms[room_id].reckoners.pop(player_id, None)
+                if self.rooms[room_id].interest:
+                    self.rooms[room_id].interest.remove(player_id)
+                slot = self.rooms[room_id].slots.pop(player_id, None)
+                if slot is not None:
+                    self.rooms[room_id].free_slots.append(slot)
+                if not self.rooms[room_id].players:
+                    # Nobody is left to play the round out; whoever joins next starts a fresh one
+                    self.rooms[room_id].is_active = False
+                    self.rooms[room_id].bastral_id = None
+                self.rooms[room_id].version += 1
+                self._sync_ticker(room_id)
+                if self.bus and not self.rooms[room_id].players:
+                    self.bus.unsubscribe(room_id)
                 
                 # Broadcast player left
-                await self.broadcast_to_room(room_id, {
+                await self.broadcast_with_state(room_id, {
                     "type": "player_left",
-                    "player_id": player_id,
-                    "room_state": self.get_room_state(room_id)
+                    "player_id": player_id
                 })
                 
     async def update_player_position(self, player_id: str, position_data: dict):
@@ -131,16 +274,49 @@ class GameManager:
         player.position.rotation_y = position_data.get("rotation_y", player.position.rotation_y)
         player.animation_state = position_data.get("animation_state", "idle")
         player.last_updated = time.time()
+        room = self.rooms[room_id]
+        room.grid.update(player_id, player.position.x, player.position.y, player.position.z)
+        if player_id in room.histories:
+            room.histories[player_id].record(player.last_updated, player.position.x, player.position.y, player.position.z)
+        room.version += 1
         
-        # Broadcast position update to all players in room
-        await self.broadcast_to_room(room_id, {
+        interest = room.interest.update(room.grid, player_id) if room.interest else None
+        if interest:
+            await self._send_view_changes(room, player_id, interest)
+            
+        reckoner = room.reckoners.setdefault(player_id, DeadReckoner())
+        if not reckoner.needs_update(player.last_updated, (player.position.x, player.position.y, player.position.z),
+                                     player.position.rotation_y, player.animation_state,
+                                     velocity(room.histories.get(player_id), player.last_updated)):
+            # Observers' extrapolation is still within the error bound; nothing worth sending
+            return
+            
+        if room.tick_rate > 0:
+            # Tick mode: the room ticker sends this move in its next room_snapshot
+            room.moved_players.add(player_id)
+            if reckoner.stopped:
+                room.stopped_players.add(player_id)
+            return
+            
+        message = {
             "type": "player_moved",
             "player_id": player_id,
-            "position": asdict(player.position),
+            "position": to_dict(player.position),
+            "velocity": reckoner.velocity_dict(),
             "animation_state": player.animation_state
-        }, exclude_player=player_id)
+        }
+        if interest:
+            # Nearby observers get every move, distant ones every Nth and every stop, the rest none;
+            # a missed stop would leave them extrapolating the old velocity
+            far = interest.far if interest.far_turn or reckoner.stopped else []
+            await self.broadcast_to_players(room_id, interest.near + far, message)
+            # Interest sets only cover this node's players; other nodes deliver the move to all of theirs
+            self._publish(room_id, message, player_id)
+        else:
+            # Broadcast position update to all players in room
+            await self.broadcast_to_room(room_id, message, exclude_player=player_id)
         
-    async def handle_chat_message(self, player_id: str, message: str):
+    async def handle_chat_message(self, player_id: str, message: str, sent_at: Optional[float] = None):
         """Handle chat messages and game commands"""
         if player_id not in self.player_to_room:
             return
@@ -156,7 +332,7 @@ class GameManager:
             
         # Check for ban command
         if message.strip().lower() == "/ban @bastral":
-            await self.handle_ban_attempt(player_id, room_id)
+            await self.handle_ban_attempt(player_id, room_id, sent_at)
         else:
             # Regular chat message
             chat_msg = {
@@ -170,8 +346,8 @@ class GameManager:
             room.chat_messages.append(chat_msg)
             await self.broadcast_to_room(room_id, chat_msg)
             
-    async def handle_ban_attempt(self, player_id: str, room_id: str):
-        """Handle ban/kick attempt"""
+    async def handle_ban_attempt(self, player_id: str, room_id: str, sent_at: Optional[float] = None):
+        """Handle ban/kick attempt; attempts in the same window are resolved together"""
         room = self.rooms.get(room_id)
         if not room or not room.is_active:
             return
@@ -190,35 +366,76 @@ class GameManager:
             })
             return
             
-        # Check proximity (players must be within 3 units of each other)
-        distance = math.sqrt(
-            (player.position.x - bastral.position.x) ** 2 +
-            (player.position.y - bastral.position.y) ** 2 +
-            (player.position.z - bastral.position.z) ** 2
-        )
+        received_at = time.time()
+        attempt = BanAttempt(player_id, action_time(self.clock, player_id, sent_at, received_at), received_at)
+        if self.ban_arbiter.submit(room_id, attempt):
+            # First attempt of a window: resolve after one tick period (or BAN_WINDOW outside tick mode)
+            window = 1.0 / room.tick_rate if room.tick_rate > 0 else BAN_WINDOW
+            asyncio.create_task(self._resolve_bans_later(room_id, window))
+            
+    async def _resolve_bans_later(self, room_id: str, window: float):
+        await asyncio.sleep(window)
+        await self.in_room(room_id, self.resolve_bans, room_id)
         
-        if distance > 3.0:
-            await self.send_to_player(player_id, {
-                "type": "ban_failed",
-                "reason": "Too far from @bastral! Get closer to kick."
-            })
+    async def resolve_bans(self, room_id: str):
+        """Resolve a window of ban attempts: the earliest one in range wins"""
+        attempts = self.ban_arbiter.take(room_id)
+        room = self.rooms.get(room_id)
+        if not attempts or not room or not room.is_active:
+            return
+            
+        bastral = room.players.get(room.bastral_id) if room.bastral_id else None
+        if not bastral or bastral.is_banned:
+            return
+            
+        winner = None
+        contenders = []
+        for attempt in attempts:
+            player = room.players.get(attempt.player_id)
+            if not player or player.is_banned or attempt.player_id == room.bastral_id:
+                continue
+                
+            # Check proximity (players must be within 3 units of each other)
+            # as the attacker saw it when acting, not at the latest server positions
+            distance = rewound_distance(
+                room.histories.get(attempt.player_id), room.histories.get(bastral.id),
+                attempt.action_time, self.rtts.get(attempt.player_id, 0.0),
+                (player.position.x, player.position.y, player.position.z),
+                (bastral.position.x, bastral.position.y, bastral.position.z)
+            )
+            
+            if distance > 3.0:
+                await self.send_to_player(attempt.player_id, {
+                    "type": "ban_failed",
+                    "reason": "Too far from @bastral! Get closer to kick."
+                })
+                continue
+                
+            contenders.append(attempt.player_id)
+            if winner is None:
+                winner = player
+                
+        if winner is None:
             return
             
         # Successful ban!
         bastral.is_banned = True
+        room.alive.ban(bastral.id)
         
         # Trigger kick animation
-        player.animation_state = "kicking"
+        winner.animation_state = "kicking"
         bastral.animation_state = "falling"
+        room.version += 1
         
-        # Broadcast ban event
+        # One broadcast tells every contender who won
         ban_event = {
             "type": "player_banned",
-            "banner_id": player_id,
+            "banner_id": winner.id,
             "banned_id": room.bastral_id,
-            "banner_username": player.username,
+            "banner_username": winner.username,
             "banned_username": bastral.username,
-            "position": asdict(bastral.position)
+            "position": to_dict(bastral.position),
+            "contenders": contenders
         }
         
         await self.broadcast_to_room(room_id, ban_event)
@@ -235,14 +452,13 @@ class GameManager:
         if not room:
             return
             
-        unbanned_players = [p for p in room.players.values() 
-                          if not p.is_banned and not p.is_spectator]
+        new_bastral_id = room.alive.choice()
         
-        if unbanned_players:
-            import random
-            new_bastral = random.choice(unbanned_players)
+        if new_bastral_id:
+            new_bastral = room.players[new_bastral_id]
             room.bastral_id = new_bastral.id
             new_bastral.is_bastral = True
+            room.version += 1
             
             await self.broadcast_to_room(room_id, {
                 "type": "new_bastral",
@@ -256,13 +472,10 @@ class GameManager:
         if not room:
             return
             
-        unbanned_players = [p for p in room.players.values() 
-                          if not p.is_banned and not p.is_spectator]
-        
-        if len(unbanned_players) <= 1:
+        if len(room.alive) <= 1:
             # Game over
             room.is_active = False
-            winner = unbanned_players[0] if unbanned_players else None
+            winner = room.players[room.alive.only()] if room.alive else None
             
             await self.broadcast_to_room(room_id, {
                 "type": "game_ended",
@@ -271,33 +484,394 @@ class GameManager:
             })
             
             # Reset room for next game
-            for player in room.players.values():
+            for player_id, player in room.players.items():
                 player.is_banned = False
                 player.is_bastral = False
                 player.animation_state = "idle"
+                if not player.is_spectator:
+                    room.alive.revive(player_id)
+            room.version += 1
                 
+    async def start_game_countdown(self, room_id: str, countdown_seconds: int = 10):
+        """Start a countdown before the game begins"""
+        # The countdown sleeps outside the room actor; each step is its own room operation
+        if not await self.in_room(room_id, self._countdown_step, room_id, {
+            "type": "game_countdown_started",
+            "countdown_seconds": countdown_seconds
+        }):
+            return
+            
+        # Countdown loop
+        for i in range(countdown_seconds, 0, -1):
+            if not await self.in_room(room_id, self._countdown_step, room_id, {
+                "type": "game_countdown",
+                "seconds_left": i
+            }):
+                return
+            await asyncio.sleep(1)
+            
+        await self.in_room(room_id, self.begin_game, room_id)
+        
+    async def _countdown_step(self, room_id: str, message: dict) -> bool:
+        """Announce one countdown step, or stop the countdown once the room can no longer start"""
+        room = self.rooms.get(room_id)
+        if not room or len(room.players) < 2:
+            return False  # players left during the countdown
+        await self.broadcast_to_room(room_id, message)
+        return True
+        
+    async def begin_game(self, room_id: str) -> bool:
+        """Start the game in a room with at least two players"""
+        room = self.rooms.get(room_id)
+        if not room or len(room.players) < 2 or not room.alive:
+            return False
+            
+        room.is_active = True
+        room.game_start_time = time.time()
+        # Select random bastral
+        bastral = room.players[room.alive.choice()]
+        room.bastral_id = bastral.id
+        bastral.is_bastral = True
+        room.version += 1
+        
+        await self.broadcast_to_room(room_id, {
+            "type": "game_started",
+            "bastral_id": bastral.id,
+            "bastral_username": bastral.username,
+            "game_start_time": room.game_start_time
+        })
+        return True
+        
+    async def set_spectator(self, player_id: str, spectating: bool = True):
+        """Move a player between playing and watching"""
+        room = self.rooms.get(self.player_to_room.get(player_id))
+        if not room or player_id not in room.players:
+            return
+        player = room.players[player_id]
+        player.is_spectator = spectating
+        if spectating:
+            room.alive.spectate(player_id)
+        elif not player.is_banned:
+            room.alive.revive(player_id)
+        room.version += 1
+        
+    def assign_room(self, player_id: str, requested: Optional[str] = None, spectate: bool = False) -> str:
+        """Reserve a room for a joining player, steering new players away from games in progress"""
+        busy = [room_id for room_id, room in self.rooms.items() if room.is_active]
+        return self.matchmaker.assign(player_id, requested, spectate, busy)
+        
+    def get_rooms_json(self) -> str:
+        """The lobby listing, re-encoded only when membership or a room's game status changes"""
+        active = tuple(room_id for room_id, room in self.rooms.items() if room.is_active)
+        return self.listing_cache.get("rooms", (self.matchmaker.version, active),
+                                      lambda: self.matchmaker.listing(active))[1]
+        
+    def get_chat_page(self, room_id: str, before: Optional[int] = None, limit: int = CHAT_PAGE_SIZE) -> dict:
+        """A page of chat older than seq `before`, and whether anything older is still kept"""
+        room = self.rooms.get(room_id)
+        if not room:
+            return {"room_id": room_id, "messages": [], "has_more": False}
+        messages = room.chat_messages.page(before, limit)
+        return {
+            "room_id": room_id,
+            "messages": messages,
+            "has_more": bool(messages) and messages[0]["seq"] > room.chat_messages.oldest_seq
+        }
+        
+    def _count_roster_event(self, event: str, player_id: str):
+        self.roster_events[event] = self.roster_events.get(event, 0) + 1
+        
     def get_room_state(self, room_id: str) -> dict:
         """Get current state of a room"""
         room = self.rooms.get(room_id)
         if not room:
             return {}
             
-        return {
+        return self.state_cache.get(room_id, room.version, lambda: self._build_room_state(room))[0]
+        
+    def get_room_state_json(self, room_id: str) -> str:
+        """Get current state of a room as cached JSON text"""
+        room = self.rooms.get(room_id)
+        if not room:
+            return "{}"
+            
+        return self.state_cache.get(room_id, room.version, lambda: self._build_room_state(room))[1]
+        
+    def get_room_delta_json(self, room_id: str, since: int) -> Optional[str]:
+        """room_delta from a version the caller holds to the current one, None if that version is gone"""
+        room = self.rooms.get(room_id)
+        history = self.state_history.get(room_id)
+        if not room or not history:
+            return None
+        self.get_room_state_json(room_id)  # records the current version
+        return history.delta_json(since, room.version)
+        
+    def _build_room_state(self, room: GameRoom) -> dict:
+        room_id = room.id
+        state = {
             "room_id": room_id,
+            "version": room.version,
             "is_active": room.is_active,
             "player_count": len(room.players),
-            "players": {pid: asdict(player) for pid, player in room.players.items()},
+            "players": players_to_dict(room.players),
             "bastral_id": room.bastral_id,
-            "game_start_time": room.game_start_time
+            "game_start_time": room.game_start_time,
+            "slots": dict(room.slots)
         }
+        if room.interest:
+            # Clients spawn avatars from player_entered_view instead of the roster
+            state["view_radius"] = room.interest.view_radius
+        self.state_history.setdefault(room_id, SnapshotHistory()).record(room.version, state)
+        return state
         
-    async def send_to_player(self, player_id: str, message: dict):
-        """Send message to specific player"""
-        if player_id in self.connections:
+    def players_near(self, player_id: str, radius: float) -> List[tuple]:
+        """(player_id, distance) for everyone within radius of a player, nearest first"""
+        room = self.rooms.get(self.player_to_room.get(player_id))
+        if not room:
+            return []
+        return room.grid.near_player(player_id, radius)
+        
+    def nearest_players(self, player_id: str, k: int) -> List[tuple]:
+        """(player_id, distance) for the k players closest to a player"""
+        room = self.rooms.get(self.player_to_room.get(player_id))
+        if not room:
+            return []
+        return room.grid.nearest_to_player(player_id, k)
+        
+    def set_tick_rate(self, room_id: str, rate_hz: float):
+        """Switch a room between per-event broadcasts (0) and fixed-rate snapshots"""
+        self.tick_rates[room_id] = rate_hz
+        room = self.rooms.get(room_id)
+        if room:
+            room.tick_rate = rate_hz
+            self._sync_ticker(room_id)
+            
+    def _sync_ticker(self, room_id: str):
+        """Run a ticker only while the room is in tick mode and has players"""
+        room = self.rooms.get(room_id)
+        ticker = self.tickers.get(room_id)
+        wanted = room is not None and room.tick_rate > 0 and len(room.players) > 0
+        
+        if ticker and (not wanted or ticker.rate_hz != room.tick_rate):
+            ticker.stop()
+            del self.tickers[room_id]
+            ticker = None
+            
+        if wanted and not ticker:
+            ticker = RoomTicker(room_id, room.tick_rate, self._tick_room)
+            self.tickers[room_id] = ticker
+            ticker.start()
+            
+    async def _tick_room(self, room_id: str, tick: int):
+        await self.in_room(room_id, self.flush_room_snapshot, room_id, tick)
+        
+    async def flush_room_snapshot(self, room_id: str, tick: int):
+        """Send one room_snapshot with every player that moved since the last tick"""
+        room = self.rooms.get(room_id)
+        if not room or not room.moved_players:
+            return
+            
+        moved = {
+            pid: {
+                "position": to_dict(room.players[pid].position),
+                "velocity": room.reckoners[pid].velocity_dict() if pid in room.reckoners else dict(zip("xyz", STILL)),
+                "animation_state": room.players[pid].animation_state
+            }
+            for pid in room.moved_players if pid in room.players
+        }
+        stopped, room.stopped_players = room.stopped_players, set()
+        room.moved_players.clear()
+        
+        if room.interest:
+            await self._send_filtered_snapshot(room, tick, moved, stopped)
+            return
+            
+        await self.broadcast_to_room(room_id, {
+            "type": "room_snapshot",
+            "tick": tick,
+            "players": moved
+        })
+        
+    async def _send_filtered_snapshot(self, room: GameRoom, tick: int, moved: dict, stopped: Set[str] = frozenset()):
+        """Give each observer a room_snapshot holding only the movers it is interested in"""
+        far_turn = tick % room.interest.far_every == 0
+        fragments: Dict[str, str] = {}
+        audiences: Dict[str, List[str]] = {}
+        for pid, state in moved.items():
+            # Each mover is encoded once and shared by all of its observers
+            fragments[pid] = f"{json.dumps(pid)}: {json.dumps(state)}"
+            near, far = room.interest.audience.get(pid, ([], []))
+            visible = room.interest.observers(pid)
+            for observer in (near + far if far_turn or pid in stopped else near):
+                if observer in visible:
+                    audiences.setdefault(observer, []).append(pid)
+                    
+        for observer, pids in audiences.items():
+            header = {"type": "room_snapshot", "tick": tick}
+            await self.send_to_player(observer, Frame(
+                encode_json(header, {"players": "{" + ", ".join(fragments[pid] for pid in pids) + "}"}),
+                message={**header, "players": {pid: moved[pid] for pid in pids}}
+            ))
+        # Interest sets only cover this node's players; other nodes get the whole snapshot
+        self._publish(room.id, {"type": "room_snapshot", "tick": tick, "players": moved})
+            
+    async def _send_view_changes(self, room: GameRoom, player_id: str, interest: InterestUpdate):
+        """Tell a player and its new or former neighbours to spawn or despawn each other"""
+        if interest.entered:
+            await self.broadcast_to_players(room.id, interest.entered, {
+                "type": "player_entered_view",
+                "players": [to_dict(room.players[player_id])]
+            })
+            await self.send_to_player(player_id, {
+                "type": "player_entered_view",
+                "players": [to_dict(room.players[pid]) for pid in interest.entered if pid in room.players]
+            })
+        if interest.left:
+            await self.broadcast_to_players(room.id, interest.left, {
+                "type": "player_left_view",
+                "player_ids": [player_id]
+            })
+            await self.send_to_player(player_id, {
+                "type": "player_left_view",
+                "player_ids": interest.left
+            })
+        
+    def record_pong(self, player_id: str, ping_id: int):
+        """Fold a heartbeat reply into the player's smoothed RTT"""
+        rtt = self.heartbeat.pong(player_id, ping_id)
+        if rtt is not None:
+            self.rtts[player_id] = rtt
+            connection = self.connections.get(player_id)
+            if connection and connection.pacer:
+                connection.pacer.rtt = rtt
+            
+    async def _heartbeat_timeout(self, player_id: str):
+        """Close and drop a connection that stopped answering pings"""
+        connection = self.connections.get(player_id)
+        if connection:
+            await connection.close(CLOSE_HEARTBEAT_TIMEOUT, "Heartbeat timeout")
+        await self.for_player(player_id, self.remove_player, player_id)
+        
+    async def _idle_timeout(self, player_id: str):
+        """Close and drop a seated player that stopped sending updates, freeing the seat"""
+        connection = self.connections.get(player_id)
+        if connection:
+            await connection.close(CLOSE_IDLE_TIMEOUT, "Idle timeout")
+        await self.for_player(player_id, self.remove_player, player_id)
+        
+    async def _retire_room(self, room_id: str):
+        """Drop a room that stayed empty, on its actor so no join can interleave"""
+        retired = await self.in_room(room_id, self._hibernate_room, room_id)
+        if retired:
+            retired.stop()
+            
+    async def _hibernate_room(self, room_id: str) -> Optional[RoomActor]:
+        """Free an empty room's memory, saving it to the vault first if it still holds state"""
+        room = self.rooms.get(room_id)
+        if room is None or len(room.players) > 0:
+            return None  # someone joined while this waited its turn
+        if self.vault and worth_keeping(room):
             try:
-                await self.connections[player_id].send_text(json.dumps(message))
-            except:
-                pass
+                await asyncio.to_thread(self.vault.save, room_id, dump_room(room))
+                self.lifecycle.hibernated += 1
+            except OSError as e:
+                logger.error(f"Could not hibernate room {room_id}: {str(e)}")
+        del self.rooms[room_id]
+        self.state_history.pop(room_id, None)
+        self.state_cache.discard(room_id)
+        self._sync_ticker(room_id)
+        if self.bus:
+            self.bus.unsubscribe(room_id)
+        # Unless a join is already queued behind this call, the actor goes too; later calls start a fresh one
+        if self.actors[room_id].queue.empty():
+            return self.actors.pop(room_id)
+        return None
+        
+    def stops_moving(self, player_id: str, data: dict) -> bool:
+        """Whether a position_update brings a moving player to rest, which no observer may miss"""
+        room = self.rooms.get(self.player_to_room.get(player_id))
+        reckoner = room.reckoners.get(player_id) if room else None
+        return reckoner is not None and reckoner.velocity != STILL and data.get("animation_state") in RESTING_STATES
+        
+    def get_update_rates(self) -> Dict[str, dict]:
+        """Each connection's current movement update rate and what it is based on"""
+        return {
+            player_id: {**connection.pacer.snapshot(), "backlog": connection.backlog}
+            for player_id, connection in self.connections.items() if connection.pacer
+        }
+        
+    def get_reckoning_stats(self) -> dict:
+        """How many position updates dead reckoning forwarded and how many it suppressed"""
+        reckoners = [reckoner for room in self.rooms.values() for reckoner in room.reckoners.values()]
+        return {
+            "sent": sum(reckoner.sent for reckoner in reckoners),
+            "suppressed": sum(reckoner.suppressed for reckoner in reckoners)
+        }
+        
+    def get_rtt_stats(self) -> Dict[str, dict]:
+        """Per-room RTT percentiles over players that have answered a ping"""
+        return {
+            room_id: percentiles(self.rtts[player_id] for player_id in room.players.keys() if player_id in self.rtts)
+            for room_id, room in self.rooms.items()
+        }
+        
+    async def in_room(self, room_id: str, func, *args):
+        """Run func(*args) on the room's actor, serialized with every other change to that room"""
+        actor = self.actors.get(room_id)
+        if actor is None:
+            actor = self.actors[room_id] = RoomActor(room_id)
+        return await actor.call(func, *args)
+        
+    async def for_player(self, player_id: str, func, *args):
+        """Run func(*args) on the actor of the player's room, or directly if the player has none"""
+        room_id = self.player_to_room.get(player_id)
+        if room_id is None:
+            return await func(*args)
+        return await self.in_room(room_id, func, *args)
+        
+    def _state_fields(self, room_id: str, player_id: str, full: bool = False) -> Dict[str, str]:
+        """room_state for old clients, otherwise a room_delta from the version the client last got"""
+        delta = None
+        if player_id in self.state_versions:
+            if not full:
+                delta = self.get_room_delta_json(room_id, self.state_versions[player_id])
+            self.state_versions[player_id] = self.rooms[room_id].version
+        if delta is not None:
+            return {"room_delta": delta}
+        return {"room_state": self.get_room_state_json(room_id)}
+        
+    async def send_with_state(self, player_id: str, message: dict, full: bool = False):
+        """Send a message carrying the player's room state, as a delta when possible"""
+        room_id = self.player_to_room.get(player_id)
+        if room_id not in self.rooms:
+            return
+        await self.send_to_player(player_id, encode_frame(message, self._state_fields(room_id, player_id, full)))
+        
+    async def broadcast_with_state(self, room_id: str, message: dict, exclude_player: str = None):
+        """Broadcast a message carrying the room state; clients on the same version share a frame"""
+        room = self.rooms.get(room_id)
+        if not room:
+            return
+            
+        self._fan_out_with_state(room_id, room, message, exclude_player)
+        # Other nodes splice in their own copy of the room state
+        self._publish(room_id, message, exclude_player, with_state=True)
+        
+    def _fan_out_with_state(self, room_id: str, room: GameRoom, message: dict, exclude_player: Optional[str] = None):
+        groups: Dict[tuple, Dict[str, ClientConnection]] = {}
+        for player_id in room.players.keys():
+            if player_id == exclude_player or player_id not in self.connections:
+                continue
+            fields = self._state_fields(room_id, player_id)
+            groups.setdefault(tuple(fields.items()), {})[player_id] = self.connections[player_id]
+        for fields, recipients in groups.items():
+            self.fanout.fan_out(encode_frame(message, dict(fields)), recipients)
+        
+    async def send_to_player(self, player_id: str, message: dict):
+        """Send message to specific player connected to this node"""
+        connection = self.connections.get(player_id)
+        if connection:
+            connection.enqueue(encode_frame(message))
                 
     async def broadcast_to_room(self, room_id: str, message: dict, exclude_player: str = None):
         """Broadcast message to all players in room"""
@@ -305,15 +879,61 @@ class GameManager:
         if not room:
             return
             
-        for player_id in room.players.keys():
-            if player_id != exclude_player:
-                await self.send_to_player(player_id, message)
+        frame = encode_frame(message)
+        self.fanout.fan_out(frame, self._recipients(room, exclude_player))
+        self._publish(room_id, frame, exclude_player)
+        
+    async def broadcast_to_players(self, room_id: str, player_ids: List[str], message: dict):
+        """Broadcast message to a subset of a room's players on this node"""
+        frame = encode_frame(message)
+        recipients = {
+            player_id: self.connections[player_id]
+            for player_id in player_ids
+            if player_id in self.connections
+        }
+        self.fanout.fan_out(frame, recipients)
+            
+    def _recipients(self, room: GameRoom, exclude_player: Optional[str] = None) -> Dict[str, ClientConnection]:
+        """This node's sockets among the room's players"""
+        return {
+            player_id: self.connections[player_id]
+            for player_id in room.players.keys()
+            if player_id != exclude_player and player_id in self.connections
+        }
+        
+    def _publish(self, room_id: str, message: Union[dict, Frame], exclude_player: Optional[str] = None,
+                 with_state: bool = False):
+        """The one way room traffic reaches the room's players on other nodes"""
+        if self.bus and self.bus.has_listeners(room_id):
+            payload = message.payload if isinstance(message, Frame) else encode_json(message)
+            self.bus.publish(room_id, RoomEvent(payload, exclude_player, with_state))
+            
+    def _on_bus_event(self, room_id: str, event: RoomEvent):
+        """Deliver room traffic published on another node to this node's sockets in the room"""
+        room = self.rooms.get(room_id)
+        if not room:
+            return
+        message = json.loads(event.message_json)
+        if event.with_state:
+            self._fan_out_with_state(room_id, room, message, event.exclude_player)
+            return
+        recipients = self._recipients(room, event.exclude_player)
+        if recipients:
+            self.fanout.fan_out(Frame(event.message_json, conflate_key=conflation_key(message), message=message), recipients)
 
 # Global game manager
 game_manager = GameManager()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Control socket for the bot process; shard workers each get their own
+    if GAME_IPC_SOCKET != "none":
+        await control.start(GAME_IPC_SOCKET if SHARD_INDEX is None else f"{GAME_IPC_SOCKET}.{SHARD_INDEX}")
+    yield
+    await control.stop()
+
 # FastAPI app
-app = FastAPI(title="BAN@LL Game Server")
+app = FastAPI(title="BAN@LL Game Server", lifespan=lifespan)
 
 # Serve static files
 app.mount("/public", StaticFiles(directory="/app/public"), name="public")
@@ -322,64 +942,165 @@ app.mount("/public", StaticFiles(directory="/app/public"), name="public")
 async def root():
     return FileResponse("/app/public/banall.html")
 
+# Inbound websocket messages, validated by inbound.SCHEMAS and dispatched by type
+inbound = InboundRouter()
+
+@inbound.handler("position_update")
+async def on_position_update(player_id: str, message: dict):
+    await game_manager.for_player(player_id, game_manager.update_player_position, player_id, message["data"])
+
+@inbound.handler("chat_message")
+async def on_chat_message(player_id: str, message: dict):
+    await game_manager.for_player(player_id, game_manager.handle_chat_message, player_id, message["message"],
+                                  message.get("sent_at"))
+
+@inbound.handler("sync_state")
+async def on_sync_state(player_id: str, message: dict):
+    # A client whose state diverged from the deltas asks for a full copy
+    await game_manager.for_player(player_id, game_manager.send_with_state, player_id, {"type": "room_state"}, True)
+
+@inbound.handler("pong")
+async def on_pong(player_id: str, message: dict):
+    # Only touches heartbeat bookkeeping, so it skips the room queue to keep RTT samples honest
+    game_manager.record_pong(player_id, message["id"])
+
+@inbound.handler("start_game")
+async def on_start_game(player_id: str, message: dict):
+    await game_manager.for_player(player_id, start_game, player_id)
+
+async def start_game(player_id: str):
+    # Start game logic (can be triggered by game owner)
+    await start_room(game_manager.player_to_room.get(player_id, "main"))
+
+async def start_room(room_id: str) -> bool:
+    return await game_manager.begin_game(room_id)
+
 @app.websocket("/ws/{player_id}")
 async def websocket_endpoint(websocket: WebSocket, player_id: str):
     await websocket.accept()
+    # Clients opt into a compact wire format with ?codec=bin1; anything else gets JSON
+    codec = negotiate(websocket.query_params.get("codec"))
+    # Clients that pass ?since=<room state version> get room_delta instead of full room_state
+    since = websocket.query_params.get("since")
+    
+    # Matchmaking picks the room; ?room=<id> asks for a listed room and ?spectate=1 joins it to watch
+    spectate = websocket.query_params.get("spectate") in ("1", "true")
+    room_id = game_manager.assign_room(player_id, websocket.query_params.get("room"), spectate)
     
     try:
-        await game_manager.add_player(player_id, websocket)
+        await game_manager.in_room(room_id, game_manager.add_player, player_id, websocket, room_id, codec,
+                                   int(since) if since and since.isdigit() else None)
+        if spectate:
+            await game_manager.in_room(room_id, game_manager.set_spectator, player_id, True)
         
-        # Send initial room state
-        room_id = game_manager.player_to_room.get(player_id, "main")
-        await websocket.send_text(json.dumps({
+        # Send initial room state and recent chat
+        await game_manager.in_room(room_id, game_manager.send_with_state, player_id, {
             "type": "room_joined",
             "player_id": player_id,
-            "room_state": game_manager.get_room_state(room_id)
-        }))
+            "room_id": room_id,
+            "codec": codec.name,
+            "chat_history": game_manager.get_chat_page(room_id, limit=CHAT_JOIN_BACKLOG)["messages"]
+        })
         
         while True:
-            data = await websocket.receive_text()
-            message = json.loads(data)
-            
-            if message["type"] == "position_update":
-                await game_manager.update_player_position(player_id, message["data"])
-            elif message["type"] == "chat_message":
-                await game_manager.handle_chat_message(player_id, message["message"])
-            elif message["type"] == "start_game":
-                # Start game logic (can be triggered by game owner)
-                room_id = game_manager.player_to_room.get(player_id, "main")
-                room = game_manager.rooms.get(room_id)
-                if room and len(room.players) >= 2:
-                    room.is_active = True
-                    room.game_start_time = time.time()
-                    # Select random bastral
-                    import random
-                    bastral = random.choice(list(room.players.values()))
-                    room.bastral_id = bastral.id
-                    bastral.is_bastral = True
-                    
-                    await game_manager.broadcast_to_room(room_id, {
-                        "type": "game_started",
-                        "bastral_id": bastral.id,
-                        "bastral_username": bastral.username,
-                        "game_start_time": room.game_start_time
-                    })
+            data = await websocket.receive()
+            if data["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(data.get("code", 1000))
+            if not game_manager.rate_limiter.allow_frame(player_id):
+                continue  # a flood, valid or not, is dropped before it costs a decode
+            try:
+                message = decode_message(codec, data.get("text"), data.get("bytes"))
+            except InvalidMessage as e:
+                # Garbage is counted and dropped without tearing down the connection
+                inbound.reject(player_id, e)
+                continue
+            # Stops skip the limiter: a dropped one leaves observers extrapolating a player who stood still
+            stop = message["type"] == "position_update" and game_manager.stops_moving(player_id, message["data"])
+            if not stop and not game_manager.rate_limiter.allow(player_id, message["type"]):
+                # One notice per throttled stretch, so a flood of drops is not answered with a flood
+                notice = game_manager.rate_limiter.notice(player_id, message["type"])
+                if notice:
+                    await game_manager.send_to_player(player_id, notice)
+                continue
+            if message.get("sent_at") is not None:
+                # Client send times (ms) calibrate the clock used to order ban attempts
+                game_manager.clock.observe(player_id, message["sent_at"])
+            
+            await inbound.dispatch(player_id, message)
                     
     except WebSocketDisconnect:
-        await game_manager.remove_player(player_id)
+        await game_manager.for_player(player_id, game_manager.remove_player, player_id, websocket)
     except Exception as e:
         logger.error(f"WebSocket error for player {player_id}: {str(e)}")
-        await game_manager.remove_player(player_id)
+        await game_manager.for_player(player_id, game_manager.remove_player, player_id, websocket)
 
 @app.get("/api/game_state/{room_id}")
-async def get_game_state(room_id: str = "main"):
-    """Get current game state for a room"""
-    return game_manager.get_room_state(room_id)
+async def get_game_state(room_id: str = "main", since: Optional[int] = None):
+    """Get current game state for a room, or a room_delta from version `since` when still known"""
+    delta = game_manager.get_room_delta_json(room_id, since) if since is not None else None
+    return Response(content=delta or game_manager.get_room_state_json(room_id), media_type="application/json")
+
+@app.get("/api/rooms")
+async def list_rooms():
+    """Rooms with players or spectators in them, for the lobby"""
+    return Response(content=game_manager.get_rooms_json(), media_type="application/json")
+
+@app.get("/api/chat/{room_id}")
+async def get_chat_history(room_id: str, before: Optional[int] = None, limit: int = CHAT_PAGE_SIZE):
+    """Page backwards through a room's recent chat with ?before=<seq>"""
+    return game_manager.get_chat_page(room_id, before, max(1, min(limit, CHAT_PAGE_SIZE)))
 
 @app.get("/api/health")
 async def health_check():
     """Health check endpoint"""
-    return {"status": "healthy", "game_rooms": len(game_manager.rooms), "active_connections": len(game_manager.connections)}
+    return health_report()
+
+def health_report() -> dict:
+    return {
+        "status": "healthy",
+        "game_rooms": len(game_manager.rooms),
+        "active_connections": len(game_manager.connections),
+        "broadcast_latency": game_manager.fanout.stats.snapshot(),
+        "outbound": game_manager.outbound_metrics.snapshot(),
+        "roster_events": game_manager.roster_events,
+        "rate_limits": game_manager.rate_limiter.snapshot(),
+        "inbound": inbound.snapshot(),
+        "room_queues": {room_id: actor.queue.qsize() for room_id, actor in game_manager.actors.items()},
+        "heartbeat_timeouts": game_manager.heartbeat.timeouts,
+        "rtt": game_manager.get_rtt_stats(),
+        "update_rates": game_manager.get_update_rates(),
+        "dead_reckoning": game_manager.get_reckoning_stats(),
+        "lifecycle": game_manager.lifecycle.snapshot(),
+        "event_bus": game_manager.bus.snapshot() if game_manager.bus else None,
+        "control": {"calls": control.calls, "errors": control.errors}
+    }
+
+# Control calls from main.py when the game runs in its own process (see game_ipc)
+
+def control_room_state(room_id: str = "main", since: Optional[int] = None) -> dict:
+    delta = game_manager.get_room_delta_json(room_id, since) if since is not None else None
+    return json.loads(delta or game_manager.get_room_state_json(room_id))
+
+async def control_start_game(room_id: str = "main") -> bool:
+    if room_id not in game_manager.rooms:
+        return False
+    return await game_manager.in_room(room_id, start_room, room_id)
+
+def control_status() -> dict:
+    """Rooms, seats and connections in one small answer for bot commands"""
+    return {
+        **json.loads(game_manager.get_rooms_json()),
+        "active_connections": len(game_manager.connections)
+    }
+
+control = ControlServer({
+    "status": control_status,
+    "rooms": lambda: json.loads(game_manager.get_rooms_json()),
+    "room_state": control_room_state,
+    "chat": game_manager.get_chat_page,
+    "start_game": control_start_game,
+    "health": health_report
+})
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,110 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Awaitable, Callable, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+HEARTBEAT_INTERVAL = float(os.getenv("HEARTBEAT_INTERVAL", "5"))  # seconds between pings
+HEARTBEAT_MISSES = int(os.getenv("HEARTBEAT_MISSES", "3"))  # unanswered pings before eviction
+CLOSE_HEARTBEAT_TIMEOUT = 4009
+
+class PeerClock:
+    """Outstanding pings and the smoothed RTT of one connection"""
+    __slots__ = ("next_id", "outstanding", "srtt", "rttvar", "last_rtt")
+
+    def __init__(self):
+        self.next_id = 0
+        self.outstanding: Dict[int, float] = {}
+        self.srtt: Optional[float] = None
+        self.rttvar = 0.0
+        self.last_rtt: Optional[float] = None
+
+    def sample(self, rtt: float):
+        # Same smoothing as TCP's retransmission timer (RFC 6298)
+        self.last_rtt = rtt
+        if self.srtt is None:
+            self.srtt = rtt
+            self.rttvar = rtt / 2
+        else:
+            self.rttvar = 0.75 * self.rttvar + 0.25 * abs(self.srtt - rtt)
+            self.srtt = 0.875 * self.srtt + 0.125 * rtt
+
+class HeartbeatMonitor:
+    """Pings every tracked connection on an interval, measures RTT and reports the silent ones
+
+    `send(player_id, message)` delivers a ping and `on_timeout(player_id)` is
+    awaited once a connection leaves `max_misses` pings unanswered.
+    """
+
+    def __init__(self, send: Callable[[str, dict], Awaitable[None]], on_timeout: Callable[[str], Awaitable[None]],
+                 interval: float = HEARTBEAT_INTERVAL, max_misses: int = HEARTBEAT_MISSES):
+        self.send = send
+        self.on_timeout = on_timeout
+        self.interval = interval
+        self.max_misses = max(1, max_misses)
+        self.peers: Dict[str, PeerClock] = {}
+        self.timeouts = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def track(self, player_id: str):
+        self.peers[player_id] = PeerClock()
+        if self.interval > 0 and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._run())
+
+    def forget(self, player_id: str):
+        self.peers.pop(player_id, None)
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    def rtt(self, player_id: str) -> Optional[float]:
+        peer = self.peers.get(player_id)
+        return peer.srtt if peer else None
+
+    def pong(self, player_id: str, ping_id: int) -> Optional[float]:
+        """Record a pong; returns the smoothed RTT in seconds, or None for an unknown ping"""
+        peer = self.peers.get(player_id)
+        if not peer:
+            return None
+        sent_at = peer.outstanding.pop(int(ping_id), None)
+        if sent_at is None:
+            return None
+        # Answering proves the connection is alive, so older pings no longer count as missed
+        peer.outstanding = {pid: at for pid, at in peer.outstanding.items() if pid > ping_id}
+        peer.sample(time.monotonic() - sent_at)
+        return peer.srtt
+
+    async def beat(self):
+        """Send one round of pings, timing out connections with too many left unanswered"""
+        for player_id, peer in list(self.peers.items()):
+            if len(peer.outstanding) >= self.max_misses:
+                self.timeouts += 1
+                logger.warning(f"Heartbeat timeout for {player_id}: {len(peer.outstanding)} pings unanswered")
+                self.forget(player_id)
+                await self.on_timeout(player_id)
+                continue
+            peer.next_id += 1
+            peer.outstanding[peer.next_id] = time.monotonic()
+            await self.send(player_id, {"type": "ping", "id": peer.next_id})
+
+    async def _run(self):
+        while self.peers:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.beat()
+            except Exception as e:
+                logger.error(f"Heartbeat round failed: {str(e)}")
+
+def percentiles(rtts: Iterable[float]) -> dict:
+    """p50/p95/max in milliseconds over a set of per-player RTTs"""
+    values = sorted(rtts)
+    if not values:
+        return {"players": 0, "p50_ms": 0.0, "p95_ms": 0.0, "max_ms": 0.0}
+
+    def pick(q: float) -> float:
+        return round(values[min(len(values) - 1, int(q * len(values)))] * 1000, 1)
+    return {"players": len(values), "p50_ms": pick(0.5), "p95_ms": pick(0.95), "max_ms": round(values[-1] * 1000, 1)}
@@ -0,0 +1,69 @@
+import math
+import os
+from typing import List, Optional, Tuple
+
+Point = Tuple[float, float, float]
+
+LAG_COMP_SAMPLES = int(os.getenv("LAG_COMP_SAMPLES", "64"))  # position samples kept per player
+LAG_COMP_MAX_REWIND = float(os.getenv("LAG_COMP_MAX_REWIND", "0.3"))  # seconds a check may look back
+
+class PositionHistory:
+    """Ring buffer of one player's recent positions, stamped with server time"""
+    __slots__ = ("capacity", "times", "points", "start", "size")
+
+    def __init__(self, capacity: int = LAG_COMP_SAMPLES):
+        self.capacity = max(2, capacity)
+        self.times: List[float] = [0.0] * self.capacity
+        self.points: List[Point] = [(0.0, 0.0, 0.0)] * self.capacity
+        self.start = 0
+        self.size = 0
+
+    def _slot(self, index: int) -> int:
+        return (self.start + index) % self.capacity
+
+    def record(self, at: float, x: float, y: float, z: float):
+        if self.size and at < self.times[self._slot(self.size - 1)]:
+            at = self.times[self._slot(self.size - 1)]  # keep samples ordered if the clock steps back
+        if self.size < self.capacity:
+            slot = self._slot(self.size)
+            self.size += 1
+        else:
+            slot = self.start
+            self.start = (self.start + 1) % self.capacity
+        self.times[slot] = at
+        self.points[slot] = (x, y, z)
+
+    def at(self, when: float) -> Optional[Point]:
+        """Position at a past time, interpolated between the samples around it"""
+        if not self.size:
+            return None
+        if when <= self.times[self.start]:
+            return self.points[self.start]
+        last = self._slot(self.size - 1)
+        if when >= self.times[last]:
+            return self.points[last]
+
+        # Binary search for the first sample after `when`
+        lo, hi = 0, self.size - 1
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.times[self._slot(mid)] <= when:
+                lo = mid + 1
+            else:
+                hi = mid
+        after, before = self._slot(lo), self._slot(lo - 1)
+        span = self.times[after] - self.times[before]
+        t = (when - self.times[before]) / span if span > 0 else 1.0
+        a, b = self.points[before], self.points[after]
+        return (a[0] + (b[0] - a[0]) * t, a[1] + (b[1] - a[1]) * t, a[2] + (b[2] - a[2]) * t)
+
+def view_time(action_time: float, rtt: float, max_rewind: float = LAG_COMP_MAX_REWIND) -> float:
+    """When the world a player acted on was current: half an RTT before the action, bounded"""
+    return action_time - min(max_rewind, max(0.0, rtt) / 2)
+
+def rewound_distance(attacker: Optional[PositionHistory], target: Optional[PositionHistory],
+                     action_time: float, rtt: float, attacker_now: Point, target_now: Point) -> float:
+    """Distance between the attacker where it acted and the target where the attacker saw it"""
+    attacker_at = attacker.at(action_time) if attacker else None
+    target_at = target.at(view_time(action_time, rtt)) if target else None
+    return math.dist(attacker_at or attacker_now, target_at or target_now)
@@ -0,0 +1,164 @@
+import bisect
+import logging
+import math
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+WS_MAX_FRAME = int(os.getenv("WS_MAX_FRAME", "4096"))  # bytes (characters for text); larger frames are never decoded
+CHAT_MAX_LENGTH = int(os.getenv("CHAT_MAX_LENGTH", "500"))
+
+class InvalidMessage(ValueError):
+    """An inbound frame that failed size, decoding or schema checks"""
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+Validator = Callable[[Any], None]
+
+# Schema building blocks; each returns a check compiled once at import time
+
+def number(optional: bool = False) -> Validator:
+    def check(value):
+        if value is None and optional:
+            return
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+            raise InvalidMessage("expected a finite number")
+    return check
+
+def string(max_length: int, optional: bool = False) -> Validator:
+    def check(value):
+        if value is None and optional:
+            return
+        if not isinstance(value, str) or len(value) > max_length:
+            raise InvalidMessage(f"expected a string of at most {max_length} characters")
+    return check
+
+def obj(optional: bool = False, **fields: Validator) -> Validator:
+    items = tuple(fields.items())
+
+    def check(value):
+        if value is None and optional:
+            return
+        if not isinstance(value, dict):
+            raise InvalidMessage("expected an object")
+        for name, field_check in items:
+            field_check(value.get(name))
+    return check
+
+# Inbound message types and the fields their handlers rely on; anything else is rejected
+SCHEMAS: Dict[str, Validator] = {
+    "position_update": obj(data=obj(
+        x=number(optional=True),
+        y=number(optional=True),
+        z=number(optional=True),
+        rotation_y=number(optional=True),
+        animation_state=string(16, optional=True)
+    ), sent_at=number(optional=True)),
+    "chat_message": obj(message=string(CHAT_MAX_LENGTH), sent_at=number(optional=True)),
+    "start_game": obj(),
+    "sync_state": obj(),
+    "pong": obj(id=number())
+}
+
+def decode_message(codec, text: Optional[str], data: Optional[bytes]) -> dict:
+    """Size-check, decode and validate one inbound frame, raising InvalidMessage on garbage"""
+    size = len(text) if text is not None else len(data or b"")
+    if size > WS_MAX_FRAME:
+        raise InvalidMessage("frame too large")
+    try:
+        message = codec.decode(text, data)
+    except (ValueError, RecursionError):  # includes json.JSONDecodeError
+        raise InvalidMessage("undecodable frame")
+    if not isinstance(message, dict):
+        raise InvalidMessage("expected an object")
+    validator = SCHEMAS.get(message.get("type"))
+    if validator is None:
+        raise InvalidMessage("unknown message type")
+    validator(message)
+    return message
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram in milliseconds"""
+    BOUNDS_MS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250)
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BOUNDS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, duration_ms: float):
+        self.counts[bisect.bisect_left(self.BOUNDS_MS, duration_ms)] += 1
+        self.count += 1
+        self.total_ms += duration_ms
+        self.max_ms = max(self.max_ms, duration_ms)
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th quantile"""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for bound, count in zip(self.BOUNDS_MS, self.counts):
+            seen += count
+            if seen >= target:
+                return bound
+        return self.max_ms
+
+    def snapshot(self) -> dict:
+        labels = [f"le_{bound}" for bound in self.BOUNDS_MS] + ["inf"]
+        return {
+            "count": self.count,
+            "total_ms": round(self.total_ms, 3),
+            "mean_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "p50_ms": self.quantile(0.5),
+            "p99_ms": self.quantile(0.99),
+            "max_ms": round(self.max_ms, 3),
+            "buckets": dict(zip(labels, self.counts))
+        }
+
+Handler = Callable[[str, dict], Awaitable[None]]
+
+class InboundRouter:
+    """Dispatch table from inbound message type to handler, timing every call"""
+
+    def __init__(self):
+        self.handlers: Dict[str, Handler] = {}
+        self.histograms: Dict[str, LatencyHistogram] = {}
+        self.rejected: Dict[str, int] = {}
+
+    def handler(self, message_type: str):
+        """Decorator registering the handler for a message type"""
+        if message_type not in SCHEMAS:
+            raise ValueError(f"No schema for inbound message type {message_type!r}")
+
+        def register(func: Handler) -> Handler:
+            self.handlers[message_type] = func
+            self.histograms[message_type] = LatencyHistogram()
+            return func
+        return register
+
+    def reject(self, player_id: str, error: InvalidMessage):
+        self.rejected[error.reason] = self.rejected.get(error.reason, 0) + 1
+        logger.debug(f"Rejected frame from {player_id}: {error.reason}")
+
+    async def dispatch(self, player_id: str, message: dict):
+        message_type = message["type"]
+        handler = self.handlers.get(message_type)
+        if handler is None:
+            return
+        start = time.perf_counter()
+        try:
+            await handler(player_id, message)
+        finally:
+            self.histograms[message_type].record((time.perf_counter() - start) * 1000)
+
+    def snapshot(self) -> dict:
+        return {
+            "rejected": dict(self.rejected),
+            "handlers": {message_type: histogram.snapshot() for message_type, histogram in self.histograms.items()}
+        }
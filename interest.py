@@ -0,0 +1,70 @@
+import os
+from dataclasses import dataclass, field
+from typing import Dict, List, Set, Tuple
+
+from spatial import SpatialGrid
+
+AOI_VIEW_RADIUS = float(os.getenv("AOI_VIEW_RADIUS", "0"))  # 0 sends every move to the whole room
+AOI_NEAR_RADIUS = float(os.getenv("AOI_NEAR_RADIUS", "15"))
+AOI_FAR_EVERY = int(os.getenv("AOI_FAR_EVERY", "4"))  # distant observers get every Nth move
+
+@dataclass
+class InterestUpdate:
+    entered: List[str] = field(default_factory=list)  # now see each other with the mover
+    left: List[str] = field(default_factory=list)  # no longer see each other with the mover
+    near: List[str] = field(default_factory=list)  # get this move at full rate
+    far: List[str] = field(default_factory=list)  # in view but get only every Nth move
+    far_turn: bool = False  # whether this move is one the far observers receive
+
+class InterestManager:
+    """Tracks which players can see each other so moves only go to interested observers
+
+    Visibility is symmetric (distance <= view radius), so only the mover's
+    neighbourhood needs re-evaluating when a position changes.
+    """
+
+    def __init__(self, view_radius: float = AOI_VIEW_RADIUS, near_radius: float = AOI_NEAR_RADIUS,
+                 far_every: int = AOI_FAR_EVERY):
+        self.view_radius = view_radius
+        self.near_radius = min(near_radius, view_radius)
+        self.far_every = max(1, far_every)
+        self.neighbors: Dict[str, Set[str]] = {}
+        self.audience: Dict[str, Tuple[List[str], List[str]]] = {}
+        self.move_counts: Dict[str, int] = {}
+
+    def update(self, grid: SpatialGrid, player_id: str) -> InterestUpdate:
+        """Re-evaluate a player's neighbourhood after it moved or spawned"""
+        in_view = grid.near_player(player_id, self.view_radius)
+        now = {pid for pid, _ in in_view}
+        old = self.neighbors.get(player_id, set())
+
+        result = InterestUpdate(entered=list(now - old), left=list(old - now))
+        for other in result.entered:
+            self.neighbors.setdefault(other, set()).add(player_id)
+        for other in result.left:
+            self.neighbors.get(other, set()).discard(player_id)
+        self.neighbors[player_id] = now
+
+        count = self.move_counts.get(player_id, 0) + 1
+        self.move_counts[player_id] = count
+        result.far_turn = count % self.far_every == 0
+
+        entered = set(result.entered)
+        for pid, distance in in_view:
+            if pid in entered:
+                continue  # the enter event already carries the current position
+            if distance <= self.near_radius:
+                result.near.append(pid)
+            else:
+                result.far.append(pid)
+        self.audience[player_id] = (result.near, result.far)
+        return result
+
+    def remove(self, player_id: str):
+        for other in self.neighbors.pop(player_id, set()):
+            self.neighbors.get(other, set()).discard(player_id)
+        self.audience.pop(player_id, None)
+        self.move_counts.pop(player_id, None)
+
+    def observers(self, player_id: str) -> Set[str]:
+        return self.neighbors.get(player_id, set())
@@ -0,0 +1,145 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Awaitable, Callable, Dict, Mapping, Optional
+
+from chat import ChatHistory
+
+logger = logging.getLogger(__name__)
+
+LIFECYCLE_INTERVAL = float(os.getenv("LIFECYCLE_INTERVAL", "10"))  # seconds between sweeps; 0 disables them
+ROOM_EMPTY_TIMEOUT = float(os.getenv("ROOM_EMPTY_TIMEOUT", "60"))  # seconds an empty room stays in memory
+PLAYER_IDLE_TIMEOUT = float(os.getenv("PLAYER_IDLE_TIMEOUT", "300"))  # seconds without a position update; 0 never
+ROOM_HIBERNATE_DIR = os.getenv("ROOM_HIBERNATE_DIR", "/tmp/banall-rooms")  # "none" drops empty rooms outright
+CLOSE_IDLE_TIMEOUT = 4010
+
+def dump_room(room) -> dict:
+    """What an empty room still holds worth keeping, JSON-ready
+
+    Round state is left out: a round ends when its last player leaves.
+    """
+    return {
+        "id": room.id,
+        "version": room.version,
+        "chat": room.chat_messages.dump(),
+        "hibernated_at": time.time()
+    }
+
+def restore_room(room, state: dict):
+    """Put a dump_room() state back into a freshly created room"""
+    # Versions keep counting up so a client's ?since= from before can never match different state
+    room.version = state["version"]
+    room.chat_messages = ChatHistory.load(state["chat"])
+
+def worth_keeping(room) -> bool:
+    return len(room.chat_messages) > 0
+
+class RoomVault:
+    """Hibernated rooms on disk, one JSON file per room
+
+    File names are the hex of the room id, since room ids come from clients.
+    Loading a room removes its file: from then on the live room is the copy.
+    """
+
+    def __init__(self, directory: str = ROOM_HIBERNATE_DIR):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, room_id: str) -> str:
+        return os.path.join(self.directory, room_id.encode().hex() + ".json")
+
+    def save(self, room_id: str, state: dict):
+        path = self._path(room_id)
+        # Written aside and renamed so a crash never leaves half a room behind
+        with open(path + ".tmp", "w") as f:
+            json.dump(state, f)
+        os.replace(path + ".tmp", path)
+
+    def load(self, room_id: str) -> Optional[dict]:
+        path = self._path(room_id)
+        try:
+            with open(path) as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return None
+        except ValueError:
+            logger.error(f"Discarding unreadable hibernated room {room_id}")
+            state = None
+        os.unlink(path)
+        return state
+
+class RoomLifecycle:
+    """Sweeps rooms on an interval so memory follows active play, not every room ever opened
+
+    Seated players with no position update for `idle_timeout` seconds are
+    handed to `on_idle(player_id)`; spectators only watch and are left alone.
+    A room that has stayed empty for `empty_timeout` seconds is handed to
+    `on_empty(room_id)`, which drops it, hibernating it first when it has
+    state worth keeping. Sweeps run only while rooms exist.
+    """
+
+    def __init__(self, rooms: Mapping[str, object], on_idle: Callable[[str], Awaitable[None]],
+                 on_empty: Callable[[str], Awaitable[None]], interval: float = LIFECYCLE_INTERVAL,
+                 empty_timeout: float = ROOM_EMPTY_TIMEOUT, idle_timeout: float = PLAYER_IDLE_TIMEOUT):
+        self.rooms = rooms
+        self.on_idle = on_idle
+        self.on_empty = on_empty
+        self.interval = interval
+        self.empty_timeout = empty_timeout
+        self.idle_timeout = idle_timeout
+        self.empty_since: Dict[str, float] = {}
+        self.idle_disconnects = 0
+        self.reaped = 0
+        self.hibernated = 0
+        self.rehydrated = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self.interval > 0 and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def sweep(self, now: Optional[float] = None):
+        """One pass: disconnect idle players, then retire rooms empty for too long"""
+        now = time.time() if now is None else now
+        for room_id, room in list(self.rooms.items()):
+            if len(room.players) > 0:
+                self.empty_since.pop(room_id, None)
+                if self.idle_timeout > 0:
+                    idle = [player_id for player_id, player in room.players.items()
+                            if not player.is_spectator and now - player.last_updated >= self.idle_timeout]
+                    for player_id in idle:
+                        self.idle_disconnects += 1
+                        logger.info(f"Disconnecting idle player {player_id} from {room_id}")
+                        await self.on_idle(player_id)
+                continue
+            if now - self.empty_since.setdefault(room_id, now) >= self.empty_timeout:
+                del self.empty_since[room_id]
+                self.reaped += 1
+                await self.on_empty(room_id)
+        for room_id in [room_id for room_id in self.empty_since if room_id not in self.rooms]:
+            del self.empty_since[room_id]
+
+    async def _run(self):
+        while self.rooms:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.sweep()
+            except Exception as e:
+                logger.error(f"Room lifecycle sweep failed: {str(e)}")
+
+    def snapshot(self) -> dict:
+        return {
+            "rooms": len(self.rooms),
+            "empty_rooms": len(self.empty_since),
+            "idle_disconnects": self.idle_disconnects,
+            "reaped": self.reaped,
+            "hibernated": self.hibernated,
+            "rehydrated": self.rehydrated
+        }
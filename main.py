@@ -2,10 +2,8 @@ import logging
 import os
 import asyncio
 import time
-import math
 import json
-from typing import Dict, List, Optional
-from dataclasses import dataclass, asdict
+from typing import Optional
 from fastapi import FastAPI, Request, HTTPException, WebSocket, WebSocketDisconnect
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import Response, FileResponse, RedirectResponse
@@ -24,265 +22,16 @@ import subprocess
 from datetime import datetime
 import asyncpg
 from tenacity import retry, wait_exponential, stop_after_attempt
+from tick import parse_tick_rates
+from codec import negotiate
+from chat import CHAT_JOIN_BACKLOG, CHAT_PAGE_SIZE
+from inbound import InboundRouter, InvalidMessage, decode_message
+from game_ipc import GAME_PROCESS, GAME_WS_URL, ControlClient, GameControlError, spawn_game_server
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
 
-# 3D Game Classes
-@dataclass
-class PlayerPosition:
-    x: float
-    y: float
-    z: float
-    rotation_y: float
-
-@dataclass
-class Player:
-    id: str
-    username: str
-    wallet_address: str
-    position: PlayerPosition
-    is_banned: bool = False
-    is_bastral: bool = False
-    is_spectator: bool = False
-    last_updated: float = 0.0
-    animation_state: str = "idle"
-
-@dataclass
-class GameRoom:
-    id: str
-    players: Dict[str, Player]
-    is_active: bool = False
-    game_start_time: float = 0.0
-    bastral_id: Optional[str] = None
-    chat_messages: List[Dict] = None
-    
-    def __post_init__(self):
-        if self.chat_messages is None:
-            self.chat_messages = []
-
-class GameManager:
-    def __init__(self):
-        self.rooms: Dict[str, GameRoom] = {}
-        self.connections: Dict[str, WebSocket] = {}
-        self.player_to_room: Dict[str, str] = {}
-        
-    async def add_player(self, player_id: str, websocket: WebSocket, room_id: str = "main"):
-        self.connections[player_id] = websocket
-        self.player_to_room[player_id] = room_id
-        
-        if room_id not in self.rooms:
-            self.rooms[room_id] = GameRoom(id=room_id, players={})
-            
-        spawn_position = PlayerPosition(
-            x=float(len(self.rooms[room_id].players) * 2 - 10),
-            y=0.0,
-            z=-2.0,
-            rotation_y=0.0
-        )
-        
-        player = Player(
-            id=player_id,
-            username=f"Player_{player_id}",
-            wallet_address="",
-            position=spawn_position,
-            last_updated=time.time()
-        )
-        
-        self.rooms[room_id].players[player_id] = player
-        
-        await self.broadcast_to_room(room_id, {
-            "type": "player_joined",
-            "player": asdict(player),
-            "room_state": self.get_room_state(room_id)
-        })
-        
-    async def remove_player(self, player_id: str):
-        if player_id in self.connections:
-            del self.connections[player_id]
-            
-        if player_id in self.player_to_room:
-            room_id = self.player_to_room[player_id]
-            del self.player_to_room[player_id]
-            
-            if room_id in self.rooms and player_id in self.rooms[room_id].players:
-                del self.rooms[room_id].players[player_id]
-                
-                await self.broadcast_to_room(room_id, {
-                    "type": "player_left",
-                    "player_id": player_id,
-                    "room_state": self.get_room_state(room_id)
-                })
-                
-    async def handle_chat_message(self, player_id: str, message: str):
-        if player_id not in self.player_to_room:
-            return
-            
-        room_id = self.player_to_room[player_id]
-        room = self.rooms.get(room_id)
-        if not room:
-            return
-            
-        player = room.players.get(player_id)
-        if not player:
-            return
-            
-        if message.strip().lower() == "/ban @bastral":
-            await self.handle_ban_attempt(player_id, room_id)
-        else:
-            chat_msg = {
-                "type": "chat_message",
-                "player_id": player_id,
-                "username": player.username,
-                "message": message,
-                "timestamp": time.time()
-            }
-            
-            room.chat_messages.append(chat_msg)
-            await self.broadcast_to_room(room_id, chat_msg)
-            
-    async def handle_ban_attempt(self, player_id: str, room_id: str):
-        room = self.rooms.get(room_id)
-        if not room or not room.is_active:
-            return
-            
-        player = room.players.get(player_id)
-        bastral = room.players.get(room.bastral_id) if room.bastral_id else None
-        
-        if not player or not bastral or player.is_banned or bastral.is_banned:
-            return
-            
-        if player_id == room.bastral_id:
-            await self.send_to_player(player_id, {
-                "type": "ban_failed",
-                "reason": "Cannot ban yourself!"
-            })
-            return
-            
-        # Check proximity
-        distance = math.sqrt(
-            (player.position.x - bastral.position.x) ** 2 +
-            (player.position.y - bastral.position.y) ** 2 +
-            (player.position.z - bastral.position.z) ** 2
-        )
-        
-        if distance > 3.0:
-            await self.send_to_player(player_id, {
-                "type": "ban_failed",
-                "reason": "Too far from @bastral! Get closer to kick."
-            })
-            return
-            
-        bastral.is_banned = True
-        player.animation_state = "kicking"
-        bastral.animation_state = "falling"
-        
-        ban_event = {
-            "type": "player_banned",
-            "banner_id": player_id,
-            "banned_id": room.bastral_id,
-            "banner_username": player.username,
-            "banned_username": bastral.username,
-            "position": asdict(bastral.position)
-        }
-        
-        await self.broadcast_to_room(room_id, ban_event)
-        
-    def get_room_state(self, room_id: str) -> dict:
-        room = self.rooms.get(room_id)
-        if not room:
-            return {}
-            
-        return {
-            "room_id": room_id,
-            "is_active": room.is_active,
-            "player_count": len(room.players),
-            "players": {pid: asdict(player) for pid, player in room.players.items()},
-            "bastral_id": room.bastral_id,
-            "game_start_time": room.game_start_time
-        }
-        
-    async def send_to_player(self, player_id: str, message: dict):
-        if player_id in self.connections:
-            try:
-                await self.connections[player_id].send_text(json.dumps(message))
-            except:
-                pass
-                
-    async def broadcast_to_room(self, room_id: str, message: dict, exclude_player: str = None):
-        room = self.rooms.get(room_id)
-        if not room:
-            return
-            
-        for player_id in room.players.keys():
-            if player_id != exclude_player:
-                await self.send_to_player(player_id, message)
-                
-    async def update_player_position(self, player_id: str, position_data: dict):
-        """Update player position and animation state"""
-        if player_id not in self.player_to_room:
-            return
-            
-        room_id = self.player_to_room[player_id]
-        if room_id not in self.rooms or player_id not in self.rooms[room_id].players:
-            return
-            
-        player = self.rooms[room_id].players[player_id]
-        player.position.x = position_data.get("x", player.position.x)
-        player.position.y = position_data.get("y", player.position.y)
-        player.position.z = position_data.get("z", player.position.z)
-        player.position.rotation_y = position_data.get("rotation_y", player.position.rotation_y)
-        player.animation_state = position_data.get("animation_state", "idle")
-        player.last_updated = time.time()
-        
-        # Broadcast position update to all players in room
-        await self.broadcast_to_room(room_id, {
-            "type": "player_moved",
-            "player_id": player_id,
-            "position": asdict(player.position),
-            "animation_state": player.animation_state
-        }, exclude_player=player_id)
-        
-    async def start_game_countdown(self, room_id: str, countdown_seconds: int = 10):
-        """Start a countdown before the game begins"""
-        room = self.rooms.get(room_id)
-        if not room or len(room.players) < 2:
-            return
-            
-        # Notify players of countdown start
-        await self.broadcast_to_room(room_id, {
-            "type": "game_countdown_started",
-            "countdown_seconds": countdown_seconds
-        })
-        
-        # Countdown loop
-        for i in range(countdown_seconds, 0, -1):
-            await self.broadcast_to_room(room_id, {
-                "type": "game_countdown",
-                "seconds_left": i
-            })
-            await asyncio.sleep(1)
-            
-        # Start the actual game
-        room.is_active = True
-        room.game_start_time = time.time()
-        
-        # Select random bastral from active players
-        active_players = [p for p in room.players.values() if not p.is_spectator]
-        if active_players:
-            import random
-            bastral = random.choice(active_players)
-            room.bastral_id = bastral.id
-            bastral.is_bastral = True
-            
-            await self.broadcast_to_room(room_id, {
-                "type": "game_started",
-                "bastral_id": bastral.id,
-                "bastral_username": bastral.username,
-                "game_start_time": room.game_start_time
-            })
-
 # Global variables
 application = None
 load_dotenv()
@@ -299,6 +48,8 @@ PRIVATE_KEY = os.getenv("PRIVATE_KEY")
 WALLET_CONNECT_PROJECT_ID = os.getenv("WALLET_CONNECT_PROJECT_ID")
 EXPLORER_URL = "https://testnet.monadexplorer.com"
 DATABASE_URL = os.getenv("DATABASE_URL", "none")
+ROOM_TICK_RATE = float(os.getenv("ROOM_TICK_RATE", "0"))  # default snapshot rate for new rooms
+ROOM_TICK_RATES = parse_tick_rates(os.getenv("ROOM_TICK_RATES", ""))  # per-room overrides, "room=hz,..."
 
 # Log environment variables
 logger.info("Environment variables:")
@@ -314,6 +65,8 @@ logger.info(f"LEGACY_ADDRESS: {'Set' if LEGACY_ADDRESS else 'Missing'}")
 logger.info(f"PRIVATE_KEY: {'Set' if PRIVATE_KEY else 'Missing'}")
 logger.info(f"WALLET_CONNECT_PROJECT_ID: {'Set' if WALLET_CONNECT_PROJECT_ID else 'Missing'}")
 logger.info(f"DATABASE_URL: {DATABASE_URL}")
+logger.info(f"ROOM_TICK_RATE: {ROOM_TICK_RATE}")
+logger.info(f"ROOM_TICK_RATES: {ROOM_TICK_RATES}")
 
 missing_vars = []
 if not TELEGRAM_TOKEN: missing_vars.append("TELEGRAM_TOKEN")
@@ -1189,6 +942,19 @@ async def balance(update: Update, context: ContextTypes.DEFAULT_TYPE):
         logger.error(f"Error in /balance: {str(e)}")
         await update.message.reply_text(f"Error: {html.escape(str(e))}. Try again or contact <a href=\"https://t.me/empowertourschat\">EmpowerTours Chat</a>. 😅", parse_mode="HTML")
 
+async def game_status_summary() -> str:
+    """One line on the realtime game for bot replies, from whichever process runs it"""
+    if game_control:
+        try:
+            status = await game_control.call("status")
+        except GameControlError as e:
+            logger.error(f"Game status unavailable: {str(e)}")
+            return "Game server unreachable"
+    else:
+        status = {**json.loads(game_manager.get_rooms_json()), "active_connections": len(game_manager.connections)}
+    players = sum(room["players"] for room in status["rooms"])
+    return f"Game: {len(status['rooms'])} rooms, {players} players"
+
 async def ping(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await context.bot.send_chat_action(chat_id=update.effective_chat.id, action=ChatAction.TYPING)
     start_time = time.time()
@@ -1196,7 +962,7 @@ async def ping(update: Update, context: ContextTypes.DEFAULT_TYPE):
     try:
         webhook_ok = await check_webhook()
         status = "Webhook OK" if webhook_ok else "Webhook failed, using polling"
-        await update.message.reply_text(f"Pong! Bot is running. {status}. Try /banall.")
+        await update.message.reply_text(f"Pong! Bot is running. {status}. {await game_status_summary()}. Try /banall.")
         logger.info(f"Sent /ping response to user {update.effective_user.id}, took {time.time() - start_time:.2f} seconds")
     except Exception as e:
         logger.error(f"Error in /ping: {str(e)}")
@@ -1365,8 +1131,12 @@ async def monitor_events(context: ContextTypes.DEFAULT_TYPE):
 
 async def startup_event():
     start_time = time.time()
-    global application, webhook_failed, pool, sessions, reverse_sessions, pending_wallets
+    global application, webhook_failed, pool, sessions, reverse_sessions, pending_wallets, game_process
     try:
+        if game_control and not GAME_WS_URL:
+            # This process turns game websockets away, so clients must be told where the game process is
+            raise RuntimeError(f"GAME_WS_URL must be set when GAME_PROCESS={GAME_PROCESS}")
+
         # Initialize Postgres pool if DATABASE_URL is set
         if DATABASE_URL != "none":
             pool = await asyncpg.create_pool(DATABASE_URL)
@@ -1434,6 +1204,10 @@ async def startup_event():
             if selected_port:
                 break
 
+        if GAME_PROCESS == "spawn":
+            game_process = spawn_game_server()
+            logger.info(f"Game server running as its own process, pid {game_process.pid}")
+
         await initialize_web3()
         
         # Initialize Telegram bot only if token is provided
@@ -1487,6 +1261,11 @@ async def shutdown_event():
             await application.shutdown()
         if DATABASE_URL != "none" and pool:
             await pool.close()
+        if game_control:
+            await game_control.close()
+        if game_process:
+            game_process.terminate()
+            await asyncio.to_thread(game_process.wait)
         logger.info(f"Shutdown completed, took {time.time() - start_time:.2f} seconds")
     except Exception as e:
         logger.error(f"Error during shutdown: {str(e)}")
@@ -1499,58 +1278,172 @@ async def lifespan(app: FastAPI):
 
 app = FastAPI(lifespan=lifespan)
 
-# Initialize game manager
-game_manager = GameManager()
+# With GAME_PROCESS=spawn or external the engine runs in its own game_server process, serving
+# websockets itself, and this process keeps the bot and reaches the engine over game_ipc
+game_control = ControlClient() if GAME_PROCESS != "inline" else None
+
+# The engine is game_server's GameManager, imported only when it runs in this process
+if game_control is None:
+    from game_server import game_manager
+else:
+    game_manager = None
+game_process = None
+
+async def call_game(op: str, **args):
+    """A control call to the game process, surfaced as 503 while it is down"""
+    try:
+        return await game_control.call(op, **args)
+    except GameControlError as e:
+        logger.error(f"Game control {op} failed: {str(e)}")
+        raise HTTPException(status_code=503, detail="Game server unavailable")
 
 # Serve static files
 app.mount("/public", StaticFiles(directory="/app/public"), name="public")
 
+# Inbound websocket messages, validated by inbound.SCHEMAS and dispatched by type
+inbound = InboundRouter()
+
+@inbound.handler("position_update")
+async def on_position_update(player_id: str, message: dict):
+    await game_manager.for_player(player_id, game_manager.update_player_position, player_id, message["data"])
+
+@inbound.handler("chat_message")
+async def on_chat_message(player_id: str, message: dict):
+    await game_manager.for_player(player_id, game_manager.handle_chat_message, player_id, message["message"],
+                                  message.get("sent_at"))
+
+@inbound.handler("sync_state")
+async def on_sync_state(player_id: str, message: dict):
+    # A client whose state diverged from the deltas asks for a full copy
+    await game_manager.for_player(player_id, game_manager.send_with_state, player_id, {"type": "room_state"}, True)
+
+@inbound.handler("pong")
+async def on_pong(player_id: str, message: dict):
+    # Only touches heartbeat bookkeeping, so it skips the room queue to keep RTT samples honest
+    game_manager.record_pong(player_id, message["id"])
+
+@inbound.handler("start_game")
+async def on_start_game(player_id: str, message: dict):
+    await game_manager.for_player(player_id, start_game, player_id)
+
+async def start_game(player_id: str):
+    # Start game with countdown; runs on the room's actor so the player count holds while it is checked
+    room_id = game_manager.player_to_room.get(player_id, "main")
+    room = game_manager.rooms.get(room_id)
+    if room and len(room.players) >= 2:
+        # Start countdown in background
+        asyncio.create_task(game_manager.start_game_countdown(room_id, 10))
+
 @app.websocket("/ws/{player_id}")
 async def websocket_endpoint(websocket: WebSocket, player_id: str):
+    if game_control:
+        # Clients connect to the game process directly, at GAME_WS_URL from env.js
+        await websocket.close(code=1013)
+        return
     await websocket.accept()
+    # Clients opt into a compact wire format with ?codec=bin1; anything else gets JSON
+    codec = negotiate(websocket.query_params.get("codec"))
+    # Clients that pass ?since=<room state version> get room_delta instead of full room_state
+    since = websocket.query_params.get("since")
+    
+    # Matchmaking picks the room; ?room=<id> asks for a listed room and ?spectate=1 joins it to watch
+    spectate = websocket.query_params.get("spectate") in ("1", "true")
+    room_id = game_manager.assign_room(player_id, websocket.query_params.get("room"), spectate)
     
     try:
-        await game_manager.add_player(player_id, websocket)
+        await game_manager.in_room(room_id, game_manager.add_player, player_id, websocket, room_id, codec,
+                                   int(since) if since and since.isdigit() else None)
+        if spectate:
+            await game_manager.in_room(room_id, game_manager.set_spectator, player_id, True)
         
-        # Send initial room state
-        room_id = game_manager.player_to_room.get(player_id, "main")
-        await websocket.send_text(json.dumps({
+        # Send initial room state and recent chat
+        await game_manager.in_room(room_id, game_manager.send_with_state, player_id, {
             "type": "room_joined",
             "player_id": player_id,
-            "room_state": game_manager.get_room_state(room_id)
-        }))
+            "room_id": room_id,
+            "codec": codec.name,
+            "chat_history": game_manager.get_chat_page(room_id, limit=CHAT_JOIN_BACKLOG)["messages"]
+        })
         
         while True:
-            data = await websocket.receive_text()
-            message = json.loads(data)
+            data = await websocket.receive()
+            if data["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(data.get("code", 1000))
+            if not game_manager.rate_limiter.allow_frame(player_id):
+                continue  # a flood, valid or not, is dropped before it costs a decode
+            try:
+                message = decode_message(codec, data.get("text"), data.get("bytes"))
+            except InvalidMessage as e:
+                # Garbage is counted and dropped without tearing down the connection
+                inbound.reject(player_id, e)
+                continue
+            # Stops skip the limiter: a dropped one leaves observers extrapolating a player who stood still
+            stop = message["type"] == "position_update" and game_manager.stops_moving(player_id, message["data"])
+            if not stop and not game_manager.rate_limiter.allow(player_id, message["type"]):
+                # One notice per throttled stretch, so a flood of drops is not answered with a flood
+                notice = game_manager.rate_limiter.notice(player_id, message["type"])
+                if notice:
+                    await game_manager.send_to_player(player_id, notice)
+                continue
+            if message.get("sent_at") is not None:
+                # Client send times (ms) calibrate the clock used to order ban attempts
+                game_manager.clock.observe(player_id, message["sent_at"])
             
-            if message["type"] == "position_update":
-                await game_manager.update_player_position(player_id, message["data"])
-            elif message["type"] == "chat_message":
-                await game_manager.handle_chat_message(player_id, message["message"])
-            elif message["type"] == "start_game":
-                # Start game with countdown
-                room_id = game_manager.player_to_room.get(player_id, "main")
-                room = game_manager.rooms.get(room_id)
-                if room and len(room.players) >= 2:
-                    # Start countdown in background
-                    asyncio.create_task(game_manager.start_game_countdown(room_id, 10))
+            await inbound.dispatch(player_id, message)
                     
     except WebSocketDisconnect:
-        await game_manager.remove_player(player_id)
+        await game_manager.for_player(player_id, game_manager.remove_player, player_id, websocket)
     except Exception as e:
         logger.error(f"WebSocket error for player {player_id}: {str(e)}")
-        await game_manager.remove_player(player_id)
+        await game_manager.for_player(player_id, game_manager.remove_player, player_id, websocket)
 
 @app.get("/api/game_state/{room_id}")
-async def get_game_state_endpoint(room_id: str = "main"):
-    """Get current game state for a room"""
-    return game_manager.get_room_state(room_id)
+async def get_game_state_endpoint(room_id: str = "main", since: Optional[int] = None):
+    """Get current game state for a room, or a room_delta from version `since` when still known"""
+    if game_control:
+        return await call_game("room_state", room_id=room_id, since=since)
+    delta = game_manager.get_room_delta_json(room_id, since) if since is not None else None
+    return Response(content=delta or game_manager.get_room_state_json(room_id), media_type="application/json")
+
+@app.get("/api/rooms")
+async def list_rooms():
+    """Rooms with players or spectators in them, for the lobby"""
+    if game_control:
+        return await call_game("rooms")
+    return Response(content=game_manager.get_rooms_json(), media_type="application/json")
+
+@app.get("/api/chat/{room_id}")
+async def get_chat_history(room_id: str, before: Optional[int] = None, limit: int = CHAT_PAGE_SIZE):
+    """Page backwards through a room's recent chat with ?before=<seq>"""
+    if game_control:
+        return await call_game("chat", room_id=room_id, before=before, limit=max(1, min(limit, CHAT_PAGE_SIZE)))
+    return game_manager.get_chat_page(room_id, before, max(1, min(limit, CHAT_PAGE_SIZE)))
 
 @app.get("/api/health")
 async def health_check():
     """Health check endpoint"""
-    return {"status": "healthy", "game_rooms": len(game_manager.rooms), "active_connections": len(game_manager.connections)}
+    if game_control:
+        try:
+            return {**await game_control.call("health"), "game_process": GAME_PROCESS}
+        except GameControlError as e:
+            return {"status": "degraded", "game_process": GAME_PROCESS, "error": str(e)}
+    return {
+        "status": "healthy",
+        "game_rooms": len(game_manager.rooms),
+        "active_connections": len(game_manager.connections),
+        "broadcast_latency": game_manager.fanout.stats.snapshot(),
+        "outbound": game_manager.outbound_metrics.snapshot(),
+        "roster_events": game_manager.roster_events,
+        "rate_limits": game_manager.rate_limiter.snapshot(),
+        "inbound": inbound.snapshot(),
+        "room_queues": {room_id: actor.queue.qsize() for room_id, actor in game_manager.actors.items()},
+        "heartbeat_timeouts": game_manager.heartbeat.timeouts,
+        "rtt": game_manager.get_rtt_stats(),
+        "update_rates": game_manager.get_update_rates(),
+        "dead_reckoning": game_manager.get_reckoning_stats(),
+        "lifecycle": game_manager.lifecycle.snapshot(),
+        "event_bus": game_manager.bus.snapshot() if game_manager.bus else None
+    }
 
 @app.get("/health")
 async def railway_health_check():
@@ -1564,7 +1457,8 @@ window.env = {{
   TOURS_TOKEN_ADDRESS: "{TOURS_TOKEN_ADDRESS}",
   BANALL_CONTRACT_ADDRESS: "{BANALL_CONTRACT_ADDRESS}",
   API_BASE_URL: "{API_BASE_URL}",
-  MONAD_RPC_URL: "{MONAD_RPC_URL}"
+  MONAD_RPC_URL: "{MONAD_RPC_URL}",
+  GAME_WS_URL: "{GAME_WS_URL}"
 }};
     """
     return Response(content=content, media_type="application/javascript")
@@ -0,0 +1,108 @@
+import os
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+ROOM_CAPACITY = int(os.getenv("ROOM_CAPACITY", "16"))  # seated players per room; spectators are not counted
+DEFAULT_ROOM = "main"
+
+class Matchmaker:
+    """Seats joining players in rooms, filling open rooms before opening new ones
+
+    Seats are reserved synchronously when a room is picked, so concurrent joins
+    never overfill a room while they wait for its actor. Rooms are tried
+    fullest first, which packs players into few lively rooms rather than many
+    near-empty ones; rooms with a game in progress come after those in the
+    lobby.
+
+    With `owns`, as in a shard worker, only rooms it accepts are opened and a
+    requested room it accepts is honoured even before anyone is in it, since
+    the shard router has already placed the player there.
+    """
+
+    def __init__(self, capacity: int = ROOM_CAPACITY, owns: Optional[Callable[[str], bool]] = None):
+        self.capacity = max(1, capacity)
+        self.owns = owns
+        self.seats: Dict[str, Set[str]] = {}  # room_id -> seated players
+        self.watchers: Dict[str, Set[str]] = {}  # room_id -> spectators
+        self.room_of: Dict[str, str] = {}
+        self.version = 0  # bumped whenever the listing would change
+        self._next_room = 2
+
+    def has_space(self, room_id: str) -> bool:
+        return len(self.seats.get(room_id, ())) < self.capacity
+
+    def assign(self, player_id: str, requested: Optional[str] = None, spectate: bool = False,
+               busy: Iterable[str] = ()) -> str:
+        """Pick and reserve a room for a player
+
+        A returning player keeps its room. A requested room must already be
+        listed; a spectator gets it whatever its size, a player only while
+        it has a free seat.
+        """
+        if (requested is not None and requested not in self.seats and requested not in self.watchers
+                and not (self.owns and self.owns(requested))):
+            requested = None
+        current = self.room_of.get(player_id)
+        if (current is not None and (requested is None or requested == current)
+                and spectate == (player_id in self.watchers.get(current, ()))):
+            return current
+        if current is not None:
+            self.leave(player_id)
+
+        if spectate:
+            room_id = requested or self._pick(set(busy))
+            self.watchers.setdefault(room_id, set()).add(player_id)
+        else:
+            room_id = requested if requested and self.has_space(requested) else self._pick(set(busy))
+            self.seats.setdefault(room_id, set()).add(player_id)
+        self.room_of[player_id] = room_id
+        self.version += 1
+        return room_id
+
+    def _pick(self, busy: Set[str]) -> str:
+        open_rooms = [room_id for room_id, seated in self.seats.items() if len(seated) < self.capacity]
+        if open_rooms:
+            return min(open_rooms, key=lambda room_id: (room_id in busy, -len(self.seats[room_id]), room_id))
+        if DEFAULT_ROOM not in self.seats and self._may_open(DEFAULT_ROOM):
+            return DEFAULT_ROOM
+        while f"room-{self._next_room}" in self.seats:
+            self._next_room += 1
+        number = self._next_room
+        while f"room-{number}" in self.seats or not self._may_open(f"room-{number}"):
+            number += 1
+        return f"room-{number}"
+
+    def _may_open(self, room_id: str) -> bool:
+        return self.owns is None or self.owns(room_id)
+
+    def leave(self, player_id: str):
+        room_id = self.room_of.pop(player_id, None)
+        if room_id is None:
+            return
+        for members in (self.seats, self.watchers):
+            group = members.get(room_id)
+            if group is not None:
+                group.discard(player_id)
+                if not group:
+                    del members[room_id]
+        if room_id.startswith("room-") and room_id[5:].isdigit() and room_id not in self.seats:
+            # Freed numbers are handed out again so room ids stay small
+            self._next_room = min(self._next_room, int(room_id[5:]))
+        self.version += 1
+
+    def listing(self, active: Iterable[str] = ()) -> dict:
+        """Every room with anyone in it, for the lobby"""
+        active = set(active)
+        room_ids: List[str] = sorted(set(self.seats) | set(self.watchers))
+        return {
+            "capacity": self.capacity,
+            "rooms": [
+                {
+                    "id": room_id,
+                    "players": len(self.seats.get(room_id, ())),
+                    "spectators": len(self.watchers.get(room_id, ())),
+                    "is_active": room_id in active,
+                    "open": self.has_space(room_id)
+                }
+                for room_id in room_ids
+            ]
+        }
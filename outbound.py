@@ -0,0 +1,238 @@
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from typing import Dict, Hashable, Optional
+
+from frames import Frame
+from pacing import UpdatePacer
+
+logger = logging.getLogger(__name__)
+
+WS_SEND_TIMEOUT = float(os.getenv("WS_SEND_TIMEOUT", "2.0"))
+WS_OUTBOUND_BACKLOG = int(os.getenv("WS_OUTBOUND_BACKLOG", "256"))
+
+# Application close code sent to clients that cannot keep up with the room
+CLOSE_SLOW_CONSUMER = 4008
+# Sent to a connection when the same player connects again
+CLOSE_REPLACED = 4011
+
+class OutboundMetrics:
+    """Counters shared by every connection's writer"""
+
+    def __init__(self):
+        self.enqueued = 0
+        self.sent = 0
+        self.send_failures = 0
+        self.slow_consumer_evictions = 0
+        self.superseded = 0
+        self.max_backlog_seen = 0
+
+    def snapshot(self) -> dict:
+        return {
+            "enqueued": self.enqueued,
+            "sent": self.sent,
+            "send_failures": self.send_failures,
+            "slow_consumer_evictions": self.slow_consumer_evictions,
+            "superseded": self.superseded,
+            "max_backlog_seen": self.max_backlog_seen
+        }
+
+class QueuedFrame:
+    __slots__ = ("frame", "tracker", "live")
+
+    def __init__(self, frame: Frame, tracker):
+        self.frame = frame
+        self.tracker = tracker
+        self.live = True
+
+class ClientConnection:
+    """A websocket plus the bounded queue and writer task that feed it
+
+    Frames share one ordered queue, split into two lanes. Reliable frames are
+    always sent in order. A conflated frame (see frames.CONFLATED_TYPES)
+    replaces any unsent frame with the same key, and the newer value takes
+    its turn at the back of the queue. A congested client therefore skips
+    stale positions but still sees them interleaved correctly with bans and
+    game events. With a pacer, movement frames are additionally held back to
+    the client's adaptive update rate; a reliable frame releases whatever
+    movement is held first so that ordering still holds.
+    """
+
+    def __init__(self, player_id: str, websocket, metrics: OutboundMetrics,
+                 max_backlog: int = WS_OUTBOUND_BACKLOG, send_timeout: float = WS_SEND_TIMEOUT,
+                 codec=None, slots: Optional[Dict[str, int]] = None, pacer: Optional[UpdatePacer] = None):
+        self.player_id = player_id
+        self.websocket = websocket
+        self.codec = codec  # None or the JSON codec sends frames exactly as encoded
+        self.slots = slots  # the room's player_id -> slot map, for compact codecs
+        self.pacer = pacer
+        self.metrics = metrics
+        self.max_backlog = max_backlog
+        self.send_timeout = send_timeout
+        self.queue = deque()
+        self.latest: Dict[Hashable, QueuedFrame] = {}
+        self.live = 0
+        self.superseded = 0
+        self.closed = False
+        self._wakeup = asyncio.Event()
+        self._writer_task: Optional[asyncio.Task] = None
+        self._release_handle: Optional[asyncio.TimerHandle] = None
+
+    @property
+    def backlog(self) -> int:
+        return self.live
+
+    def start(self):
+        self._writer_task = asyncio.create_task(self._writer())
+
+    def enqueue(self, frame: Frame, tracker=None) -> bool:
+        """Queue a frame without waiting; evicts the client if it is too far behind"""
+        if self.closed:
+            if tracker:
+                tracker.ack(self.player_id, False)
+            return False
+        if self.pacer is not None:
+            if self.pacer.paces(frame):
+                frame = self.pacer.admit(frame, self.live, self.superseded, time.monotonic())
+                if frame is None:
+                    # Held until the next release; a newer move may replace it before then
+                    if tracker:
+                        tracker.ack(self.player_id, False, superseded=True)
+                    self._schedule_release()
+                    return True
+            elif self.pacer.holding:
+                self._release_held()
+        return self._push(frame, tracker)
+
+    def _push(self, frame: Frame, tracker=None) -> bool:
+        key = frame.conflate_key
+        if key is not None:
+            stale = self.latest.pop(key, None)
+            if stale is not None:
+                self._retire(stale)
+                self.superseded += 1
+                self.metrics.superseded += 1
+                if stale.tracker:
+                    stale.tracker.ack(self.player_id, False, superseded=True)
+        if self.live >= self.max_backlog:
+            if tracker:
+                tracker.ack(self.player_id, False)
+            self.evict()
+            return False
+
+        if len(self.queue) > 2 * self.max_backlog:
+            # Superseded entries are skipped lazily; compact once they dominate
+            self.queue = deque(entry for entry in self.queue if entry.live)
+
+        entry = QueuedFrame(frame, tracker)
+        self.queue.append(entry)
+        self.live += 1
+        if key is not None:
+            self.latest[key] = entry
+        self.metrics.enqueued += 1
+        if self.live > self.metrics.max_backlog_seen:
+            self.metrics.max_backlog_seen = self.live
+        self._wakeup.set()
+        return True
+
+    def _schedule_release(self):
+        if self._release_handle is None:
+            delay = max(0.0, self.pacer.next_due - time.monotonic())
+            self._release_handle = asyncio.get_running_loop().call_later(delay, self._release_held)
+
+    def _release_held(self):
+        if self._release_handle is not None:
+            self._release_handle.cancel()
+            self._release_handle = None
+        if self.closed:
+            return
+        for frame in self.pacer.release(time.monotonic()):
+            self._push(frame)
+
+    def _retire(self, entry: QueuedFrame):
+        entry.live = False
+        self.live -= 1
+
+    def evict(self):
+        """Disconnect a client that exceeded its backlog"""
+        if self.closed:
+            return
+        self.metrics.slow_consumer_evictions += 1
+        logger.warning(f"Evicting slow consumer {self.player_id}: {self.live} frames queued")
+        self.stop()
+        asyncio.create_task(self._close_socket(CLOSE_SLOW_CONSUMER, "Outbound backlog exceeded"))
+
+    async def close(self, code: int = 1000, reason: str = ""):
+        if self.closed:
+            return
+        self.stop()
+        await self._close_socket(code, reason)
+
+    async def _close_socket(self, code: int, reason: str):
+        try:
+            await self.websocket.close(code=code, reason=reason)
+        except Exception:
+            pass
+
+    def stop(self):
+        """Stop the writer and release anything still queued"""
+        self.closed = True
+        if self._release_handle is not None:
+            self._release_handle.cancel()
+            self._release_handle = None
+        while self.queue:
+            entry = self.queue.popleft()
+            if entry.live and entry.tracker:
+                entry.tracker.ack(self.player_id, False)
+        self.latest.clear()
+        self.live = 0
+        self._wakeup.set()
+        if self._writer_task and self._writer_task is not asyncio.current_task():
+            self._writer_task.cancel()
+
+    async def _send(self, frame: Frame):
+        if hasattr(asyncio, "timeout"):
+            # Python 3.11+: no extra task per send, and cancellation is never swallowed
+            async with asyncio.timeout(self.send_timeout):
+                await frame.send(self.websocket, self.codec, self.slots)
+        else:
+            await asyncio.wait_for(frame.send(self.websocket, self.codec, self.slots), timeout=self.send_timeout)
+
+    async def _writer(self):
+        while not self.closed:
+            if not self.live:
+                self.queue.clear()
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            entry = self.queue.popleft()
+            if not entry.live:
+                continue
+            self._retire(entry)
+            frame, tracker = entry.frame, entry.tracker
+            if frame.conflate_key is not None and self.latest.get(frame.conflate_key) is entry:
+                del self.latest[frame.conflate_key]
+            try:
+                await self._send(frame)
+            except asyncio.TimeoutError:
+                if tracker:
+                    tracker.ack(self.player_id, False, timed_out=True)
+                self.evict()
+                return
+            except asyncio.CancelledError:
+                if tracker:
+                    tracker.ack(self.player_id, False)
+                raise
+            except Exception:
+                self.metrics.send_failures += 1
+                if tracker:
+                    tracker.ack(self.player_id, False)
+                self.stop()
+                return
+
+            self.metrics.sent += 1
+            if tracker:
+                tracker.ack(self.player_id, True)
@@ -0,0 +1,108 @@
+import os
+from typing import Dict, Hashable, List, Optional
+
+from frames import Frame, encode_frame
+
+UPDATE_RATE_MAX = float(os.getenv("UPDATE_RATE_MAX", "30"))  # movement updates per second to a healthy client
+UPDATE_RATE_MIN = float(os.getenv("UPDATE_RATE_MIN", "2"))
+UPDATE_RTT_TARGET = float(os.getenv("UPDATE_RTT_TARGET", "0.15"))  # seconds; slower links get proportionally fewer updates
+UPDATE_BACKLOG_TARGET = int(os.getenv("UPDATE_BACKLOG_TARGET", "8"))  # queued frames that count as congestion
+UPDATE_ADJUST_INTERVAL = 0.5  # seconds between rate decisions
+
+class UpdatePacer:
+    """Decides how often one client receives movement, holding the latest state in between
+
+    The rate follows AIMD, as TCP's congestion window does: it halves while
+    the client is congested (its outbound queue is deeper than the backlog
+    target, or queued moves were superseded before the writer got to them)
+    and climbs back by a tenth of the maximum per interval once it drains.
+    Measured RTT caps it further, so a client twice over the RTT target gets
+    at most half the maximum rate. player_moved frames held between releases keep only the
+    newest per player; room_snapshot frames are merged into one.
+    """
+
+    def __init__(self, max_rate: float = UPDATE_RATE_MAX, min_rate: float = UPDATE_RATE_MIN,
+                 rtt_target: float = UPDATE_RTT_TARGET, backlog_target: int = UPDATE_BACKLOG_TARGET):
+        self.max_rate = max_rate
+        self.min_rate = min(min_rate, max_rate)
+        self.rtt_target = rtt_target
+        self.backlog_target = backlog_target
+        self.rate = max_rate
+        self.rtt: Optional[float] = None
+        self.next_due = 0.0
+        self.last_adjust = 0.0
+        self.last_superseded = 0
+        self.held: Dict[Hashable, Frame] = {}
+        self.held_snapshot: Optional[dict] = None
+        self.coalesced = 0  # movement frames replaced before they were sent
+        self.decreases = 0
+
+    @staticmethod
+    def paces(frame: Frame) -> bool:
+        if frame.conflate_key is not None:
+            return True
+        return frame.message is not None and frame.message.get("type") == "room_snapshot"
+
+    @property
+    def holding(self) -> bool:
+        return bool(self.held) or self.held_snapshot is not None
+
+    def ceiling(self) -> float:
+        """Highest rate the measured RTT allows"""
+        if not self.rtt or self.rtt <= self.rtt_target:
+            return self.max_rate
+        return max(self.min_rate, self.max_rate * self.rtt_target / self.rtt)
+
+    def adjust(self, backlog: int, superseded: int, now: float):
+        """Re-pick the rate from the queue depth and the connection's running count of superseded frames"""
+        if now - self.last_adjust < UPDATE_ADJUST_INTERVAL:
+            return
+        self.last_adjust = now
+        overtaken = superseded - self.last_superseded
+        self.last_superseded = superseded
+        if backlog > self.backlog_target or overtaken > 0:
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.decreases += 1
+        else:
+            self.rate = self.rate + self.max_rate / 10
+        self.rate = min(self.rate, self.ceiling())
+
+    def admit(self, frame: Frame, backlog: int, superseded: int, now: float) -> Optional[Frame]:
+        """The frame if it may be sent now, otherwise None after holding it for the next release"""
+        self.adjust(backlog, superseded, now)
+        if now >= self.next_due and not self.holding:
+            self.next_due = now + 1.0 / self.rate
+            return frame
+        self._hold(frame)
+        return None
+
+    def release(self, now: float) -> List[Frame]:
+        """Everything held, ready to queue; the next update is due one interval later"""
+        frames = list(self.held.values())
+        if self.held_snapshot is not None:
+            frames.append(encode_frame(self.held_snapshot))
+        self.held.clear()
+        self.held_snapshot = None
+        self.next_due = now + 1.0 / self.rate
+        return frames
+
+    def _hold(self, frame: Frame):
+        if frame.conflate_key is not None:
+            if self.held.pop(frame.conflate_key, None) is not None:
+                self.coalesced += 1
+            self.held[frame.conflate_key] = frame
+            return
+        if self.held_snapshot is None:
+            self.held_snapshot = {"type": "room_snapshot", "tick": 0, "players": {}}
+        else:
+            self.coalesced += 1
+        self.held_snapshot["tick"] = frame.message["tick"]
+        self.held_snapshot["players"].update(frame.message["players"])
+
+    def snapshot(self) -> dict:
+        return {
+            "rate_hz": round(self.rate, 2),
+            "rtt_ms": round(self.rtt * 1000, 1) if self.rtt is not None else None,
+            "coalesced": self.coalesced,
+            "decreases": self.decreases
+        }
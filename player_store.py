@@ -0,0 +1,209 @@
+import logging
+import os
+from collections.abc import MutableMapping
+from dataclasses import asdict, is_dataclass
+from typing import Dict, Iterator, List, Optional
+
+try:
+    import numpy as np
+except ImportError:  # compact rooms are optional; dict-of-dataclass rooms need nothing extra
+    np = None
+
+logger = logging.getLogger(__name__)
+
+COMPACT_ROOMS = os.getenv("COMPACT_ROOMS", "false").lower() == "true"
+
+BANNED = 1
+BASTRAL = 2
+SPECTATOR = 4
+
+def new_player_store():
+    """Players container for a new room: compact arrays when enabled, else a plain dict"""
+    if COMPACT_ROOMS:
+        if np is not None:
+            return CompactPlayerStore()
+        logger.warning("COMPACT_ROOMS is set but numpy is not installed; using dict rooms")
+    return {}
+
+def _array_field(array: str, column: Optional[int] = None, cast=float):
+    if column is None:
+        def fget(self):
+            return cast(getattr(self._store, array)[self._slot])
+
+        def fset(self, value):
+            getattr(self._store, array)[self._slot] = value
+    else:
+        def fget(self):
+            return cast(getattr(self._store, array)[self._slot, column])
+
+        def fset(self, value):
+            getattr(self._store, array)[self._slot, column] = value
+    return property(fget, fset)
+
+def _flag_field(bit: int):
+    def fget(self):
+        return bool(self._store.flags[self._slot] & bit)
+
+    def fset(self, value):
+        if value:
+            self._store.flags[self._slot] |= bit
+        else:
+            self._store.flags[self._slot] &= ~bit & 0xFF
+    return property(fget, fset)
+
+def _list_field(name: str):
+    def fget(self):
+        return getattr(self._store, name)[self._slot]
+
+    def fset(self, value):
+        getattr(self._store, name)[self._slot] = value
+    return property(fget, fset)
+
+class PositionView:
+    """Reads and writes one player's position straight from the store's arrays"""
+    __slots__ = ("_store", "_slot")
+
+    def __init__(self, store: "CompactPlayerStore", slot: int):
+        self._store = store
+        self._slot = slot
+
+    x = _array_field("positions", 0)
+    y = _array_field("positions", 1)
+    z = _array_field("positions", 2)
+    rotation_y = _array_field("rotations")
+
+    def to_dict(self) -> dict:
+        return {"x": self.x, "y": self.y, "z": self.z, "rotation_y": self.rotation_y}
+
+class PlayerView:
+    """Stands in for a Player dataclass whose fields live in a CompactPlayerStore"""
+    __slots__ = ("_store", "_slot", "id", "position")
+
+    def __init__(self, store: "CompactPlayerStore", slot: int, player_id: str):
+        self._store = store
+        self._slot = slot
+        self.id = player_id
+        self.position = PositionView(store, slot)
+
+    username = _list_field("usernames")
+    wallet_address = _list_field("wallets")
+    animation_state = _list_field("animation_states")
+    is_banned = _flag_field(BANNED)
+    is_bastral = _flag_field(BASTRAL)
+    is_spectator = _flag_field(SPECTATOR)
+    last_updated = _array_field("last_updated")
+
+    def to_dict(self) -> dict:
+        return self._store.to_dicts([self.id])[self.id]
+
+class CompactPlayerStore(MutableMapping):
+    """Struct-of-arrays player storage for one room, used like the players dict
+
+    Positions, rotations, flags and timestamps sit in contiguous NumPy arrays
+    indexed by a slot id. Assigning a Player copies it into a free slot, and
+    reading returns a PlayerView over that slot, so GameManager code keeps
+    working unchanged while room snapshots convert whole columns at once.
+    """
+
+    def __init__(self, capacity: int = 16):
+        if np is None:
+            raise RuntimeError("numpy is required for compact rooms")
+        self.capacity = capacity
+        self.positions = np.zeros((capacity, 3), dtype=np.float64)
+        self.rotations = np.zeros(capacity, dtype=np.float64)
+        self.flags = np.zeros(capacity, dtype=np.uint8)
+        self.last_updated = np.zeros(capacity, dtype=np.float64)
+        self.occupied = np.zeros(capacity, dtype=bool)
+        self.usernames: List[Optional[str]] = [None] * capacity
+        self.wallets: List[Optional[str]] = [None] * capacity
+        self.animation_states: List[Optional[str]] = [None] * capacity
+        self.player_ids: List[Optional[str]] = [None] * capacity
+        self.slot_of: Dict[str, int] = {}
+        self.views: Dict[str, PlayerView] = {}
+        self.free_slots: List[int] = list(range(capacity - 1, -1, -1))
+
+    def _grow(self):
+        old = self.capacity
+        self.capacity = old * 2
+        for name in ("positions", "rotations", "flags", "last_updated", "occupied"):
+            # New slots start zeroed, never as copies of existing rows
+            array = getattr(self, name)
+            grown = np.zeros((self.capacity,) + array.shape[1:], dtype=array.dtype)
+            grown[:old] = array
+            setattr(self, name, grown)
+        for column in (self.usernames, self.wallets, self.animation_states, self.player_ids):
+            column.extend([None] * old)
+        self.free_slots.extend(range(self.capacity - 1, old - 1, -1))
+
+    def __setitem__(self, player_id: str, player):
+        slot = self.slot_of.get(player_id)
+        if slot is None:
+            if not self.free_slots:
+                self._grow()
+            slot = self.free_slots.pop()
+            self.slot_of[player_id] = slot
+            self.player_ids[slot] = player_id
+            self.views[player_id] = PlayerView(self, slot, player_id)
+        position = player.position
+        self.positions[slot] = (position.x, position.y, position.z)
+        self.rotations[slot] = position.rotation_y
+        self.flags[slot] = (BANNED if player.is_banned else 0) | (BASTRAL if player.is_bastral else 0) | (SPECTATOR if player.is_spectator else 0)
+        self.last_updated[slot] = player.last_updated
+        self.usernames[slot] = player.username
+        self.wallets[slot] = player.wallet_address
+        self.animation_states[slot] = player.animation_state
+        self.occupied[slot] = True
+
+    def __getitem__(self, player_id: str) -> PlayerView:
+        return self.views[player_id]
+
+    def __delitem__(self, player_id: str):
+        slot = self.slot_of.pop(player_id)
+        del self.views[player_id]
+        self.occupied[slot] = False
+        self.flags[slot] = 0
+        self.usernames[slot] = self.wallets[slot] = self.animation_states[slot] = self.player_ids[slot] = None
+        self.free_slots.append(slot)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.slot_of)
+
+    def __len__(self) -> int:
+        return len(self.slot_of)
+
+    def __contains__(self, player_id) -> bool:
+        return player_id in self.slot_of
+
+    def to_dicts(self, player_ids: Optional[List[str]] = None) -> Dict[str, dict]:
+        """Snapshot players in the same shape as asdict(Player), converting arrays in bulk"""
+        ids = list(self.slot_of) if player_ids is None else player_ids
+        slots = [self.slot_of[pid] for pid in ids]
+        positions = self.positions[slots].tolist()
+        rotations = self.rotations[slots].tolist()
+        flags = self.flags[slots].tolist()
+        updated = self.last_updated[slots].tolist()
+        return {
+            pid: {
+                "id": pid,
+                "username": self.usernames[slot],
+                "wallet_address": self.wallets[slot],
+                "position": {"x": pos[0], "y": pos[1], "z": pos[2], "rotation_y": rot},
+                "is_banned": bool(flag & BANNED),
+                "is_bastral": bool(flag & BASTRAL),
+                "is_spectator": bool(flag & SPECTATOR),
+                "last_updated": stamp,
+                "animation_state": self.animation_states[slot]
+            }
+            for pid, slot, pos, rot, flag, stamp in zip(ids, slots, positions, rotations, flags, updated)
+        }
+
+def to_dict(obj) -> dict:
+    """asdict() for Player/PlayerPosition dataclasses and their compact views alike"""
+    if is_dataclass(obj):
+        return asdict(obj)
+    return obj.to_dict()
+
+def players_to_dict(players) -> Dict[str, dict]:
+    if isinstance(players, CompactPlayerStore):
+        return players.to_dicts()
+    return {pid: to_dict(player) for pid, player in players.items()}
@@ -0,0 +1,142 @@
+import logging
+import os
+import time
+from typing import Dict, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+ANY_FRAME = "frame"  # charged for every inbound frame before it is decoded, so garbage is not parsed for free
+ANY_MESSAGE = "*"  # shared bucket charged for every inbound message that is not a control message
+# Heartbeat replies, chat (and with it /ban) and game starts must never be starved by a flood of
+# moves, so they skip the shared bucket and are bounded by their own buckets alone
+CONTROL_MESSAGES = frozenset({"pong", "chat_message", "start_game"})
+# Excess moves are dropped without a notice; the next one supersedes them anyway
+SILENT_DROPS = frozenset({"position_update"})
+
+def parse_limits(spec: str) -> Dict[str, Tuple[float, float]]:
+    """Parse "type=rate/burst,..." into {type: (tokens per second, bucket size)}"""
+    limits = {}
+    for entry in filter(None, (part.strip() for part in spec.split(","))):
+        try:
+            message_type, values = entry.split("=", 1)
+            rate, _, burst = values.partition("/")
+            limits[message_type.strip()] = (float(rate), float(burst or rate))
+        except ValueError:
+            logger.warning(f"Ignoring malformed rate limit {entry!r}")
+    return limits
+
+# Per player: raw frames 100/s (burst 200), above everything the per-type limits let through,
+# non-control messages 60/s (burst 120), moves 30/s (burst 45), chat 1 every 2s (burst 5),
+# pongs 1/s (burst 5) and game starts 1 every 2s (burst 3)
+RATE_LIMITS = parse_limits(os.getenv(
+    "RATE_LIMITS", "frame=100/200,*=60/120,position_update=30/45,chat_message=0.5/5,pong=1/5,start_game=0.5/3"
+))
+
+class TokenBucket:
+    """Refills at `rate` tokens per second up to `burst`; each message spends one"""
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def refill(self, now: float = None) -> float:
+        """Add the tokens earned since the last call and return the balance"""
+        now = time.monotonic() if now is None else now
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return self.tokens
+
+    def allow(self, now: float = None) -> bool:
+        if self.refill(now) >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def retry_after(self) -> float:
+        """Seconds until the next message would be allowed"""
+        if self.tokens >= 1 or self.rate <= 0:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+class RateLimiter:
+    """Token buckets per player and message type, with allowed/dropped counters
+
+    A message needs a token in its own type's bucket and, unless it is a
+    control message, in the shared ANY_MESSAGE bucket. Nothing is spent
+    unless both have one, so dropped messages never eat into the budget of
+    other messages. Raw frames are charged to ANY_FRAME before decoding.
+    """
+
+    def __init__(self, limits: Dict[str, Tuple[float, float]] = None):
+        self.limits = RATE_LIMITS if limits is None else limits
+        self.buckets: Dict[str, Dict[str, TokenBucket]] = {}
+        self.allowed: Dict[str, int] = {}
+        self.dropped: Dict[str, int] = {}
+        self.noticed: Dict[str, Set[str]] = {}
+
+    def bucket(self, player_id: str, message_type: str):
+        limit = self.limits.get(message_type)
+        if limit is None:
+            return None
+        buckets = self.buckets.setdefault(player_id, {})
+        bucket = buckets.get(message_type)
+        if bucket is None:
+            bucket = buckets[message_type] = TokenBucket(*limit)
+        return bucket
+
+    def _charged(self, message_type: str):
+        yield message_type
+        if message_type not in CONTROL_MESSAGES:
+            yield ANY_MESSAGE
+
+    def allow_frame(self, player_id: str) -> bool:
+        """Spend a token for an inbound frame, before it is decoded"""
+        bucket = self.bucket(player_id, ANY_FRAME)
+        if bucket is None or bucket.allow():
+            return True
+        self.dropped[ANY_FRAME] = self.dropped.get(ANY_FRAME, 0) + 1
+        return False
+
+    def allow(self, player_id: str, message_type: str) -> bool:
+        """Spend tokens for this message; buckets without a configured limit always pass"""
+        buckets = [self.bucket(player_id, bucket_type) for bucket_type in self._charged(message_type)]
+        buckets = [bucket for bucket in buckets if bucket is not None]
+        if any(bucket.refill() < 1 for bucket in buckets):
+            self.dropped[message_type] = self.dropped.get(message_type, 0) + 1
+            return False
+        for bucket in buckets:
+            bucket.tokens -= 1
+        self.allowed[message_type] = self.allowed.get(message_type, 0) + 1
+        noticed = self.noticed.get(player_id)
+        if noticed:
+            noticed.discard(message_type)
+        return True
+
+    def notice(self, player_id: str, message_type: str) -> Optional[dict]:
+        """The rate_limited message for a drop, or None if one went out since this type last got through"""
+        if message_type in SILENT_DROPS:
+            return None
+        noticed = self.noticed.setdefault(player_id, set())
+        if message_type in noticed:
+            return None
+        noticed.add(message_type)
+        buckets = (self.bucket(player_id, bucket_type) for bucket_type in self._charged(message_type))
+        return {
+            "type": "rate_limited",
+            "message_type": message_type,
+            "retry_after": max(bucket.retry_after() for bucket in buckets if bucket is not None)
+        }
+
+    def forget(self, player_id: str):
+        self.buckets.pop(player_id, None)
+        self.noticed.pop(player_id, None)
+
+    def snapshot(self) -> dict:
+        return {
+            "limits": {message_type: {"rate": rate, "burst": burst} for message_type, (rate, burst) in self.limits.items()},
+            "allowed": dict(self.allowed),
+            "dropped": dict(self.dropped)
+        }
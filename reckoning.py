@@ -0,0 +1,76 @@
+import math
+import os
+from typing import Optional, Tuple
+
+from history import PositionHistory
+
+Vector = Tuple[float, float, float]
+
+DR_POSITION_ERROR = float(os.getenv("DR_POSITION_ERROR", "0.1"))  # metres a prediction may drift before a move is sent
+DR_ROTATION_ERROR = float(os.getenv("DR_ROTATION_ERROR", "0.1"))  # radians
+DR_VELOCITY_WINDOW = float(os.getenv("DR_VELOCITY_WINDOW", "0.15"))  # seconds of history the velocity is taken over
+DR_REFRESH = float(os.getenv("DR_REFRESH", "1.0"))  # seconds; a moving player is resent at least this often
+DR_MIN_SPEED = 0.05  # metres per second
+DR_MAX_SPEED = 20.0  # anything faster is a respawn or teleport, not motion to extrapolate
+STILL = (0.0, 0.0, 0.0)
+RESTING_STATES = frozenset({"idle"})  # animation states a client only sends once the player has stopped
+
+def velocity(history: Optional[PositionHistory], now: float, window: float = DR_VELOCITY_WINDOW) -> Vector:
+    """Average velocity over the last `window` seconds of a player's position history"""
+    if history is None:
+        return STILL
+    current, earlier = history.at(now), history.at(now - window)
+    if current is None or earlier is None:
+        return STILL
+    moving = tuple((a - b) / window for a, b in zip(current, earlier))
+    # Jitter from an idle client and jumps between spots are not motion worth extrapolating
+    return moving if DR_MIN_SPEED <= math.hypot(*moving) <= DR_MAX_SPEED else STILL
+
+class DeadReckoner:
+    """The movement state last sent for one player, extrapolated the way clients extrapolate it
+
+    Observers move a remote player along the last velocity they received, so
+    a new sample only needs forwarding once it strays from that straight-line
+    prediction, or when the player turns or changes animation.
+    """
+    __slots__ = ("sent_at", "position", "velocity", "rotation_y", "animation_state", "stopped", "sent", "suppressed")
+
+    def __init__(self):
+        self.sent_at: Optional[float] = None
+        self.position: Vector = STILL
+        self.velocity: Vector = STILL
+        self.rotation_y = 0.0
+        self.animation_state: Optional[str] = None
+        self.stopped = False  # whether the last state sent brought a moving player to rest
+        self.sent = 0
+        self.suppressed = 0
+
+    def predict(self, now: float) -> Vector:
+        elapsed = now - self.sent_at
+        return tuple(p + v * elapsed for p, v in zip(self.position, self.velocity))
+
+    def needs_update(self, now: float, position: Vector, rotation_y: float, animation_state: str, moving: Vector,
+                     error: float = DR_POSITION_ERROR, rotation_error: float = DR_ROTATION_ERROR,
+                     refresh: float = DR_REFRESH) -> bool:
+        """Whether observers' prediction is now too far off; if so the new state is taken as sent"""
+        if animation_state in RESTING_STATES:
+            # The history window still holds the last steps, but the client says the player is at rest
+            moving = STILL
+        turned = abs(math.remainder(rotation_y - self.rotation_y, 2 * math.pi)) > rotation_error
+        if (self.sent_at is None or animation_state != self.animation_state or turned
+                or math.dist(self.predict(now), position) > error
+                or (moving == STILL and self.velocity != STILL)
+                or (self.velocity != STILL and now - self.sent_at >= refresh)):
+            self.stopped = moving == STILL and self.velocity != STILL
+            self.sent_at = now
+            self.position = position
+            self.velocity = moving
+            self.rotation_y = rotation_y
+            self.animation_state = animation_state
+            self.sent += 1
+            return True
+        self.suppressed += 1
+        return False
+
+    def velocity_dict(self) -> dict:
+        return {"x": round(self.velocity[0], 3), "y": round(self.velocity[1], 3), "z": round(self.velocity[2], 3)}
@@ -0,0 +1,82 @@
+import random
+from typing import Callable, Dict, Iterator, List, Optional
+
+# Events passed to AliveSet hooks as hook(event, player_id)
+JOIN = "join"
+LEAVE = "leave"
+BAN = "ban"
+SPECTATE = "spectate"
+REVIVE = "revive"
+
+class AliveSet:
+    """Players in a room that are neither banned nor spectating, kept current as they change
+
+    Members sit in a list with an index map; removal swaps the last member
+    into the gap, so every update and a uniform random pick are O(1).
+    """
+
+    def __init__(self):
+        self.members: List[str] = []
+        self.index: Dict[str, int] = {}
+        self.hooks: List[Callable[[str, str], None]] = []
+
+    def __len__(self) -> int:
+        return len(self.members)
+
+    def __contains__(self, player_id: str) -> bool:
+        return player_id in self.index
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.members)
+
+    def _add(self, player_id: str):
+        if player_id not in self.index:
+            self.index[player_id] = len(self.members)
+            self.members.append(player_id)
+
+    def _discard(self, player_id: str):
+        position = self.index.pop(player_id, None)
+        if position is None:
+            return
+        last = self.members.pop()
+        if last != player_id:
+            self.members[position] = last
+            self.index[last] = position
+
+    def _fire(self, event: str, player_id: str):
+        for hook in self.hooks:
+            hook(event, player_id)
+
+    def join(self, player_id: str, alive: bool = True):
+        if alive:
+            self._add(player_id)
+        else:
+            self._discard(player_id)
+        self._fire(JOIN, player_id)
+
+    def leave(self, player_id: str):
+        self._discard(player_id)
+        self._fire(LEAVE, player_id)
+
+    def ban(self, player_id: str):
+        self._discard(player_id)
+        self._fire(BAN, player_id)
+
+    def spectate(self, player_id: str):
+        self._discard(player_id)
+        self._fire(SPECTATE, player_id)
+
+    def revive(self, player_id: str):
+        """Back in play, e.g. when bans are cleared for the next game"""
+        self._add(player_id)
+        self._fire(REVIVE, player_id)
+
+    def choice(self, rng: random.Random = None) -> Optional[str]:
+        """A uniformly random alive player, or None when nobody is left"""
+        if not self.members:
+            return None
+        return self.members[(rng or random).randrange(len(self.members))]
+
+    def only(self) -> Optional[str]:
+        """The last player standing, when exactly one is alive"""
+        return self.members[0] if len(self.members) == 1 else None
@@ -0,0 +1,189 @@
+# Front router for the sharded game tier.
+#
+# Starts SHARD_COUNT game_server workers, one process each, and forwards every
+# websocket to the worker that owns the player's room. Rooms map to workers by
+# consistent hashing on room_id, so a room lives in exactly one process and
+# adding workers moves only a share of the rooms.
+#
+#     SHARD_COUNT=4 python router.py
+
+import asyncio
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
+
+import aiohttp
+from fastapi import FastAPI, HTTPException, WebSocket
+from fastapi.responses import FileResponse, Response
+from fastapi.staticfiles import StaticFiles
+
+from matchmaking import Matchmaker
+from sharding import SHARD_BASE_PORT, SHARD_COUNT, SHARD_HOST, HashRing, shard_address
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+ROUTER_PORT = int(os.getenv("ROUTER_PORT", "8001"))
+ROOM_LISTING_TTL = float(os.getenv("ROOM_LISTING_TTL", "1.0"))  # seconds a merged /api/rooms stays cached
+
+ring = HashRing(range(SHARD_COUNT))
+matchmaker = Matchmaker()  # sees every join, so room choice stays global across shards
+sessions: Dict[str, object] = {}  # player_id -> token of its newest routed connection
+session: Optional[aiohttp.ClientSession] = None
+listing_lock = asyncio.Lock()
+listing = {"at": float("-inf"), "body": ""}
+
+def get_session() -> aiohttp.ClientSession:
+    global session
+    if session is None or session.closed:
+        session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=None, sock_connect=5))
+    return session
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    if session is not None:
+        await session.close()
+
+app = FastAPI(title="BAN@LL Shard Router", lifespan=lifespan)
+
+app.mount("/public", StaticFiles(directory="/app/public"), name="public")
+
+@app.get("/")
+async def root():
+    return FileResponse("/app/public/banall.html")
+
+async def _client_to_shard(websocket: WebSocket, upstream: aiohttp.ClientWebSocketResponse):
+    while True:
+        data = await websocket.receive()
+        if data["type"] == "websocket.disconnect":
+            return
+        if data.get("text") is not None:
+            await upstream.send_str(data["text"])
+        elif data.get("bytes") is not None:
+            await upstream.send_bytes(data["bytes"])
+
+async def _shard_to_client(websocket: WebSocket, upstream: aiohttp.ClientWebSocketResponse):
+    async for message in upstream:
+        if message.type == aiohttp.WSMsgType.TEXT:
+            await websocket.send_text(message.data)
+        elif message.type == aiohttp.WSMsgType.BINARY:
+            await websocket.send_bytes(message.data)
+        else:
+            break
+
+@app.websocket("/ws/{player_id}")
+async def websocket_endpoint(websocket: WebSocket, player_id: str):
+    await websocket.accept()
+    spectate = websocket.query_params.get("spectate") in ("1", "true")
+    room_id = matchmaker.assign(player_id, websocket.query_params.get("room"), spectate)
+    token = sessions[player_id] = object()
+    shard = ring.owner(room_id)
+    # The shard trusts ?room= for rooms it owns, so the player lands where the router placed it
+    params = {**dict(websocket.query_params), "room": room_id}
+    close_code = 1000
+
+    try:
+        async with get_session().ws_connect(f"ws://{shard_address(shard)}/ws/{player_id}", params=params,
+                                            max_msg_size=0) as upstream:
+            pumps = [
+                asyncio.create_task(_client_to_shard(websocket, upstream)),
+                asyncio.create_task(_shard_to_client(websocket, upstream))
+            ]
+            _, pending = await asyncio.wait(pumps, return_when=asyncio.FIRST_COMPLETED)
+            for task in pending:
+                task.cancel()
+            for task in pumps:
+                if task.done() and not task.cancelled() and task.exception():
+                    logger.debug(f"Proxy for {player_id} ended: {task.exception()}")
+            # Pass shard close codes such as slow-consumer or heartbeat evictions on to the client
+            close_code = upstream.close_code or 1000
+    except aiohttp.ClientError as e:
+        logger.error(f"Shard {shard} unreachable for player {player_id}: {str(e)}")
+        close_code = 1013  # try again later
+    finally:
+        if sessions.get(player_id) is token:
+            del sessions[player_id]
+            matchmaker.leave(player_id)
+        try:
+            await websocket.close(code=close_code)
+        except Exception:
+            pass
+
+async def _shard_get(index: int, path: str, params: Optional[dict] = None):
+    async with get_session().get(f"http://{shard_address(index)}{path}", params=params,
+                                 timeout=aiohttp.ClientTimeout(total=5)) as response:
+        return response.status, await response.text()
+
+@app.get("/api/rooms")
+async def list_rooms():
+    """Every shard's rooms in one listing, merged at most once per ROOM_LISTING_TTL"""
+    async with listing_lock:
+        if time.monotonic() - listing["at"] >= ROOM_LISTING_TTL:
+            results = await asyncio.gather(*(_shard_get(index, "/api/rooms") for index in range(SHARD_COUNT)),
+                                           return_exceptions=True)
+            rooms: List[dict] = []
+            for result in results:
+                if isinstance(result, tuple) and result[0] == 200:
+                    rooms.extend(json.loads(result[1])["rooms"])
+            listing["body"] = json.dumps({"capacity": matchmaker.capacity, "rooms": sorted(rooms, key=lambda room: room["id"])})
+            listing["at"] = time.monotonic()
+    return Response(content=listing["body"], media_type="application/json")
+
+async def _proxy_to_owner(room_id: str, path: str, params: dict) -> Response:
+    try:
+        status, body = await _shard_get(ring.owner(room_id), path, {k: str(v) for k, v in params.items() if v is not None})
+    except (aiohttp.ClientError, asyncio.TimeoutError):
+        raise HTTPException(status_code=503, detail="Shard unavailable")
+    return Response(content=body, status_code=status, media_type="application/json")
+
+@app.get("/api/game_state/{room_id}")
+async def get_game_state(room_id: str, since: Optional[int] = None):
+    return await _proxy_to_owner(room_id, f"/api/game_state/{room_id}", {"since": since})
+
+@app.get("/api/chat/{room_id}")
+async def get_chat_history(room_id: str, before: Optional[int] = None, limit: Optional[int] = None):
+    return await _proxy_to_owner(room_id, f"/api/chat/{room_id}", {"before": before, "limit": limit})
+
+@app.get("/api/health")
+async def health_check():
+    """Router state plus each shard's own health report"""
+    results = await asyncio.gather(*(_shard_get(index, "/api/health") for index in range(SHARD_COUNT)),
+                                   return_exceptions=True)
+    shards = {
+        str(index): json.loads(result[1]) if isinstance(result, tuple) and result[0] == 200 else {"status": "unreachable"}
+        for index, result in enumerate(results)
+    }
+    return {
+        "status": "healthy" if all(shard.get("status") == "healthy" for shard in shards.values()) else "degraded",
+        "routed_connections": len(sessions),
+        "rooms": len(set(matchmaker.seats) | set(matchmaker.watchers)),
+        "shards": shards
+    }
+
+def spawn_shards() -> List[subprocess.Popen]:
+    """One game_server worker per shard, each told which share of the ring it owns"""
+    workers = []
+    for index in range(SHARD_COUNT):
+        env = {**os.environ, "SHARD_INDEX": str(index), "SHARD_COUNT": str(SHARD_COUNT)}
+        workers.append(subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "game_server:app", "--host", SHARD_HOST, "--port", str(SHARD_BASE_PORT + index)],
+            env=env
+        ))
+    return workers
+
+if __name__ == "__main__":
+    import uvicorn
+    workers = spawn_shards()
+    try:
+        uvicorn.run(app, host="0.0.0.0", port=ROUTER_PORT)
+    finally:
+        for worker in workers:
+            worker.terminate()
+        for worker in workers:
+            worker.wait()
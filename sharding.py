@@ -0,0 +1,46 @@
+import bisect
+import hashlib
+import os
+from typing import Callable, Hashable, Iterable, List, Optional, Tuple
+
+SHARD_COUNT = int(os.getenv("SHARD_COUNT", "1"))
+SHARD_INDEX = os.getenv("SHARD_INDEX")  # set only inside a shard worker process
+SHARD_HOST = os.getenv("SHARD_HOST", "127.0.0.1")
+SHARD_BASE_PORT = int(os.getenv("SHARD_BASE_PORT", "8101"))  # shard i listens on base + i
+SHARD_VNODES = 64  # ring points per shard; more points, more even split
+
+def stable_hash(key: str) -> int:
+    # Python's hash() is salted per process, so every process would disagree on owners
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big")
+
+class HashRing:
+    """Consistent hashing of room ids onto shards
+
+    Each shard owns SHARD_VNODES points on the ring and a room belongs to the
+    first point at or after its hash. Adding or removing a shard therefore
+    only moves the rooms on that shard's arcs.
+    """
+
+    def __init__(self, nodes: Iterable[Hashable], vnodes: int = SHARD_VNODES):
+        points: List[Tuple[int, Hashable]] = sorted(
+            (stable_hash(f"{node}#{replica}"), node) for node in nodes for replica in range(vnodes)
+        )
+        if not points:
+            raise ValueError("HashRing needs at least one node")
+        self.hashes = [point for point, _ in points]
+        self.nodes = [node for _, node in points]
+
+    def owner(self, key: str) -> Hashable:
+        index = bisect.bisect_left(self.hashes, stable_hash(key))
+        return self.nodes[index % len(self.nodes)]
+
+def shard_address(index: int) -> str:
+    return f"{SHARD_HOST}:{SHARD_BASE_PORT + index}"
+
+def local_ownership() -> Optional[Callable[[str], bool]]:
+    """Inside a shard worker, a test for the rooms this process owns; None when not sharded"""
+    if SHARD_INDEX is None:
+        return None
+    ring = HashRing(range(SHARD_COUNT))
+    index = int(SHARD_INDEX)
+    return lambda room_id: ring.owner(room_id) == index
@@ -0,0 +1,76 @@
+import json
+import os
+from collections import OrderedDict
+from typing import Dict, Optional
+
+STATE_HISTORY = int(os.getenv("STATE_HISTORY", "32"))  # room-state versions kept for deltas
+
+def merge_patch(old: dict, new: dict) -> dict:
+    """JSON merge patch (RFC 7386) turning old into new
+
+    Nested objects are diffed key by key, so a join only carries the new
+    player and the fields that changed with it. Keys that disappeared are
+    sent as null, which is also how a client should read a null value.
+    """
+    patch = {}
+    for key, value in new.items():
+        if key not in old:
+            patch[key] = value
+            continue
+        previous = old[key]
+        if previous == value:
+            continue
+        if isinstance(value, dict) and isinstance(previous, dict):
+            patch[key] = merge_patch(previous, value)
+        else:
+            patch[key] = value
+    for key in old:
+        if key not in new:
+            patch[key] = None
+    return patch
+
+def apply_patch(target: dict, patch: dict) -> dict:
+    """Apply a merge patch, returning a new dict"""
+    result = dict(target)
+    for key, value in patch.items():
+        if value is None:
+            result.pop(key, None)
+        elif isinstance(value, dict) and isinstance(result.get(key), dict):
+            result[key] = apply_patch(result[key], value)
+        else:
+            result[key] = value
+    return result
+
+class SnapshotHistory:
+    """Recent room-state snapshots by version, and the deltas between them
+
+    Deltas are only ever requested towards the newest version, so they are
+    cached per source version and dropped as soon as the room moves on.
+    """
+
+    def __init__(self, depth: int = STATE_HISTORY):
+        self.depth = max(1, depth)
+        self.snapshots: "OrderedDict[int, dict]" = OrderedDict()
+        self._delta_target: Optional[int] = None
+        self._deltas: Dict[int, str] = {}
+
+    def record(self, version: int, state: dict):
+        self.snapshots[version] = state
+        self.snapshots.move_to_end(version)
+        while len(self.snapshots) > self.depth:
+            self.snapshots.popitem(last=False)
+
+    def delta_json(self, from_version: int, to_version: int) -> Optional[str]:
+        """JSON text of a room_delta, or None when from_version is no longer known"""
+        old = self.snapshots.get(from_version)
+        new = self.snapshots.get(to_version)
+        if old is None or new is None:
+            return None
+        if self._delta_target != to_version:
+            self._delta_target = to_version
+            self._deltas = {}
+        text = self._deltas.get(from_version)
+        if text is None:
+            text = json.dumps({"from": from_version, "to": to_version, "patch": merge_patch(old, new)})
+            self._deltas[from_version] = text
+        return text
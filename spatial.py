@@ -0,0 +1,136 @@
+import heapq
+import itertools
+import math
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+Cell = Tuple[int, int, int]
+Point = Tuple[float, float, float]
+
+DEFAULT_CELL_SIZE = 4.0  # a little larger than the 3-unit ban range
+
+class SpatialGrid:
+    """Uniform hash grid over player positions for radius and k-nearest queries"""
+
+    def __init__(self, cell_size: float = DEFAULT_CELL_SIZE):
+        self.cell_size = cell_size
+        self.cells: Dict[Cell, Set[str]] = {}
+        self.positions: Dict[str, Point] = {}
+        self.player_cells: Dict[str, Cell] = {}
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def __contains__(self, player_id: str) -> bool:
+        return player_id in self.positions
+
+    def cell_of(self, x: float, y: float, z: float) -> Cell:
+        size = self.cell_size
+        return (math.floor(x / size), math.floor(y / size), math.floor(z / size))
+
+    def update(self, player_id: str, x: float, y: float, z: float):
+        """Insert a player or move it, touching the cell map only when its cell changes"""
+        cell = self.cell_of(x, y, z)
+        self.positions[player_id] = (x, y, z)
+        old_cell = self.player_cells.get(player_id)
+        if old_cell == cell:
+            return
+        if old_cell is not None:
+            self._discard(old_cell, player_id)
+        self.cells.setdefault(cell, set()).add(player_id)
+        self.player_cells[player_id] = cell
+
+    def remove(self, player_id: str):
+        self.positions.pop(player_id, None)
+        cell = self.player_cells.pop(player_id, None)
+        if cell is not None:
+            self._discard(cell, player_id)
+
+    def _discard(self, cell: Cell, player_id: str):
+        members = self.cells.get(cell)
+        if members is None:
+            return
+        members.discard(player_id)
+        if not members:
+            del self.cells[cell]
+
+    def _ring(self, center: Cell, ring: int) -> Iterator[Cell]:
+        """Cells on the surface of the cube `ring` cells away from center"""
+        cx, cy, cz = center
+        for dx in range(-ring, ring + 1):
+            for dy in range(-ring, ring + 1):
+                edge = abs(dx) == ring or abs(dy) == ring
+                for dz in range(-ring, ring + 1):
+                    if edge or abs(dz) == ring:
+                        yield (cx + dx, cy + dy, cz + dz)
+
+    def query_radius(self, x: float, y: float, z: float, radius: float,
+                     exclude: Optional[str] = None) -> List[Tuple[str, float]]:
+        """Players within radius of a point, nearest first"""
+        lo = self.cell_of(x - radius, y - radius, z - radius)
+        hi = self.cell_of(x + radius, y + radius, z + radius)
+        span = (hi[0] - lo[0] + 1) * (hi[1] - lo[1] + 1) * (hi[2] - lo[2] + 1)
+        if span > len(self.cells):
+            # Large radius: walk the occupied cells instead of the empty ones
+            cells = [cell for cell in self.cells if all(lo[i] <= cell[i] <= hi[i] for i in range(3))]
+        else:
+            cells = itertools.product(range(lo[0], hi[0] + 1), range(lo[1], hi[1] + 1), range(lo[2], hi[2] + 1))
+
+        found = []
+        for cell in cells:
+            for player_id in self.cells.get(cell, ()):
+                if player_id == exclude:
+                    continue
+                distance = math.dist((x, y, z), self.positions[player_id])
+                if distance <= radius:
+                    found.append((player_id, distance))
+        found.sort(key=lambda item: item[1])
+        return found
+
+    def nearest(self, x: float, y: float, z: float, k: int,
+                exclude: Optional[str] = None) -> List[Tuple[str, float]]:
+        """The k players closest to a point, searching outward ring by ring"""
+        if k <= 0:
+            return []
+        center = self.cell_of(x, y, z)
+        total = len(self.positions) - (1 if exclude in self.positions else 0)
+        best: List[Tuple[float, str]] = []  # max-heap of the k best, stored negated
+
+        def consider(cell: Cell) -> int:
+            count = 0
+            for player_id in self.cells.get(cell, ()):
+                if player_id == exclude:
+                    continue
+                count += 1
+                distance = math.dist((x, y, z), self.positions[player_id])
+                if len(best) < k:
+                    heapq.heappush(best, (-distance, player_id))
+                elif distance < -best[0][0]:
+                    heapq.heapreplace(best, (-distance, player_id))
+            return count
+
+        seen = 0
+        ring = 0
+        while seen < total:
+            if 6 * (2 * ring + 1) ** 2 > len(self.cells):
+                # Sparse grid: visiting the remaining occupied cells directly is cheaper
+                for cell in list(self.cells):
+                    if max(abs(cell[0] - center[0]), abs(cell[1] - center[1]), abs(cell[2] - center[2])) >= ring:
+                        consider(cell)
+                break
+            for cell in self._ring(center, ring):
+                seen += consider(cell)
+            # Anything in a further ring is at least ring * cell_size away
+            if len(best) == k and -best[0][0] <= ring * self.cell_size:
+                break
+            ring += 1
+        return sorted(((player_id, -neg) for neg, player_id in best), key=lambda item: item[1])
+
+    def near_player(self, player_id: str, radius: float) -> List[Tuple[str, float]]:
+        if player_id not in self.positions:
+            return []
+        return self.query_radius(*self.positions[player_id], radius, exclude=player_id)
+
+    def nearest_to_player(self, player_id: str, k: int) -> List[Tuple[str, float]]:
+        if player_id not in self.positions:
+            return []
+        return self.nearest(*self.positions[player_id], k, exclude=player_id)
@@ -0,0 +1,19 @@
+import os
+import tempfile
+
+import pytest
+
+# Background loops would outlive each test's event loop; tests drive them by hand instead
+os.environ.setdefault("HEARTBEAT_INTERVAL", "0")
+os.environ.setdefault("LIFECYCLE_INTERVAL", "0")
+# Managers built by different tests would otherwise share the in-process bus hub
+os.environ.setdefault("EVENT_BUS", "none")
+os.environ.setdefault("ROOM_HIBERNATE_DIR", tempfile.mkdtemp(prefix="banall-rooms-"))
+
+@pytest.fixture
+def game_server():
+    """The game_server module; it mounts /app/public at import, as deployed"""
+    if not os.path.isdir("/app/public"):
+        pytest.skip("game_server needs /app/public, the deployed static files directory")
+    import game_server
+    return game_server
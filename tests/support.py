@@ -0,0 +1,31 @@
+import asyncio
+import json
+
+class FakeWebSocket:
+    """The server side of a client socket, recording what the server sends"""
+
+    def __init__(self):
+        self.sent = []
+        self.closed = None
+
+    async def send_text(self, text: str):
+        self.sent.append(json.loads(text))
+
+    async def send_bytes(self, data: bytes):
+        self.sent.append(data)
+
+    async def close(self, code: int = 1000, reason: str = ""):
+        self.closed = (code, reason)
+
+    def of_type(self, message_type: str) -> list:
+        return [message for message in self.sent if isinstance(message, dict) and message.get("type") == message_type]
+
+async def settle(seconds: float = 0.05):
+    """Let writer tasks, pacers and the event bus flush"""
+    await asyncio.sleep(seconds)
+
+async def join(manager, player_id: str, room_id: str = "main") -> FakeWebSocket:
+    """Seat a player in a room the way the websocket endpoint does"""
+    websocket = FakeWebSocket()
+    await manager.in_room(room_id, manager.add_player, player_id, websocket, room_id)
+    return websocket
@@ -0,0 +1,57 @@
+import asyncio
+
+import pytest
+
+from actor import RoomActor
+
+def test_calls_run_one_at_a_time_in_submission_order():
+    log = []
+
+    async def step(name):
+        log.append(f"{name} start")
+        await asyncio.sleep(0.01)
+        log.append(f"{name} end")
+        return name
+
+    async def scenario():
+        actor = RoomActor("main")
+        results = await asyncio.gather(*(actor.call(step, name) for name in "abc"))
+        actor.stop()
+        return results, actor.processed
+
+    results, processed = asyncio.run(scenario())
+    assert results == ["a", "b", "c"] and processed == 3
+    assert log == ["a start", "a end", "b start", "b end", "c start", "c end"]
+
+def test_nested_calls_run_inline_instead_of_deadlocking():
+    async def scenario():
+        actor = RoomActor("main")
+
+        async def inner():
+            return "inner"
+
+        async def outer():
+            return await actor.call(inner)
+
+        result = await asyncio.wait_for(actor.call(outer), 1.0)
+        actor.stop()
+        return result
+
+    assert asyncio.run(scenario()) == "inner"
+
+def test_errors_reach_the_caller_and_the_actor_keeps_going():
+    async def fail():
+        raise KeyError("gone")
+
+    async def ok():
+        return "ok"
+
+    async def scenario():
+        actor = RoomActor("main")
+        with pytest.raises(KeyError):
+            await actor.call(fail)
+        result = await actor.call(ok)
+        actor.stop()
+        return result
+
+    assert asyncio.run(scenario()) == "ok"
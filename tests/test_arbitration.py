@@ -0,0 +1,30 @@
+import pytest
+
+from arbitration import BanArbiter, BanAttempt, ClockSync, action_time
+
+def test_clock_offset_uses_the_fastest_trip():
+    clock = ClockSync()
+    clock.observe("a", 1000.0, received_at=101.08)
+    clock.observe("a", 2000.0, received_at=102.03)
+    assert clock.to_server_time("a", 3000.0) == pytest.approx(103.03)
+    clock.forget("a")
+    assert clock.to_server_time("a", 3000.0) is None
+
+def test_client_timestamps_move_an_action_back_by_at_most_the_tolerance():
+    clock = ClockSync()
+    clock.observe("a", 0.0, received_at=100.0)
+    assert action_time(clock, "a", 9500.0, received_at=110.0, tolerance=0.25) == 109.75
+    assert action_time(clock, "a", 9950.0, received_at=110.0, tolerance=0.25) == pytest.approx(109.95)
+    assert action_time(clock, "a", 20000.0, received_at=110.0) == 110.0  # never later than arrival
+    assert action_time(clock, "b", 9900.0, received_at=110.0) == 110.0  # no samples yet
+    assert action_time(clock, "a", None, received_at=110.0) == 110.0
+
+def test_window_resolves_earliest_action_first_with_one_attempt_per_player():
+    arbiter = BanArbiter()
+    assert arbiter.submit("main", BanAttempt("late", action_time=5.2, received_at=5.21))
+    assert not arbiter.submit("main", BanAttempt("tie-b", action_time=5.1, received_at=5.3))
+    assert not arbiter.submit("main", BanAttempt("tie-a", action_time=5.1, received_at=5.3))
+    assert not arbiter.submit("main", BanAttempt("late", action_time=5.0, received_at=5.31))
+    assert arbiter.has_pending("main")
+    assert [attempt.player_id for attempt in arbiter.take("main")] == ["tie-a", "tie-b", "late"]
+    assert not arbiter.has_pending("main")
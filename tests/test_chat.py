@@ -0,0 +1,29 @@
+from chat import ChatHistory
+
+def filled(count: int, capacity: int) -> ChatHistory:
+    history = ChatHistory(capacity)
+    for n in range(count):
+        history.append({"message": str(n)})
+    return history
+
+def seqs(messages):
+    return [message["seq"] for message in messages]
+
+def test_ring_buffer_keeps_the_newest_messages():
+    history = filled(12, capacity=5)
+    assert len(history) == 5 and history.oldest_seq == 8
+    assert seqs(history.page()) == [8, 9, 10, 11, 12]
+
+def test_paging_backwards_stops_at_the_oldest_kept():
+    history = filled(12, capacity=5)
+    assert seqs(history.page(limit=2)) == [11, 12]
+    assert seqs(history.page(before=11, limit=2)) == [9, 10]
+    assert seqs(history.page(before=9, limit=2)) == [8]
+    assert history.page(before=8) == []
+
+def test_dump_and_load_keep_sequence_ids():
+    history = filled(12, capacity=5)
+    restored = ChatHistory.load(history.dump(), capacity=3)
+    assert seqs(restored.page()) == [10, 11, 12]
+    assert restored.append({"message": "next"})["seq"] == 13
+    assert ChatHistory.load(ChatHistory(5).dump()).next_seq == 1
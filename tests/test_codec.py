@@ -0,0 +1,44 @@
+import math
+
+import pytest
+
+from codec import BINARY_CODEC, JSON_CODEC, encode_position_update, negotiate
+
+POSITION = {"x": 1.23, "y": 4.5, "z": -6.78, "rotation_y": -math.pi / 2}
+
+def test_negotiation_falls_back_to_json():
+    assert negotiate("BIN1") is BINARY_CODEC
+    assert negotiate("msgpack") is JSON_CODEC and negotiate(None) is JSON_CODEC
+
+def test_position_update_round_trips_to_the_centimetre():
+    message = BINARY_CODEC.decode(data=encode_position_update(*POSITION.values(), "climbing"))
+    assert message["type"] == "position_update"
+    for axis in "xyz":
+        assert message["data"][axis] == pytest.approx(POSITION[axis], abs=0.005)
+    assert message["data"]["rotation_y"] == pytest.approx(POSITION["rotation_y"], abs=1e-3)
+    assert message["data"]["animation_state"] == "climbing"
+
+@pytest.mark.parametrize("velocity", [None, {"x": 2.0, "y": 0.0, "z": -1.5}])
+def test_player_moved_round_trips_by_slot(velocity):
+    message = {"type": "player_moved", "player_id": "a", "position": POSITION, "animation_state": "walking"}
+    if velocity:
+        message["velocity"] = velocity
+    data = BINARY_CODEC.encode(message, {"a": 3})
+    decoded = BINARY_CODEC.decode_player_moved(data, {3: "a"})
+    assert decoded["player_id"] == "a" and decoded["animation_state"] == "walking"
+    assert decoded["position"]["x"] == pytest.approx(1.23, abs=0.005)
+    assert decoded.get("velocity") == velocity
+
+def test_room_snapshot_naming_a_player_without_a_slot_stays_json():
+    message = {"type": "room_snapshot", "tick": 9, "players": {
+        "a": {"position": POSITION, "animation_state": "idle"},
+        "ghost": {"position": POSITION, "animation_state": "idle"}
+    }}
+    assert BINARY_CODEC.encode(message, {"a": 0}) is None
+
+def test_other_messages_stay_json():
+    assert BINARY_CODEC.encode({"type": "chat_message", "message": "hi"}, {"a": 0}) is None
+    assert BINARY_CODEC.encode({"type": "player_moved", "player_id": "b", "position": POSITION}, {"a": 0}) is None
+    assert BINARY_CODEC.decode(text='{"type": "pong", "id": 1}') == {"type": "pong", "id": 1}
+    with pytest.raises(ValueError):
+        BINARY_CODEC.decode(data=b"\x09")
@@ -0,0 +1,43 @@
+import asyncio
+
+from fanout import FanoutEngine, FanoutResult, FanoutStats
+from frames import encode_frame
+from outbound import ClientConnection, OutboundMetrics
+
+from support import FakeWebSocket, settle
+
+class StalledWebSocket(FakeWebSocket):
+    """A client whose socket never drains"""
+
+    async def send_text(self, text: str):
+        await asyncio.sleep(3600)
+
+def test_percentiles_over_the_window():
+    stats = FanoutStats(window=4)
+    for duration in (0.5, 0.001, 0.002, 0.003, 0.004):
+        stats.record(FanoutResult(recipients=1, delivered=1, duration=duration))
+    assert stats.broadcasts == 5
+    assert stats.percentile(50) == 0.003
+    assert stats.snapshot()["max_ms"] == 4.0
+
+def test_a_stalled_recipient_does_not_hold_up_the_others():
+    async def scenario():
+        engine, metrics = FanoutEngine(), OutboundMetrics()
+        sockets = {"a": FakeWebSocket(), "b": StalledWebSocket(), "c": FakeWebSocket()}
+        connections = {player_id: ClientConnection(player_id, websocket, metrics, send_timeout=0.1)
+                       for player_id, websocket in sockets.items()}
+        for connection in connections.values():
+            connection.start()
+        result = engine.fan_out(encode_frame({"type": "chat_message", "message": "hi"}), connections)
+        await settle(0.02)
+        delivered_early = result.delivered
+        await settle(0.15)
+        for connection in connections.values():
+            connection.stop()
+        return sockets, result, delivered_early, engine.stats
+
+    sockets, result, delivered_early, stats = asyncio.run(scenario())
+    assert delivered_early == 2
+    assert sockets["a"].of_type("chat_message") == sockets["c"].of_type("chat_message") == [{"type": "chat_message", "message": "hi"}]
+    assert result.timed_out == ["b"]
+    assert stats.timeouts == 1 and stats.broadcasts == 1
@@ -0,0 +1,36 @@
+import json
+
+from frames import FrameCache, conflation_key, encode_frame, encode_json
+
+def test_encode_json_splices_raw_fields():
+    text = encode_json({"type": "player_left", "player_id": "a"}, {"room_state": '{"players": {}}'})
+    assert json.loads(text) == {"type": "player_left", "player_id": "a", "room_state": {"players": {}}}
+    assert json.loads(encode_json({}, {"room_state": "1"})) == {"room_state": 1}
+
+def test_encode_frame_encodes_once_and_passes_frames_through():
+    frame = encode_frame({"type": "chat_message", "message": "hi"})
+    assert frame.payload == '{"type": "chat_message", "message": "hi"}'
+    assert frame.reliable and not frame.is_binary
+    assert encode_frame(frame) is frame
+
+def test_spliced_frames_stay_json_only():
+    assert encode_frame({"type": "room_state"}, {"room_state": "{}"}).message is None
+
+def test_frame_cache_rebuilds_only_when_the_version_moves():
+    cache, builds = FrameCache(), []
+
+    def build():
+        builds.append(1)
+        return {"players": len(builds)}
+
+    assert cache.get("main", 1, build) == ({"players": 1}, '{"players": 1}')
+    assert cache.get("main", 1, build)[1] == '{"players": 1}'
+    assert cache.get("main", 2, build)[1] == '{"players": 2}'
+    cache.discard("main")
+    cache.get("main", 2, build)
+    assert (cache.hits, cache.misses, len(builds)) == (1, 3, 3)
+
+def test_moves_are_conflated_per_player():
+    assert conflation_key({"type": "player_moved", "player_id": "a"}) == ("player_moved", "a")
+    assert conflation_key({"type": "player_banned", "player_id": "a"}) is None
+    assert not encode_frame({"type": "player_moved", "player_id": "a"}).reliable
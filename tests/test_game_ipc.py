@@ -0,0 +1,66 @@
+import asyncio
+import sys
+
+import pytest
+
+from game_ipc import ControlClient, ControlServer, GameControlError
+
+def run_with_server(ops, tmp_path, scenario):
+    async def main():
+        path = str(tmp_path / "game.sock")
+        server = ControlServer(ops)
+        await server.start(path)
+        client = ControlClient(path, timeout=1.0)
+        try:
+            return await scenario(client), server
+        finally:
+            await client.close()
+            await server.stop()
+    return asyncio.run(main())
+
+def test_calls_return_results_and_errors(tmp_path):
+    async def fail():
+        raise ValueError("no such room")
+
+    async def scenario(client):
+        results = [await client.call("echo", value=3)]
+        for op in ("fail", "missing"):
+            with pytest.raises(GameControlError) as raised:
+                await client.call(op)
+            results.append(str(raised.value))
+        return results
+
+    results, server = run_with_server({"echo": lambda value: {"value": value}, "fail": fail}, tmp_path, scenario)
+    assert results == [{"value": 3}, "no such room", "unknown op 'missing'"]
+    assert (server.calls, server.errors) == (3, 2)
+
+def test_a_slow_call_does_not_hold_up_the_calls_behind_it(tmp_path):
+    finished = []
+
+    async def slow():
+        await asyncio.sleep(0.3)
+        finished.append("slow")
+        return "slow"
+
+    def fast():
+        finished.append("fast")
+        return "fast"
+
+    async def scenario(client):
+        return await asyncio.gather(client.call("slow"), client.call("fast"))
+
+    results, _ = run_with_server({"slow": slow, "fast": fast}, tmp_path, scenario)
+    assert results == ["slow", "fast"]
+    assert finished == ["fast", "slow"]
+
+def test_unreachable_game_process_raises_a_control_error(tmp_path):
+    client = ControlClient(str(tmp_path / "nobody.sock"), timeout=0.5)
+    with pytest.raises(GameControlError):
+        asyncio.run(client.call("status"))
+
+def test_the_inline_bot_runs_game_servers_manager(game_server, monkeypatch):
+    pytest.importorskip("telegram")
+    monkeypatch.setattr(game_server, "game_manager", game_server.GameManager())
+    monkeypatch.delitem(sys.modules, "main", raising=False)  # import afresh against the patched manager
+    import main
+    assert main.game_control is None and main.game_manager is game_server.game_manager
@@ -0,0 +1,75 @@
+import asyncio
+
+from support import join, settle
+
+def test_player_left_state_no_longer_lists_the_leaver(game_server):
+    async def scenario():
+        manager = game_server.GameManager()
+        a = await join(manager, "a")
+        await join(manager, "b")
+        version = manager.rooms["main"].version
+        await manager.for_player("b", manager.remove_player, "b")
+        await settle()
+        return manager, a, version
+
+    manager, a, version = asyncio.run(scenario())
+    state = a.of_type("player_left")[-1]["room_state"]
+    assert list(state["players"]) == ["a"]
+    assert manager.rooms["main"].version > version
+    assert list(manager.get_room_state("main")["players"]) == ["a"]
+
+def test_last_player_leaving_stops_the_room_ticker(game_server):
+    async def scenario():
+        manager = game_server.GameManager()
+        await join(manager, "a")
+        manager.set_tick_rate("main", 10)
+        ticking = "main" in manager.tickers
+        await manager.for_player("a", manager.remove_player, "a")
+        return ticking, "main" in manager.tickers
+
+    assert asyncio.run(scenario()) == (True, False)
+
+def test_a_reconnect_survives_the_old_socket_closing(game_server):
+    async def scenario():
+        manager = game_server.GameManager()
+        old = await join(manager, "a")
+        new = await join(manager, "a")
+        # The old receive loop ends once its socket is closed, and removes with its own websocket
+        await manager.for_player("a", manager.remove_player, "a", old)
+        await manager.in_room("main", manager.broadcast_to_room, "main", {"type": "chat_message", "message": "hi"})
+        await settle()
+        return manager, old, new
+
+    manager, old, new = asyncio.run(scenario())
+    assert old.closed == (4011, "Connected elsewhere")
+    assert manager.connections["a"].websocket is new and "a" in manager.rooms["main"].players
+    assert new.of_type("chat_message") and not old.of_type("chat_message")
+
+def test_countdown_stops_once_the_room_cannot_start(game_server):
+    async def scenario():
+        manager = game_server.GameManager()
+        a = await join(manager, "a")
+        await join(manager, "b")
+        countdown = asyncio.create_task(manager.start_game_countdown("main", 3))
+        await settle()
+        await manager.for_player("b", manager.remove_player, "b")
+        await countdown
+        await settle()
+        return manager, a
+
+    manager, a = asyncio.run(scenario())
+    assert [message["seconds_left"] for message in a.of_type("game_countdown")] == [3]
+    assert not a.of_type("game_started") and not manager.rooms["main"].is_active
+
+def test_a_full_countdown_starts_the_round(game_server):
+    async def scenario():
+        manager = game_server.GameManager()
+        a = await join(manager, "a")
+        await join(manager, "b")
+        await manager.start_game_countdown("main", 1)
+        await settle()
+        return manager, a
+
+    manager, a = asyncio.run(scenario())
+    (started,) = a.of_type("game_started")
+    assert started["bastral_id"] == manager.rooms["main"].bastral_id and manager.rooms["main"].is_active
@@ -0,0 +1,57 @@
+import asyncio
+
+import pytest
+
+from heartbeat import HeartbeatMonitor, PeerClock, percentiles
+
+def monitor(max_misses: int = 2):
+    sent, timed_out = [], []
+
+    async def send(player_id, message):
+        sent.append((player_id, message))
+
+    async def on_timeout(player_id):
+        timed_out.append(player_id)
+
+    return HeartbeatMonitor(send, on_timeout, interval=0, max_misses=max_misses), sent, timed_out
+
+def test_rtt_is_smoothed_like_tcp():
+    peer = PeerClock()
+    peer.sample(0.1)
+    assert (peer.srtt, peer.rttvar) == (0.1, 0.05)
+    peer.sample(0.2)
+    assert peer.srtt == pytest.approx(0.1125)
+    assert peer.rttvar == pytest.approx(0.0625)
+
+def test_silent_connections_time_out_after_max_misses():
+    heartbeat, sent, timed_out = monitor(max_misses=2)
+    heartbeat.track("quiet")
+    heartbeat.track("chatty")
+
+    async def scenario():
+        for _ in range(3):
+            await heartbeat.beat()
+            heartbeat.pong("chatty", sent[-1][1]["id"])
+
+    asyncio.run(scenario())
+    assert timed_out == ["quiet"] and heartbeat.timeouts == 1
+    assert "quiet" not in heartbeat.peers
+    assert heartbeat.rtt("chatty") is not None
+
+def test_a_pong_clears_the_pings_before_it():
+    heartbeat, sent, _ = monitor(max_misses=3)
+    heartbeat.track("a")
+
+    async def scenario():
+        await heartbeat.beat()
+        await heartbeat.beat()
+
+    asyncio.run(scenario())
+    assert heartbeat.pong("a", 2) is not None
+    assert heartbeat.peers["a"].outstanding == {}
+    assert heartbeat.pong("a", 1) is None
+    assert heartbeat.pong("nobody", 1) is None
+
+def test_percentiles_in_milliseconds():
+    assert percentiles([]) == {"players": 0, "p50_ms": 0.0, "p95_ms": 0.0, "max_ms": 0.0}
+    assert percentiles([0.3, 0.01, 0.05]) == {"players": 3, "p50_ms": 50.0, "p95_ms": 300.0, "max_ms": 300.0}
@@ -0,0 +1,36 @@
+import pytest
+
+from history import PositionHistory, rewound_distance, view_time
+
+def test_positions_interpolate_between_samples():
+    history = PositionHistory()
+    assert history.at(1.0) is None
+    history.record(1.0, 0.0, 0.0, 0.0)
+    history.record(2.0, 10.0, 0.0, 0.0)
+    assert history.at(1.5) == (5.0, 0.0, 0.0)
+    assert history.at(0.0) == (0.0, 0.0, 0.0)
+    assert history.at(9.0) == (10.0, 0.0, 0.0)
+
+def test_ring_buffer_keeps_the_newest_samples_in_order():
+    history = PositionHistory(capacity=3)
+    for t in range(5):
+        history.record(float(t), float(t), 0.0, 0.0)
+    history.record(3.5, 99.0, 0.0, 0.0)  # the clock stepped back; kept at the latest time
+    assert history.size == 3
+    assert history.at(0.0) == (3.0, 0.0, 0.0)
+    assert history.at(4.0) == (99.0, 0.0, 0.0)
+
+def test_view_time_rewinds_half_the_rtt_within_bounds():
+    assert view_time(10.0, 0.2, max_rewind=0.3) == pytest.approx(9.9)
+    assert view_time(10.0, 2.0, max_rewind=0.3) == pytest.approx(9.7)
+    assert view_time(10.0, -1.0) == 10.0
+
+def test_a_target_that_just_ran_off_is_judged_where_the_attacker_saw_it():
+    attacker, target = PositionHistory(), PositionHistory()
+    attacker.record(0.0, 0.0, 0.0, 0.0)
+    target.record(0.0, 1.0, 0.0, 0.0)
+    target.record(10.0, 2.0, 0.0, 0.0)
+    target.record(10.2, 8.0, 0.0, 0.0)
+    distance = rewound_distance(attacker, target, 10.2, 0.4, (0.0, 0.0, 0.0), (8.0, 0.0, 0.0))
+    assert distance == pytest.approx(2.0)
+    assert rewound_distance(None, None, 10.2, 0.4, (0.0, 0.0, 0.0), (8.0, 0.0, 0.0)) == 8.0
@@ -0,0 +1,52 @@
+import asyncio
+
+import pytest
+
+from codec import BINARY_CODEC, JSON_CODEC, encode_position_update
+from inbound import CHAT_MAX_LENGTH, WS_MAX_FRAME, InboundRouter, InvalidMessage, LatencyHistogram, decode_message
+
+@pytest.mark.parametrize("text, reason", [
+    ("x" * (WS_MAX_FRAME + 1), "frame too large"),
+    ("{not json", "undecodable frame"),
+    ("[1, 2]", "expected an object"),
+    ('{"type": "teleport"}', "unknown message type"),
+    ('{"type": "pong"}', "expected a finite number"),
+    ('{"type": "position_update", "data": {"x": NaN}}', "expected a finite number"),
+    ('{"type": "position_update", "data": {"x": true}}', "expected a finite number"),
+    ('{"type": "chat_message", "message": 5}', f"expected a string of at most {CHAT_MAX_LENGTH} characters"),
+    ('{"type": "position_update", "data": {"animation_state": "' + "w" * 17 + '"}}', "expected a string of at most 16 characters"),
+])
+def test_garbage_is_rejected(text, reason):
+    with pytest.raises(InvalidMessage) as raised:
+        decode_message(JSON_CODEC, text, None)
+    assert raised.value.reason == reason
+
+def test_valid_frames_decode_in_either_codec():
+    assert decode_message(JSON_CODEC, '{"type": "pong", "id": 4}', None) == {"type": "pong", "id": 4}
+    message = decode_message(BINARY_CODEC, None, encode_position_update(1.0, 2.0, 3.0, 0.0, "walking"))
+    assert message["type"] == "position_update" and message["data"]["animation_state"] == "walking"
+
+def test_router_dispatches_by_type_and_times_handlers():
+    router, seen = InboundRouter(), []
+
+    @router.handler("pong")
+    async def on_pong(player_id, message):
+        seen.append((player_id, message["id"]))
+
+    asyncio.run(router.dispatch("a", {"type": "pong", "id": 1}))
+    asyncio.run(router.dispatch("a", {"type": "start_game"}))  # no handler registered
+    router.reject("a", InvalidMessage("frame too large"))
+    snapshot = router.snapshot()
+    assert seen == [("a", 1)]
+    assert snapshot["handlers"]["pong"]["count"] == 1
+    assert snapshot["rejected"] == {"frame too large": 1}
+    with pytest.raises(ValueError):
+        router.handler("teleport")
+
+def test_latency_histogram_quantiles():
+    histogram = LatencyHistogram()
+    for duration_ms in (0.03, 0.07, 0.2, 0.2, 300.0):
+        histogram.record(duration_ms)
+    assert histogram.quantile(0.5) == 0.25
+    assert histogram.quantile(1.0) == 300.0
+    assert histogram.snapshot()["buckets"]["inf"] == 1
@@ -0,0 +1,37 @@
+from interest import InterestManager
+from spatial import SpatialGrid
+
+def place(grid: SpatialGrid, **players):
+    for player_id, x in players.items():
+        grid.update(player_id, x, 1.0, 0.0)
+
+def test_entering_and_leaving_view_is_symmetric():
+    grid, interest = SpatialGrid(), InterestManager(view_radius=30, near_radius=10, far_every=2)
+    place(grid, a=0.0, b=5.0, c=100.0)
+    first = interest.update(grid, "a")
+    assert first.entered == ["b"] and first.near == [] and first.far == []
+    assert interest.observers("b") == {"a"}
+
+    place(grid, a=80.0)
+    moved = interest.update(grid, "a")
+    assert sorted(moved.entered) == ["c"] and moved.left == ["b"]
+    assert interest.observers("b") == set() and interest.observers("c") == {"a"}
+
+def test_near_observers_get_every_move_and_far_ones_every_nth():
+    grid, interest = SpatialGrid(), InterestManager(view_radius=30, near_radius=10, far_every=2)
+    place(grid, a=0.0, near=5.0, far=20.0, out=50.0)
+    interest.update(grid, "a")
+    turns = []
+    for _ in range(4):
+        update = interest.update(grid, "a")
+        assert update.near == ["near"] and update.far == ["far"]
+        turns.append(update.far_turn)
+    assert turns == [True, False, True, False]
+
+def test_removed_players_drop_out_of_every_neighbourhood():
+    grid, interest = SpatialGrid(), InterestManager(view_radius=30)
+    place(grid, a=0.0, b=5.0)
+    interest.update(grid, "a")
+    interest.remove("b")
+    assert interest.observers("a") == set()
+    assert "b" not in interest.neighbors
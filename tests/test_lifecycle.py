@@ -0,0 +1,131 @@
+import asyncio
+import os
+
+from lifecycle import CLOSE_IDLE_TIMEOUT, RoomLifecycle, RoomVault
+
+from support import join
+
+class Seat:
+    def __init__(self, last_updated: float, is_spectator: bool = False):
+        self.last_updated = last_updated
+        self.is_spectator = is_spectator
+
+class Room:
+    def __init__(self, **players):
+        self.players = players
+
+def test_vault_round_trip_removes_the_file(tmp_path):
+    vault = RoomVault(str(tmp_path))
+    vault.save("room/../x", {"id": "room/../x", "version": 3})
+    assert os.listdir(tmp_path) == ["room/../x".encode().hex() + ".json"]
+    assert vault.load("room/../x") == {"id": "room/../x", "version": 3}
+    assert vault.load("room/../x") is None
+    assert os.listdir(tmp_path) == []
+
+def test_vault_discards_unreadable_rooms(tmp_path):
+    vault = RoomVault(str(tmp_path))
+    with open(vault._path("main"), "w") as f:
+        f.write("{not json")
+    assert vault.load("main") is None
+    assert os.listdir(tmp_path) == []
+
+def test_sweep_disconnects_idle_seated_players_only():
+    idle = []
+
+    async def on_idle(player_id):
+        idle.append(player_id)
+
+    async def on_empty(room_id):
+        raise AssertionError("no room is empty")
+
+    rooms = {"main": Room(a=Seat(0.0), b=Seat(0.0, is_spectator=True), c=Seat(250.0))}
+    lifecycle = RoomLifecycle(rooms, on_idle, on_empty, interval=0, idle_timeout=300)
+    asyncio.run(lifecycle.sweep(now=300.0))
+    assert idle == ["a"]
+    assert lifecycle.idle_disconnects == 1
+
+def test_sweep_retires_rooms_empty_for_the_timeout():
+    retired = []
+
+    async def on_idle(player_id):
+        pass
+
+    async def on_empty(room_id):
+        retired.append(room_id)
+        del rooms[room_id]
+
+    rooms = {"quiet": Room(), "busy": Room(a=Seat(100.0))}
+    lifecycle = RoomLifecycle(rooms, on_idle, on_empty, interval=0, empty_timeout=60, idle_timeout=0)
+    asyncio.run(lifecycle.sweep(now=100.0))
+    asyncio.run(lifecycle.sweep(now=159.0))
+    assert retired == []
+    asyncio.run(lifecycle.sweep(now=160.0))
+    assert retired == ["quiet"]
+    assert lifecycle.snapshot()["reaped"] == 1 and lifecycle.empty_since == {}
+
+def test_emptied_active_room_wakes_with_no_round_in_progress(game_server):
+    async def scenario():
+        manager = game_server.GameManager()
+        await join(manager, "a", "arena")
+        await join(manager, "b", "arena")
+        room = manager.rooms["arena"]
+        room.is_active, room.bastral_id = True, "a"
+        await manager.in_room("arena", manager.handle_chat_message, "b", "gg")
+        for player_id in ("a", "b"):
+            await manager.for_player(player_id, manager.remove_player, player_id)
+        emptied = (room.is_active, room.bastral_id)
+        await manager._retire_room("arena")
+        hibernated = "arena" not in manager.rooms
+        await join(manager, "c", "arena")
+        woken = manager.rooms["arena"]
+        return manager, emptied, hibernated, woken
+
+    manager, emptied, hibernated, woken = asyncio.run(scenario())
+    assert emptied == (False, None)
+    assert hibernated and manager.lifecycle.rehydrated == 1
+    assert (woken.is_active, woken.bastral_id) == (False, None)
+    assert [message["message"] for message in woken.chat_messages.page()] == ["gg"]
+
+def test_active_room_without_chat_is_not_hibernated(game_server):
+    async def scenario():
+        manager = game_server.GameManager()
+        await join(manager, "a", "lobby")
+        manager.rooms["lobby"].is_active = True
+        await manager.for_player("a", manager.remove_player, "a")
+        await manager._retire_room("lobby")
+        return manager
+
+    manager = asyncio.run(scenario())
+    assert "lobby" not in manager.rooms
+    assert manager.lifecycle.hibernated == 0
+    assert manager.vault.load("lobby") is None
+
+def test_idle_players_are_closed_and_unseated_through_the_manager(game_server):
+    async def scenario():
+        manager = game_server.GameManager()
+        a = await join(manager, "a")
+        await join(manager, "b")
+        manager.rooms["main"].players["a"].last_updated = 0.0
+        manager.rooms["main"].players["b"].last_updated = 1000.0
+        manager.lifecycle.idle_timeout = 300
+        await manager.lifecycle.sweep(now=1000.0)
+        return manager, a
+
+    manager, a = asyncio.run(scenario())
+    assert a.closed == (CLOSE_IDLE_TIMEOUT, "Idle timeout")
+    assert list(manager.rooms["main"].players) == ["b"] and "a" not in manager.matchmaker.room_of
+    assert manager.lifecycle.idle_disconnects == 1
+
+def test_retired_rooms_release_their_actor_and_caches(game_server):
+    async def scenario():
+        manager = game_server.GameManager()
+        await join(manager, "a", "quiet")
+        manager.set_tick_rate("quiet", 10)
+        await manager.for_player("a", manager.remove_player, "a")
+        await manager._retire_room("quiet")
+        return manager
+
+    manager = asyncio.run(scenario())
+    assert "quiet" not in manager.rooms and "quiet" not in manager.actors
+    assert "quiet" not in manager.state_history and "quiet" not in manager.tickers
+    assert manager.lifecycle.hibernated == 0
@@ -0,0 +1,45 @@
+from matchmaking import Matchmaker
+
+def test_players_fill_rooms_before_new_ones_open():
+    matchmaker = Matchmaker(capacity=2)
+    assert [matchmaker.assign(player_id) for player_id in "abcde"] == ["main", "main", "room-2", "room-2", "room-3"]
+    matchmaker.leave("c")
+    matchmaker.leave("d")
+    assert matchmaker.assign("f") == "room-3"  # fullest open room first
+    assert matchmaker.assign("g") == "room-2"  # freed numbers are reused
+
+def test_rooms_in_the_lobby_come_before_busy_ones():
+    matchmaker = Matchmaker(capacity=2)
+    for player_id in "abc":
+        matchmaker.assign(player_id)
+    matchmaker.leave("b")
+    assert matchmaker.assign("d", busy=["main"]) == "room-2"
+    assert matchmaker.assign("e") == "main"
+
+def test_requested_rooms_must_exist_and_have_space():
+    matchmaker = Matchmaker(capacity=1)
+    matchmaker.assign("a")
+    assert matchmaker.assign("b", "nowhere") == "room-2"
+    assert matchmaker.assign("c", "main") == "room-3"
+    assert matchmaker.assign("s", "main", spectate=True) == "main"
+    assert matchmaker.assign("a") == "main"  # returning players keep their seat
+
+def test_a_shard_only_opens_rooms_it_owns():
+    # Stands in for an arc of the shard ring: the odd-numbered rooms
+    matchmaker = Matchmaker(capacity=1, owns=lambda room_id: room_id[-1] in "13579")
+    assert matchmaker.assign("a") == "room-3"
+    assert matchmaker.assign("b") == "room-5"
+    assert matchmaker.assign("c", "room-5") == "room-7"  # owned but full
+    assert Matchmaker(owns=lambda room_id: room_id == "arena").assign("d", "arena") == "arena"
+
+def test_listing_counts_seats_and_spectators():
+    matchmaker = Matchmaker(capacity=2)
+    matchmaker.assign("a")
+    matchmaker.assign("s", "main", spectate=True)
+    version = matchmaker.version
+    listing = matchmaker.listing(active=["main"])
+    assert listing == {"capacity": 2, "rooms": [
+        {"id": "main", "players": 1, "spectators": 1, "is_active": True, "open": True}
+    ]}
+    matchmaker.leave("s")
+    assert matchmaker.version == version + 1
@@ -0,0 +1,94 @@
+import asyncio
+
+from frames import encode_frame
+from outbound import CLOSE_SLOW_CONSUMER, ClientConnection, OutboundMetrics
+
+from support import FakeWebSocket, settle
+
+class BlockedWebSocket(FakeWebSocket):
+    """A client that stops reading until released"""
+
+    def __init__(self):
+        super().__init__()
+        self.released = asyncio.Event()
+
+    async def send_text(self, text: str):
+        await self.released.wait()
+        await super().send_text(text)
+
+def chat(n: int):
+    return encode_frame({"type": "chat_message", "message": str(n)})
+
+def test_frames_are_written_in_order():
+    async def scenario():
+        websocket, metrics = FakeWebSocket(), OutboundMetrics()
+        connection = ClientConnection("a", websocket, metrics)
+        connection.start()
+        for n in range(3):
+            assert connection.enqueue(chat(n))
+        await settle()
+        connection.stop()
+        return websocket, metrics
+
+    websocket, metrics = asyncio.run(scenario())
+    assert [message["message"] for message in websocket.sent] == ["0", "1", "2"]
+    assert (metrics.enqueued, metrics.sent) == (3, 3)
+
+def test_a_client_past_its_backlog_is_evicted():
+    async def scenario():
+        websocket, metrics = BlockedWebSocket(), OutboundMetrics()
+        connection = ClientConnection("a", websocket, metrics, max_backlog=3)
+        connection.start()
+        accepted = [connection.enqueue(chat(n)) for n in range(5)]
+        await settle()
+        return websocket, metrics, connection, accepted
+
+    websocket, metrics, connection, accepted = asyncio.run(scenario())
+    assert accepted == [True, True, True, False, False]
+    assert connection.closed and connection.backlog == 0
+    assert websocket.closed == (CLOSE_SLOW_CONSUMER, "Outbound backlog exceeded")
+    assert metrics.slow_consumer_evictions == 1
+
+def test_a_send_past_its_deadline_evicts_the_client():
+    async def scenario():
+        websocket = BlockedWebSocket()
+        connection = ClientConnection("a", websocket, OutboundMetrics(), send_timeout=0.05)
+        connection.start()
+        connection.enqueue(chat(0))
+        await settle(0.1)
+        return websocket, connection
+
+    websocket, connection = asyncio.run(scenario())
+    assert connection.closed
+    assert websocket.closed[0] == CLOSE_SLOW_CONSUMER
+
+def test_stopped_connections_refuse_frames():
+    async def scenario():
+        connection = ClientConnection("a", FakeWebSocket(), OutboundMetrics())
+        connection.start()
+        connection.stop()
+        return connection.enqueue(chat(0))
+
+    assert asyncio.run(scenario()) is False
+
+def move(player_id: str, x: float):
+    return encode_frame({"type": "player_moved", "player_id": player_id, "position": {"x": x}})
+
+def test_a_newer_move_replaces_the_unsent_one_behind_reliable_frames():
+    async def scenario():
+        websocket, metrics = BlockedWebSocket(), OutboundMetrics()
+        connection = ClientConnection("me", websocket, metrics)
+        connection.start()
+        for frame in (move("a", 1), chat(0), move("b", 1), move("a", 2), chat(1)):
+            connection.enqueue(frame)
+        backlog = connection.backlog
+        websocket.released.set()
+        await settle()
+        connection.stop()
+        return websocket, metrics, backlog
+
+    websocket, metrics, backlog = asyncio.run(scenario())
+    sent = [(message["type"], message.get("player_id"), message.get("position", {}).get("x")) for message in websocket.sent]
+    assert backlog == 4
+    assert sent == [("chat_message", None, None), ("player_moved", "b", 1), ("player_moved", "a", 2), ("chat_message", None, None)]
+    assert metrics.superseded == 1
@@ -0,0 +1,51 @@
+import pytest
+
+from frames import encode_frame
+from pacing import UpdatePacer
+
+def move(player_id: str, x: float):
+    return encode_frame({"type": "player_moved", "player_id": player_id, "position": {"x": x}})
+
+def snapshot(tick: int, **players):
+    return encode_frame({"type": "room_snapshot", "tick": tick, "players": players})
+
+def test_only_movement_is_paced():
+    assert UpdatePacer.paces(move("a", 1))
+    assert UpdatePacer.paces(snapshot(1))
+    assert not UpdatePacer.paces(encode_frame({"type": "chat_message", "message": "hi"}))
+
+def test_moves_between_releases_keep_only_the_newest_per_player():
+    pacer = UpdatePacer(max_rate=10)
+    assert pacer.admit(move("a", 1), 0, 0, now=0.0) is not None
+    for x in (2, 3):
+        assert pacer.admit(move("a", x), 0, 0, now=0.01) is None
+    pacer.admit(move("b", 1), 0, 0, now=0.02)
+    released = pacer.release(now=0.1)
+    assert [frame.message["position"]["x"] for frame in released] == [3, 1]
+    assert pacer.coalesced == 1 and pacer.next_due == pytest.approx(0.2)
+
+def test_held_snapshots_merge_into_one():
+    pacer = UpdatePacer(max_rate=10)
+    pacer.admit(snapshot(1, a={"x": 0}), 0, 0, now=0.0)
+    pacer.admit(snapshot(2, a={"x": 1}), 0, 0, now=0.01)
+    pacer.admit(snapshot(3, b={"x": 5}), 0, 0, now=0.02)
+    (merged,) = pacer.release(now=0.1)
+    assert merged.message == {"type": "room_snapshot", "tick": 3, "players": {"a": {"x": 1}, "b": {"x": 5}}}
+
+def test_rate_halves_under_congestion_and_recovers_additively():
+    pacer = UpdatePacer(max_rate=30, min_rate=2, backlog_target=8)
+    pacer.adjust(backlog=20, superseded=0, now=1.0)
+    pacer.adjust(backlog=0, superseded=4, now=1.5)
+    assert pacer.rate == 7.5 and pacer.decreases == 2
+    pacer.adjust(backlog=0, superseded=4, now=2.0)
+    assert pacer.rate == 10.5
+    pacer.adjust(backlog=20, superseded=4, now=2.1)  # too soon for another decision
+    assert pacer.rate == 10.5
+
+def test_rtt_caps_the_rate():
+    pacer = UpdatePacer(max_rate=30, min_rate=2, rtt_target=0.15)
+    pacer.rtt = 0.3
+    pacer.adjust(backlog=0, superseded=0, now=1.0)
+    assert pacer.rate == 15.0
+    pacer.rtt = 10.0
+    assert pacer.ceiling() == 2
@@ -0,0 +1,43 @@
+from dataclasses import asdict
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from player_store import CompactPlayerStore, players_to_dict, to_dict
+
+def make_player(game_server, player_id: str, x: float = 0.0, **flags):
+    position = game_server.PlayerPosition(x=x, y=1.0, z=0.0, rotation_y=0.0)
+    return game_server.Player(id=player_id, username=player_id.upper(), wallet_address="", position=position, **flags)
+
+def test_compact_store_snapshots_like_the_dataclasses(game_server):
+    players = {player_id: make_player(game_server, player_id, x) for player_id, x in (("a", 1.0), ("b", 2.0))}
+    players["b"].is_bastral = True
+    store = CompactPlayerStore(capacity=1)
+    for player_id, player in players.items():
+        store[player_id] = player
+    assert store.capacity == 2
+    assert players_to_dict(store) == {player_id: asdict(player) for player_id, player in players.items()}
+
+def test_views_write_through_to_the_arrays(game_server):
+    store = CompactPlayerStore()
+    store["a"] = make_player(game_server, "a")
+    view = store["a"]
+    view.position.x = 7.5
+    view.is_banned = True
+    view.animation_state = "walking"
+    assert to_dict(view)["position"]["x"] == 7.5
+    assert to_dict(view)["is_banned"] and to_dict(view)["animation_state"] == "walking"
+    assert to_dict(view.position) == {"x": 7.5, "y": 1.0, "z": 0.0, "rotation_y": 0.0}
+
+def test_freed_and_grown_slots_start_empty(game_server):
+    store = CompactPlayerStore(capacity=2)
+    store["a"] = make_player(game_server, "a", 5.0, is_banned=True)
+    store["b"] = make_player(game_server, "b", 6.0)
+    del store["b"]
+    store["c"] = make_player(game_server, "c", 7.0)
+    store["d"] = make_player(game_server, "d", 8.0)
+    assert store.capacity == 4
+    assert store.positions[2:].tolist() == [[8.0, 1.0, 0.0], [0.0, 0.0, 0.0]]
+    assert store.flags.tolist() == [1, 0, 0, 0] and store.occupied.tolist() == [True, True, True, False]
+    assert list(store) == ["a", "c", "d"] and "b" not in store
@@ -0,0 +1,91 @@
+from fastapi.testclient import TestClient
+
+from ratelimit import ANY_MESSAGE, RateLimiter, TokenBucket, parse_limits
+
+LIMITS = parse_limits("*=60/120,position_update=30/45,chat_message=0.5/5,pong=1/5,start_game=0.5/3")
+
+def flood_moves(limiter: RateLimiter, player_id: str, frames: int):
+    return [limiter.allow(player_id, "position_update") for _ in range(frames)]
+
+def test_parse_limits_skips_malformed_entries():
+    assert parse_limits("a=2/4, b=3,bogus") == {"a": (2.0, 4.0), "b": (3.0, 3.0)}
+
+def test_token_bucket_refills_at_its_rate():
+    bucket = TokenBucket(2, 2)
+    bucket.updated = 0.0
+    assert [bucket.allow(0.0) for _ in range(3)] == [True, True, False]
+    assert bucket.retry_after() == 0.5
+    assert bucket.allow(0.5)
+
+def test_dropped_moves_do_not_drain_the_shared_bucket():
+    limiter = RateLimiter(LIMITS)
+    # One second of a 144 fps client sending a move every frame
+    sent = flood_moves(limiter, "a", 144)
+    assert sent.count(True) == 45
+    assert 120 - 45 <= limiter.bucket("a", ANY_MESSAGE).tokens < 120 - 44
+    assert limiter.allow("a", "sync_state")
+
+def test_control_messages_get_through_a_drained_shared_bucket():
+    limiter = RateLimiter({**LIMITS, "*": (1, 1)})
+    flood_moves(limiter, "a", 144)
+    assert not limiter.allow("a", "sync_state")
+    assert limiter.allow("a", "pong")
+    assert limiter.allow("a", "chat_message")
+    assert limiter.allow("a", "start_game")
+
+def test_control_messages_are_bounded_by_their_own_buckets():
+    limiter = RateLimiter(LIMITS)
+    assert [limiter.allow("a", "pong") for _ in range(6)].count(True) == 5
+
+def test_one_notice_per_throttled_stretch():
+    limiter = RateLimiter(LIMITS)
+    for _ in range(5):
+        limiter.allow("a", "chat_message")
+    assert not limiter.allow("a", "chat_message")
+    notice = limiter.notice("a", "chat_message")
+    assert notice["type"] == "rate_limited" and notice["message_type"] == "chat_message"
+    assert notice["retry_after"] > 0
+    assert limiter.notice("a", "chat_message") is None
+    limiter.bucket("a", "chat_message").tokens = 1
+    assert limiter.allow("a", "chat_message")
+    assert limiter.notice("a", "chat_message") is not None
+
+def test_snapshot_counts_drops_per_message_type():
+    limiter = RateLimiter(LIMITS)
+    flood_moves(limiter, "a", 50)
+    snapshot = limiter.snapshot()
+    assert snapshot["allowed"] == {"position_update": 45}
+    assert snapshot["dropped"] == {"position_update": 5}
+    limiter.forget("a")
+    assert "a" not in limiter.buckets
+
+def test_frames_are_charged_before_decoding():
+    limiter = RateLimiter({**LIMITS, "frame": (100, 200)})
+    assert [limiter.allow_frame("a") for _ in range(201)].count(True) == 200
+    assert limiter.snapshot()["dropped"] == {"frame": 1}
+    assert RateLimiter({}).allow_frame("a")
+
+def test_a_message_the_shared_bucket_rejects_keeps_its_type_token():
+    limiter = RateLimiter({**LIMITS, "*": (0, 1)})
+    assert limiter.allow("a", "sync_state")
+    before = limiter.bucket("a", "position_update").tokens
+    assert not limiter.allow("a", "position_update")
+    assert before <= limiter.bucket("a", "position_update").tokens < before + 1
+
+def test_dropped_moves_get_no_notice():
+    limiter = RateLimiter(LIMITS)
+    flood_moves(limiter, "a", 50)
+    assert limiter.notice("a", "position_update") is None
+
+def test_garbage_frames_stop_costing_decodes_once_the_frame_bucket_is_empty(game_server, monkeypatch):
+    manager = game_server.GameManager()
+    manager.rate_limiter = RateLimiter({"frame": (0, 5)})
+    monkeypatch.setattr(game_server, "game_manager", manager)
+    monkeypatch.setattr(game_server.inbound, "rejected", {})
+    with TestClient(game_server.app).websocket_connect("/ws/flooder") as websocket:
+        while websocket.receive_json()["type"] != "room_joined":
+            pass
+        for _ in range(10):
+            websocket.send_text("{not json")
+    assert sum(game_server.inbound.rejected.values()) == 5
+    assert manager.rate_limiter.dropped == {"frame": 5}
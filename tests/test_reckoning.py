@@ -0,0 +1,114 @@
+import asyncio
+
+import pytest
+
+from history import PositionHistory
+from interest import InterestManager
+from reckoning import STILL, DeadReckoner, velocity
+
+from support import join, settle
+
+def walk(history: PositionHistory, until: float, speed: float = 2.0, step: float = 1 / 30):
+    """Samples of a player walking along x from t=0 at `speed` m/s"""
+    t = 0.0
+    while t <= until + 1e-9:
+        history.record(t, speed * t, 1.0, 0.0)
+        t += step
+    return speed * (t - step)
+
+def test_velocity_averages_over_the_window():
+    history = PositionHistory()
+    walk(history, 1.0)
+    assert velocity(history, 1.0)[0] == pytest.approx(2.0)
+    assert velocity(None, 1.0) == STILL
+
+def test_velocity_ignores_jitter_and_teleports():
+    history = PositionHistory()
+    history.record(0.0, 0.0, 1.0, 0.0)
+    history.record(1.0, 0.001, 1.0, 0.0)
+    assert velocity(history, 1.0) == STILL
+    history.record(1.1, 50.0, 1.0, 0.0)
+    assert velocity(history, 1.1) == STILL
+
+def test_steady_walk_is_suppressed_until_the_refresh():
+    reckoner = DeadReckoner()
+    assert reckoner.needs_update(0.0, (0.0, 1.0, 0.0), 0.0, "walking", (2.0, 0.0, 0.0))
+    assert not reckoner.needs_update(0.5, (1.0, 1.0, 0.0), 0.0, "walking", (2.0, 0.0, 0.0))
+    assert reckoner.needs_update(1.0, (2.0, 1.0, 0.0), 0.0, "walking", (2.0, 0.0, 0.0))
+    assert (reckoner.sent, reckoner.suppressed) == (2, 1)
+
+def test_stopping_sends_zero_velocity():
+    history = PositionHistory()
+    reckoner = DeadReckoner()
+    x = walk(history, 0.5)
+    reckoner.needs_update(0.5, (x, 1.0, 0.0), 0.0, "walking", velocity(history, 0.5))
+    # The client's resting update arrives while the history window still holds the last steps
+    history.record(0.52, x, 1.0, 0.0)
+    assert velocity(history, 0.52) != STILL
+    assert reckoner.needs_update(0.52, (x, 1.0, 0.0), 0.0, "idle", velocity(history, 0.52))
+    assert reckoner.velocity == STILL
+    assert reckoner.velocity_dict() == {"x": 0.0, "y": 0.0, "z": 0.0}
+
+def test_velocity_dropping_to_zero_is_sent_even_without_a_new_animation():
+    reckoner = DeadReckoner()
+    reckoner.needs_update(0.0, (0.0, 20.0, 0.0), 0.0, "climbing", (0.0, 2.0, 0.0))
+    assert reckoner.needs_update(0.05, (0.0, 20.0, 0.0), 0.0, "climbing", STILL)
+    assert reckoner.velocity == STILL
+
+def test_observers_are_told_when_a_player_stops(game_server):
+    async def scenario():
+        manager = game_server.GameManager()
+        await join(manager, "a")
+        b = await join(manager, "b")
+        spawn = manager.rooms["main"].players["a"].position
+        x, y, z = spawn.x, spawn.y, spawn.z
+        for _ in range(8):
+            x += 0.06  # 2 m/s at 30 updates a second
+            await manager.in_room("main", manager.update_player_position, "a",
+                                  {"x": x, "y": y, "z": z, "animation_state": "walking"})
+            await asyncio.sleep(1 / 30)
+        await manager.in_room("main", manager.update_player_position, "a",
+                              {"x": x, "y": y, "z": z, "animation_state": "idle"})
+        await settle()
+        return b
+
+    b = asyncio.run(scenario())
+    moves = b.of_type("player_moved")
+    assert any(move["velocity"]["x"] > 0 for move in moves)
+    last = moves[-1]
+    assert last["animation_state"] == "idle"
+    assert last["velocity"] == {"x": 0.0, "y": 0.0, "z": 0.0}
+
+async def walk_then_stop(manager, tick_rate: float = 0.0):
+    """a walks far from b under area-of-interest filtering, then stops; returns b's socket and a's stop check"""
+    await join(manager, "a")
+    b = await join(manager, "b")
+    room = manager.rooms["main"]
+    room.interest = InterestManager(view_radius=50, near_radius=2, far_every=1000)
+    room.tick_rate = tick_rate
+    await manager.in_room("main", manager.update_player_position, "b", {"x": 20.0, "y": 1.0, "z": 0.0})
+    x = 0.0
+    for _ in range(8):
+        x += 0.06
+        await manager.in_room("main", manager.update_player_position, "a",
+                              {"x": x, "y": 1.0, "z": 0.0, "animation_state": "walking"})
+        await asyncio.sleep(1 / 30)
+    await manager.in_room("main", manager.flush_room_snapshot, "main", 1)
+    stop = {"x": x, "y": 1.0, "z": 0.0, "animation_state": "idle"}
+    exempt = manager.stops_moving("a", stop), manager.stops_moving("a", {**stop, "animation_state": "walking"})
+    await manager.in_room("main", manager.update_player_position, "a", stop)
+    await manager.in_room("main", manager.flush_room_snapshot, "main", 2)
+    await settle()
+    return b, exempt + (manager.stops_moving("a", stop),)
+
+def test_far_observers_skip_steps_but_get_the_stop(game_server):
+    b, exempt = asyncio.run(walk_then_stop(game_server.GameManager()))
+    (stop,) = b.of_type("player_moved")
+    assert stop["player_id"] == "a" and stop["velocity"] == {"x": 0.0, "y": 0.0, "z": 0.0}
+    # Only a stop from a player the server sees moving skips the rate limiter
+    assert exempt == (True, False, False)
+
+def test_far_observers_get_the_stop_in_tick_snapshots(game_server):
+    b, _ = asyncio.run(walk_then_stop(game_server.GameManager(), tick_rate=10))
+    (snapshot,) = b.of_type("room_snapshot")
+    assert snapshot["tick"] == 2 and snapshot["players"]["a"]["velocity"] == {"x": 0.0, "y": 0.0, "z": 0.0}
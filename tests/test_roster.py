@@ -0,0 +1,35 @@
+import random
+
+from roster import BAN, JOIN, LEAVE, REVIVE, AliveSet
+
+def test_removal_keeps_the_index_consistent():
+    alive = AliveSet()
+    for player_id in "abcd":
+        alive.join(player_id)
+    alive.ban("b")
+    alive.leave("a")
+    alive.spectate("z")
+    assert sorted(alive) == ["c", "d"]
+    assert all(alive.members[position] == player_id for player_id, position in alive.index.items())
+
+def test_hooks_see_every_roster_event():
+    alive, events = AliveSet(), []
+    alive.hooks.append(lambda event, player_id: events.append((event, player_id)))
+    alive.join("a")
+    alive.join("s", alive=False)
+    alive.ban("a")
+    alive.revive("a")
+    alive.leave("a")
+    assert events == [(JOIN, "a"), (JOIN, "s"), (BAN, "a"), (REVIVE, "a"), (LEAVE, "a")]
+    assert len(alive) == 0
+
+def test_choice_and_last_player_standing():
+    alive = AliveSet()
+    assert alive.choice() is None and alive.only() is None
+    alive.join("a")
+    alive.join("b")
+    picks = {alive.choice(random.Random(seed)) for seed in range(20)}
+    assert picks == {"a", "b"}
+    assert alive.only() is None
+    alive.ban("b")
+    assert alive.only() == "a"
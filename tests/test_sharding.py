@@ -0,0 +1,79 @@
+import json
+import socket
+import threading
+import time
+
+import pytest
+import uvicorn
+from fastapi.testclient import TestClient
+
+import sharding
+from sharding import HashRing, local_ownership, stable_hash
+
+ROOMS = [f"room-{n}" for n in range(2000)]
+
+def test_hashes_agree_across_processes():
+    # Fixed digest, unlike the per-process salted hash()
+    assert stable_hash("main") == stable_hash("main")
+    assert stable_hash("main") != stable_hash("room-2")
+    assert 0 <= stable_hash("main") < 2 ** 64
+
+def test_rooms_spread_over_every_shard():
+    ring = HashRing(range(4))
+    counts = {shard: 0 for shard in range(4)}
+    for room_id in ROOMS:
+        counts[ring.owner(room_id)] += 1
+    assert all(count > len(ROOMS) / 8 for count in counts.values())
+
+def test_adding_a_shard_only_moves_rooms_onto_it():
+    before, after = HashRing(range(4)), HashRing(range(5))
+    moved = [room_id for room_id in ROOMS if before.owner(room_id) != after.owner(room_id)]
+    assert all(after.owner(room_id) == 4 for room_id in moved)
+    assert len(moved) < len(ROOMS) / 3
+
+def test_a_ring_needs_a_node():
+    with pytest.raises(ValueError):
+        HashRing([])
+
+def test_a_worker_owns_exactly_its_arc(monkeypatch):
+    monkeypatch.setattr(sharding, "SHARD_INDEX", None)
+    assert local_ownership() is None
+    monkeypatch.setattr(sharding, "SHARD_COUNT", 3)
+    owners = []
+    for index in range(3):
+        monkeypatch.setattr(sharding, "SHARD_INDEX", str(index))
+        owners.append(local_ownership())
+    assert all(sum(owns(room_id) for owns in owners) == 1 for room_id in ROOMS[:200])
+
+@pytest.fixture
+def shard(game_server, monkeypatch):
+    """game_server on a free local port, standing in for shard worker 0"""
+    monkeypatch.setattr(game_server, "game_manager", game_server.GameManager())
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(game_server.app, host="127.0.0.1", port=port, lifespan="off", log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 5
+    while not server.started and time.monotonic() < deadline:
+        time.sleep(0.01)
+    yield f"127.0.0.1:{port}"
+    server.should_exit = True
+    thread.join(5)
+
+def test_router_proxies_a_websocket_to_the_owning_shard(shard, monkeypatch):
+    import router  # mounts /app/public at import, like game_server
+
+    monkeypatch.setattr(router, "shard_address", lambda index: shard)
+    with TestClient(router.app) as client, client.websocket_connect("/ws/p1") as websocket:
+        joined = websocket.receive_json()
+        while joined["type"] != "room_joined":
+            joined = websocket.receive_json()
+        assert joined["room_id"] == "main" and "p1" in router.sessions
+        websocket.send_text(json.dumps({"type": "chat_message", "message": "through the router"}))
+        chat = websocket.receive_json()
+        while chat["type"] != "chat_message":
+            chat = websocket.receive_json()
+        assert chat["message"] == "through the router"
+    assert "p1" not in router.sessions and "p1" not in router.matchmaker.room_of
@@ -0,0 +1,40 @@
+import asyncio
+import json
+
+from snapshots import SnapshotHistory, apply_patch, merge_patch
+
+from support import join
+
+OLD = {"is_active": False, "players": {"a": {"x": 1, "y": 2}, "b": {"x": 0, "y": 0}}}
+NEW = {"is_active": True, "players": {"a": {"x": 3, "y": 2}, "c": {"x": 5, "y": 5}}}
+
+def test_merge_patch_carries_only_what_changed():
+    patch = merge_patch(OLD, NEW)
+    assert patch == {"is_active": True, "players": {"a": {"x": 3}, "b": None, "c": {"x": 5, "y": 5}}}
+    assert apply_patch(OLD, patch) == NEW
+    assert merge_patch(NEW, NEW) == {}
+
+def test_deltas_are_cached_until_the_room_moves_on():
+    history = SnapshotHistory(depth=2)
+    history.record(1, OLD)
+    history.record(2, NEW)
+    text = history.delta_json(1, 2)
+    assert json.loads(text) == {"from": 1, "to": 2, "patch": merge_patch(OLD, NEW)}
+    assert history.delta_json(1, 2) is text
+    history.record(3, OLD)
+    assert history.delta_json(1, 3) is None  # fell out of the history
+    assert json.loads(history.delta_json(2, 3))["patch"] == merge_patch(NEW, OLD)
+
+def test_a_client_holding_an_old_version_can_patch_its_way_to_the_current_state(game_server):
+    async def scenario():
+        manager = game_server.GameManager()
+        await join(manager, "a")
+        held_version = manager.rooms["main"].version
+        held = json.loads(manager.get_room_state_json("main"))
+        await join(manager, "b")
+        return held_version, held, manager.get_room_delta_json("main", held_version), manager.get_room_state_json("main")
+
+    held_version, held, delta, current = asyncio.run(scenario())
+    delta = json.loads(delta)
+    assert delta["from"] == held_version
+    assert apply_patch(held, delta["patch"]) == json.loads(current)
@@ -0,0 +1,38 @@
+import math
+import random
+
+from spatial import SpatialGrid
+
+def scatter(count: int, spread: float = 40.0, seed: int = 7) -> SpatialGrid:
+    rng = random.Random(seed)
+    grid = SpatialGrid()
+    for n in range(count):
+        grid.update(f"p{n}", rng.uniform(-spread, spread), rng.uniform(0, 20), rng.uniform(-spread, spread))
+    return grid
+
+def brute_force(grid: SpatialGrid, point, exclude=None):
+    return sorted(((player_id, math.dist(point, position)) for player_id, position in grid.positions.items()
+                   if player_id != exclude), key=lambda item: item[1])
+
+def test_radius_queries_match_brute_force():
+    grid = scatter(300)
+    for radius in (3.0, 12.0, 200.0):
+        expected = [item for item in brute_force(grid, (1.0, 5.0, -2.0)) if item[1] <= radius]
+        assert grid.query_radius(1.0, 5.0, -2.0, radius) == expected
+
+def test_nearest_matches_brute_force():
+    for count in (5, 300):
+        grid = scatter(count)
+        expected = brute_force(grid, grid.positions["p0"], exclude="p0")[:4]
+        assert grid.nearest_to_player("p0", 4) == expected
+
+def test_moves_and_removals_keep_cells_in_step():
+    grid = SpatialGrid(cell_size=4.0)
+    grid.update("a", 1.0, 1.0, 1.0)
+    grid.update("b", 2.0, 1.0, 1.0)
+    grid.update("a", 30.0, 1.0, 1.0)
+    assert grid.near_player("b", 3.0) == []
+    grid.remove("b")
+    assert "b" not in grid and len(grid) == 1
+    assert set(grid.cells) == {grid.cell_of(30.0, 1.0, 1.0)}
+    assert grid.near_player("b", 3.0) == []
@@ -0,0 +1,59 @@
+import asyncio
+
+from tick import RoomTicker, parse_tick_rates
+
+from support import join, settle
+
+def test_parse_tick_rates_skips_malformed_entries():
+    assert parse_tick_rates("arena=20, main=0,lobby,x=fast,neg=-5") == {"arena": 20.0, "main": 0.0, "neg": 0.0}
+
+def test_ticker_runs_at_its_rate():
+    ticks = []
+
+    async def on_tick(room_id, tick):
+        ticks.append((room_id, tick))
+
+    async def scenario():
+        ticker = RoomTicker("main", 50, on_tick)
+        ticker.start()
+        await asyncio.sleep(0.11)
+        ticker.stop()
+
+    asyncio.run(scenario())
+    assert ticks[:3] == [("main", 1), ("main", 2), ("main", 3)]
+    assert 4 <= len(ticks) <= 7
+
+def test_configured_rooms_tick_from_their_first_player(game_server, monkeypatch):
+    monkeypatch.setattr(game_server, "ROOM_TICK_RATES", {"arena": 20.0})
+
+    async def scenario():
+        manager = game_server.GameManager()
+        await join(manager, "a", "arena")
+        await join(manager, "b", "main")
+        rates = manager.rooms["arena"].tick_rate, manager.rooms["main"].tick_rate
+        running = sorted(manager.tickers)
+        for player_id in ("a", "b"):
+            await manager.for_player(player_id, manager.remove_player, player_id)
+        return rates, running
+
+    assert asyncio.run(scenario()) == ((20.0, 0.0), ["arena"])
+
+def test_moves_between_ticks_go_out_as_one_snapshot(game_server):
+    async def scenario():
+        manager = game_server.GameManager()
+        a = await join(manager, "a")
+        for player_id in ("b", "c"):
+            await join(manager, player_id)
+        manager.rooms["main"].tick_rate = 10  # ticks are driven by hand below
+        for player_id, x in (("b", 1.0), ("c", 2.0), ("b", 3.0)):
+            await manager.for_player(player_id, manager.update_player_position, player_id, {"x": x, "animation_state": "walking"})
+        await manager.in_room("main", manager.flush_room_snapshot, "main", 1)
+        await manager.in_room("main", manager.flush_room_snapshot, "main", 2)
+        await settle()
+        return a
+
+    a = asyncio.run(scenario())
+    assert not a.of_type("player_moved")
+    (snapshot,) = a.of_type("room_snapshot")
+    assert snapshot["tick"] == 1
+    assert {pid: state["position"]["x"] for pid, state in snapshot["players"].items()} == {"b": 3.0, "c": 2.0}
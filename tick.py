@@ -0,0 +1,60 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+def parse_tick_rates(spec: str) -> Dict[str, float]:
+    """Parse "room=hz,..." into {room id: snapshots per second}"""
+    rates = {}
+    for entry in filter(None, (part.strip() for part in spec.split(","))):
+        try:
+            room_id, rate = entry.rsplit("=", 1)
+            rates[room_id.strip()] = max(0.0, float(rate))
+        except ValueError:
+            logger.warning(f"Ignoring malformed room tick rate {entry!r}")
+    return rates
+
+class RoomTicker:
+    """Runs an async callback at a fixed rate without accumulating drift"""
+
+    def __init__(self, room_id: str, rate_hz: float, callback: Callable[[str, int], Awaitable[None]]):
+        self.room_id = room_id
+        self.rate_hz = rate_hz
+        self.callback = callback
+        self.tick = 0
+        self.overruns = 0
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        if not self.running:
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        interval = 1.0 / self.rate_hz
+        next_tick = loop.time()
+        while True:
+            next_tick += interval
+            self.tick += 1
+            try:
+                await self.callback(self.room_id, self.tick)
+            except Exception as e:
+                logger.error(f"Tick {self.tick} failed for room {self.room_id}: {str(e)}")
+
+            delay = next_tick - loop.time()
+            if delay < 0:
+                # Fell behind; drop the missed ticks instead of bursting to catch up
+                self.overruns += 1
+                next_tick = loop.time()
+                delay = 0
+            await asyncio.sleep(delay)